@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Bulk Get Benchmark: serial get_json() loop vs S3Helper.get_many().
+
+Aggregating an upload in /results fetches one result object per customer
+inside an API Gateway request (29 s timeout). This seeds the in-memory S3
+client with customer-sized result documents, adds a simulated round trip
+to every call, and fetches them all:
+
+    serial   [s3.get_json(key) for key in keys], as /results used to
+    get_many s3.get_many(keys, concurrency=N)
+
+Usage:
+    python benchmarks/bulk_get_benchmark.py
+    python benchmarks/bulk_get_benchmark.py --keys 500 --latency-ms 50 --concurrency 8,16,32
+"""
+import argparse
+import sys
+import time
+
+from local_aws import local_s3_helper
+
+GATEWAY_TIMEOUT_SECONDS = 29
+
+
+def result_document(index):
+    """Roughly the size and shape of a format_customer_result() document."""
+    customer_id = f"C{index:04d}"
+    return {
+        'customer_id': customer_id,
+        'company_name': f"Company {index}",
+        'mrr': 499 + index,
+        'status': 'success',
+        'analysis': {
+            'category': 'pricing',
+            'confidence': 0.9,
+            'insights': 'Customer cited cost relative to usage. ' * 10
+        },
+        'campaign': {
+            'emails': [{'subject': f"Email {n} for {customer_id}", 'body': 'Personalised win-back copy. ' * 30}
+                       for n in range(3)]
+        }
+    }
+
+
+def seed(s3, keys):
+    for index, key in enumerate(keys):
+        s3.put_json(key, result_document(index), indent=None)
+
+
+def run_once(strategy, keys, latency_ms, concurrency):
+    """Fetch every key once with `strategy`; returns wall time and GET count."""
+    s3 = local_s3_helper()
+    seed(s3, keys)
+    s3.s3_client.latency = latency_ms / 1000
+    gets_before = s3.s3_client.calls['get_object']
+
+    start = time.perf_counter()
+    if strategy == 'serial':
+        results = [s3.get_json(key) for key in keys]
+    else:
+        results = s3.get_many(keys, concurrency=concurrency)
+    wall = time.perf_counter() - start
+
+    assert all(result is not None for result in results)
+    assert [result['customer_id'] for result in results] == [f"C{i:04d}" for i in range(len(keys))]
+    return {'wall': wall, 'gets': s3.s3_client.calls['get_object'] - gets_before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', default='100,500', help='Comma-separated object counts')
+    parser.add_argument('--latency-ms', type=float, default=30, help='Simulated S3 round trip per call')
+    parser.add_argument('--concurrency', default='4,16,32', help='Comma-separated get_many concurrency levels')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"🏁 BULK GET BENCHMARK ({args.latency_ms:.0f}ms per S3 call)")
+    print("=" * 80)
+    print(f"{'keys':>6} {'strategy':>9} {'conc':>5} {'gets':>6} {'wall s':>8} {'keys/s':>9} {'speedup':>8} "
+          f"{'gateway':>8}")
+    print("-" * 80)
+
+    for count in (int(k) for k in args.keys.split(',')):
+        keys = [f"results/bench/customers/C{i:04d}.json" for i in range(count)]
+        runs = [('serial', 1)] + [('get_many', int(c)) for c in args.concurrency.split(',')]
+        baseline = None
+        for strategy, concurrency in runs:
+            m = run_once(strategy, keys, args.latency_ms, concurrency)
+            baseline = baseline or m['wall']
+            gateway = 'ok' if m['wall'] < GATEWAY_TIMEOUT_SECONDS else 'TIMEOUT'
+            print(f"{count:>6} {strategy:>9} {concurrency:>5} {m['gets']:>6} {m['wall']:>8.2f} "
+                  f"{count / m['wall']:>9.0f} {baseline / m['wall']:>7.1f}x {gateway:>8}")
+            sys.stdout.flush()
+
+    print("=" * 80)
+    print(f"gateway = fits in API Gateway's {GATEWAY_TIMEOUT_SECONDS}s integration timeout")
+
+
+if __name__ == '__main__':
+    main()
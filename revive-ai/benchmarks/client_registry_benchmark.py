@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Client Registry Benchmark: per-call boto3 client construction vs shared clients.
+
+Before the registry, every analysis step built its own boto3 client (and
+BedrockClient) inside the call. This measures what that costs per call by
+building real boto3 clients offline - no request is sent - and comparing
+with a lookup in shared.client_registry:
+
+    per_call  boto3.client(service) on every call
+    session   a new boto3 Session plus client on every call (thread-safe variant)
+    registry  get_client(service) - built once, then a dict lookup
+
+Construction is also run from several threads at once, as the worker pool
+did, which is where per-call clients hurt most (they serialise on botocore's
+loader and each one opens its own connection pool).
+
+Usage:
+    python benchmarks/client_registry_benchmark.py
+    python benchmarks/client_registry_benchmark.py --calls 200 --threads 1,10 --service s3 --strategy per_call,registry
+"""
+import argparse
+import sys
+import threading
+import time
+
+import local_aws  # noqa: F401  (puts lambda/ on sys.path)
+
+import boto3
+
+from shared.client_registry import get_client, new_client, reset_clients
+
+
+def _per_call(service):
+    return boto3.client(service, region_name='us-east-1')
+
+
+def _session(service):
+    return boto3.session.Session().client(service, region_name='us-east-1')
+
+
+def _registry(service):
+    return get_client(service, 'us-east-1')
+
+
+STRATEGIES = {
+    'per_call': _per_call,
+    'session': _session,
+    'registry': _registry
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_once(strategy, service, calls, threads):
+    """Build/look up `calls` clients spread over `threads` threads."""
+    build = STRATEGIES[strategy]
+    reset_clients()
+    # Warm botocore's loader cache so every strategy pays only steady-state costs
+    new_client(service, 'us-east-1')
+
+    timings = []
+    timings_lock = threading.Lock()
+    per_thread = max(1, calls // threads)
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        start_barrier.wait()
+        local = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            build(service)
+            local.append(time.perf_counter() - start)
+        with timings_lock:
+            timings.extend(local)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+
+    wall_start = time.perf_counter()
+    start_barrier.wait()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+
+    return {
+        'calls': len(timings),
+        'wall': wall,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--strategy', default='per_call,session,registry',
+                        help='Comma-separated strategies: per_call, session, registry')
+    parser.add_argument('--service', default='bedrock-runtime,s3', help='Comma-separated boto3 service names')
+    parser.add_argument('--calls', type=int, default=40, help='Client constructions/lookups per run')
+    parser.add_argument('--threads', default='1,10', help='Comma-separated thread counts')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"🏁 CLIENT REGISTRY BENCHMARK ({args.calls} calls per run)")
+    print("=" * 80)
+    print(f"{'service':>16} {'threads':>7} {'strategy':>9} {'calls':>6} {'wall s':>7} "
+          f"{'mean ms':>8} {'p99 ms':>8}")
+    print("-" * 80)
+
+    for service in args.service.split(','):
+        for threads in (int(t) for t in args.threads.split(',')):
+            for strategy in args.strategy.split(','):
+                m = run_once(strategy, service, args.calls, threads)
+                print(f"{service:>16} {threads:>7} {strategy:>9} {m['calls']:>6} {m['wall']:>7.2f} "
+                      f"{m['mean_ms']:>8.2f} {m['p99_ms']:>8.2f}")
+                sys.stdout.flush()
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
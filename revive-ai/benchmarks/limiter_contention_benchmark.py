@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Limiter Contention Benchmark: many threads hammering one rate limiter.
+
+Compares the FIFO condition-variable TokenBucketRateLimiter with the
+previous polling implementation (sleep(0.1) until a token is free).
+Every thread acquires a fixed number of tokens; the benchmark reports
+per-acquire wait p50/p99/max, Jain's fairness index over per-thread total
+wait (1.0 = perfectly even), how far the run overshot the ideal duration
+at the configured rate, and CPU seconds spent by the process.
+
+Usage:
+    python benchmarks/limiter_contention_benchmark.py
+    python benchmarks/limiter_contention_benchmark.py --threads 256 --rate 6000 --per-thread 5
+    python benchmarks/limiter_contention_benchmark.py --impl fifo --timeout 0.5
+"""
+import argparse
+import sys
+import threading
+import time
+
+import local_aws  # noqa: F401  (puts lambda/ on sys.path)
+
+from shared.rate_limiter import TokenBucketRateLimiter
+
+
+class PollingRateLimiter(TokenBucketRateLimiter):
+    """The pre-FIFO acquire(): re-check the bucket every 100ms."""
+
+    def acquire(self, tokens: int = 1, timeout: float = None) -> bool:
+        while True:
+            with self.lock:
+                if self._take(tokens) == 0:
+                    return True
+            time.sleep(0.1)
+
+
+IMPLEMENTATIONS = {
+    'polling': PollingRateLimiter,
+    'fifo': TokenBucketRateLimiter
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def jain_index(values):
+    """Jain's fairness index: (sum x)^2 / (n * sum x^2)."""
+    squares = sum(v * v for v in values)
+    if not squares:
+        return 1.0
+    return sum(values) ** 2 / (len(values) * squares)
+
+
+def run_once(impl, threads, rate, burst, per_thread, timeout):
+    limiter = IMPLEMENTATIONS[impl](rate, burst)
+    # Start with an empty bucket so every acquire is contended
+    limiter.tokens = 0.0
+    limiter.last_refill = time.time()
+
+    waits = []
+    per_thread_wait = [0.0] * threads
+    timeouts = [0]
+    results_lock = threading.Lock()
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        start_barrier.wait()
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            acquired = limiter.acquire(tokens=1, timeout=timeout)
+            waited = time.perf_counter() - start
+            with results_lock:
+                per_thread_wait[index] += waited
+                if acquired:
+                    waits.append(waited)
+                else:
+                    timeouts[0] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    start_barrier.wait()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    ideal = len(waits) / (rate / 60.0)
+    return {
+        'acquired': len(waits),
+        'timeouts': timeouts[0],
+        'wall': wall,
+        'overshoot': (wall - ideal) / ideal * 100 if ideal else 0.0,
+        'p50': percentile(waits, 50),
+        'p99': percentile(waits, 99),
+        'max': max(waits) if waits else 0.0,
+        'fairness': jain_index(per_thread_wait),
+        'cpu': cpu
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--impl', default='polling,fifo', help='Comma-separated implementations: polling, fifo')
+    parser.add_argument('--threads', type=int, default=128, help='Concurrent acquiring threads')
+    parser.add_argument('--rate', type=int, default=3000, help='Limiter rate (tokens per minute)')
+    parser.add_argument('--burst', type=int, default=1, help='Bucket capacity')
+    parser.add_argument('--per-thread', type=int, default=3, help='Acquires per thread')
+    parser.add_argument('--timeout', type=float, default=None, help='acquire() timeout in seconds (fifo only)')
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"🏁 LIMITER CONTENTION BENCHMARK ({args.threads} threads x {args.per_thread} acquires, "
+          f"{args.rate} tokens/min, burst {args.burst})")
+    print("=" * 100)
+    print(f"{'impl':>8} {'acquired':>8} {'timeouts':>8} {'wall s':>7} {'overshoot':>9} "
+          f"{'p50 s':>7} {'p99 s':>7} {'max s':>7} {'fairness':>8} {'cpu s':>7}")
+    print("-" * 100)
+
+    for impl in args.impl.split(','):
+        m = run_once(impl, args.threads, args.rate, args.burst, args.per_thread, args.timeout)
+        print(f"{impl:>8} {m['acquired']:>8} {m['timeouts']:>8} {m['wall']:>7.2f} {m['overshoot']:>8.1f}% "
+              f"{m['p50']:>7.2f} {m['p99']:>7.2f} {m['max']:>7.2f} {m['fairness']:>8.3f} {m['cpu']:>7.2f}")
+        sys.stdout.flush()
+
+    print("=" * 100)
+
+
+if __name__ == '__main__':
+    main()
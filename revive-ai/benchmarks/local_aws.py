@@ -0,0 +1,184 @@
+"""
+Local AWS stand-ins shared by the benchmark scripts.
+
+Puts the Lambda sources on sys.path, switches Bedrock to the offline stub
+and provides an in-memory S3 client that S3Helper can use unchanged.
+"""
+import csv
+import hashlib
+import importlib.util
+import io
+import os
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from botocore.exceptions import ClientError
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT_DIR, 'lambda')
+DEMO_DATA_DIR = os.path.join(ROOT_DIR, 'demo_data')
+
+if LAMBDA_DIR not in sys.path:
+    sys.path.insert(0, LAMBDA_DIR)
+
+os.environ.setdefault('BEDROCK_BACKEND', 'stub')
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+def load_lambda(name: str):
+    """Import a Lambda's lambda_function.py under a unique module name."""
+    module_name = f"{name}_lambda_function"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = os.path.join(LAMBDA_DIR, name, 'lambda_function.py')
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_customers(csv_path: str) -> List[Dict[str, Any]]:
+    """Read and validate a demo CSV the same way /upload does."""
+    from shared.schemas import validate_customer
+
+    with open(csv_path, encoding='utf-8') as f:
+        rows = list(csv.DictReader(io.StringIO(f.read())))
+
+    customers = []
+    for row in rows:
+        is_valid, error = validate_customer(row)
+        if not is_valid:
+            raise ValueError(f"{os.path.basename(csv_path)}: {error}")
+        customers.append(row)
+    return customers
+
+
+def demo_csvs() -> List[str]:
+    """All CSVs under demo_data/, smallest first."""
+    paths = [
+        os.path.join(DEMO_DATA_DIR, name)
+        for name in os.listdir(DEMO_DATA_DIR)
+        if name.endswith('.csv')
+    ]
+    return sorted(paths, key=os.path.getsize)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _Body:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class InMemoryS3Client:
+    """
+    Minimal thread-safe S3 client for get/put/head/list with optional latency.
+
+    Args:
+        latency_ms: Simulated round-trip time added to every call
+    """
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000.0
+        self.objects: Dict[str, Dict[str, bytes]] = {}
+        self.lock = threading.Lock()
+        self.calls = {'get_object': 0, 'put_object': 0, 'head_object': 0, 'list_objects_v2': 0}
+
+    def _tick(self, operation: str) -> None:
+        with self.lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _error(code: str, operation: str) -> ClientError:
+        return ClientError({'Error': {'Code': code, 'Message': code}}, operation)
+
+    @staticmethod
+    def _etag(data: bytes) -> str:
+        return '"' + hashlib.md5(data).hexdigest() + '"'
+
+    def put_object(self, Bucket: str, Key: str, Body, ContentType: str = '',
+                   IfMatch: Optional[str] = None, IfNoneMatch: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._tick('put_object')
+        data = Body.encode('utf-8') if isinstance(Body, str) else Body
+        with self.lock:
+            bucket = self.objects.setdefault(Bucket, {})
+            current = bucket.get(Key)
+            # Conditional writes, as S3 evaluates them
+            if IfNoneMatch == '*' and current is not None:
+                raise self._error('PreconditionFailed', 'PutObject')
+            if IfMatch is not None and (current is None or self._etag(current) != IfMatch):
+                raise self._error('PreconditionFailed', 'PutObject')
+            bucket[Key] = data
+        return {'ETag': self._etag(data)}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        self._tick('get_object')
+        with self.lock:
+            data = self.objects.get(Bucket, {}).get(Key)
+        if data is None:
+            raise self._error('NoSuchKey', 'GetObject')
+        return {'Body': _Body(data), 'ContentLength': len(data), 'ETag': self._etag(data)}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        self._tick('head_object')
+        with self.lock:
+            data = self.objects.get(Bucket, {}).get(Key)
+        if data is None:
+            raise self._error('404', 'HeadObject')
+        return {'ContentLength': len(data), 'ETag': self._etag(data)}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = '', ContinuationToken: Optional[str] = None,
+                        MaxKeys: int = 1000, **kwargs) -> Dict[str, Any]:
+        self._tick('list_objects_v2')
+        with self.lock:
+            keys = sorted(k for k in self.objects.get(Bucket, {}) if k.startswith(Prefix))
+            sizes = {k: len(self.objects[Bucket][k]) for k in keys}
+        start = int(ContinuationToken) if ContinuationToken else 0
+        page = keys[start:start + MaxKeys]
+        result = {'KeyCount': len(page), 'IsTruncated': start + MaxKeys < len(keys)}
+        if page:
+            result['Contents'] = [{'Key': k, 'Size': sizes[k]} for k in page]
+        if result['IsTruncated']:
+            result['NextContinuationToken'] = str(start + MaxKeys)
+        return result
+
+    def get_paginator(self, operation: str):
+        client = self
+
+        class _Paginator:
+            def paginate(self, **kwargs):
+                token = None
+                while True:
+                    if token:
+                        kwargs['ContinuationToken'] = token
+                    page = client.list_objects_v2(**kwargs)
+                    yield page
+                    token = page.get('NextContinuationToken')
+                    if not token:
+                        break
+
+        return _Paginator()
+
+
+def local_s3_helper(bucket: str = 'revive-ai-data', latency_ms: float = 0):
+    """S3Helper wired to an InMemoryS3Client."""
+    from shared.s3_helper import S3Helper
+
+    s3 = S3Helper(bucket)
+    s3.s3_client = InMemoryS3Client(latency_ms=latency_ms)
+    return s3
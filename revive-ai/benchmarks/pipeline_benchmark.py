@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark: run demo_data CSVs through process_single_customer
+against the offline Bedrock stand-in (no AWS quota used).
+
+Reports customers/minute, p50/p99 per-customer latency, throttle and retry counts
+for each engine / MAX_WORKERS / API_RATE_LIMIT combination.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py
+    python benchmarks/pipeline_benchmark.py --csv demo_data/demo_50_customers.csv \\
+        --workers 5,10,20 --rate-limit 60,100 --agent-latency-ms 2000 --model-latency-ms 400
+    python benchmarks/pipeline_benchmark.py --engine threads,asyncio --workers 10,200
+    python benchmarks/pipeline_benchmark.py --engine threads,pipeline
+    python benchmarks/pipeline_benchmark.py --s3-latency-ms 150 --write-behind off,on
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import local_aws
+
+from shared import bedrock_stub
+from shared.circuit_breaker import reset_circuit_breaker
+from shared.client_registry import reset_clients
+from shared.quota_limiter import reset_quota_limiter
+from shared.rate_limiter import AdaptiveRateLimiter, TokenBucketRateLimiter
+from shared.retry_policy import get_retry_budget, new_retry_budget, set_retry_budget
+
+COMPANY_INFO = {
+    'name': 'ReviveAI',
+    'product_name': 'ReviveAI Platform',
+    'value_proposition': 'AI-powered customer analytics and retention platform'
+}
+
+
+def _run_threads(api, customers, workers, upload_id, s3):
+    """Threaded engine: one process_single_customer per pool worker."""
+    outcomes = []
+
+    def timed(customer):
+        start = time.perf_counter()
+        result = api.process_single_customer(customer, upload_id, COMPANY_INFO, s3)
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(timed, customer) for customer in customers]
+        for future in as_completed(futures):
+            outcomes.append(future.result())
+    return outcomes
+
+
+def _run_asyncio(api, customers, workers, upload_id, s3):
+    """asyncio engine: `workers` customers in flight on one event loop."""
+    import asyncio
+
+    async def run():
+        in_flight = asyncio.Semaphore(workers)
+
+        async def timed(customer):
+            async with in_flight:
+                start = time.perf_counter()
+                result = await api.process_single_customer_async(customer, upload_id, COMPANY_INFO, s3)
+                return result, time.perf_counter() - start
+
+        return await asyncio.gather(*(timed(customer) for customer in customers))
+
+    return asyncio.run(run())
+
+
+def _run_pipeline(api, customers, workers, upload_id, s3):
+    """Pipeline engine: `workers` analysis workers, other stages from PIPELINE_* settings."""
+    api.PIPELINE_ANALYSIS_WORKERS = workers
+    pipeline = api.build_customer_pipeline(upload_id, COMPANY_INFO, s3)
+    outcomes = []
+
+    def on_result(ctx, error):
+        result = api.pipeline_item_result(ctx, error)
+        outcomes.append((result, time.perf_counter() - ctx['pipeline_started']))
+
+    pipeline.run(({'customer': customer} for customer in customers), on_result)
+    return outcomes
+
+
+ENGINES = {'threads': _run_threads, 'asyncio': _run_asyncio, 'pipeline': _run_pipeline}
+
+
+def run_once(api, customers, workers, rate_limit, stub_config, verbose=False, engine='threads', limiter='fixed',
+             s3_latency_ms=0, write_behind='off'):
+    """Process one CSV with the given settings and return metrics."""
+    bedrock_stub.configure(stub_config)
+    if limiter == 'adaptive':
+        api.rate_limiter = AdaptiveRateLimiter(rate_per_minute=rate_limit)
+    else:
+        api.rate_limiter = TokenBucketRateLimiter(rate_per_minute=rate_limit)
+    # Every run starts with full per-model RPM/TPM buckets and a closed breaker
+    reset_quota_limiter()
+    reset_circuit_breaker()
+    # Cached BedrockClients hold the previous run's ModelQuota
+    reset_clients()
+    set_retry_budget(new_retry_budget())
+    s3 = local_aws.local_s3_helper(latency_ms=s3_latency_ms)
+    if write_behind == 'on':
+        s3.start_write_behind(workers=api.RESULT_WRITER_THREADS, queue_size=api.RESULT_WRITE_QUEUE)
+    upload_id = 'bench'
+
+    sink = io.StringIO()
+    redirect = contextlib.nullcontext() if verbose else contextlib.ExitStack()
+    if not verbose:
+        redirect.enter_context(contextlib.redirect_stdout(sink))
+        redirect.enter_context(contextlib.redirect_stderr(sink))
+
+    started = time.perf_counter()
+    with redirect:
+        outcomes = ENGINES[engine](api, customers, workers, upload_id, s3)
+        # Queued result puts count towards the run, as they do before status says complete
+        s3.close()
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed for _, elapsed in outcomes]
+    failed = sum(1 for result, _ in outcomes if result['status'] != 'success')
+
+    stats = bedrock_stub.get_stub_stats()
+    return {
+        'customers': len(customers),
+        'failed': failed,
+        'wall_seconds': wall,
+        'customers_per_minute': len(customers) / wall * 60 if wall > 0 else 0,
+        'p50': local_aws.percentile(latencies, 50),
+        'p99': local_aws.percentile(latencies, 99),
+        'throttles': stats['throttles'],
+        'retries': get_retry_budget().stats()['retries'],
+        'final_rpm': api.rate_limiter.stats()['rate_per_minute'],
+        'model_calls': stats['model_calls'],
+        'agent_calls': stats['agent_calls']
+    }
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--csv', action='append', help='CSV file(s) to run (default: every demo_data CSV)')
+    parser.add_argument('--engine', default='threads', help='Comma-separated engines: threads, asyncio, pipeline')
+    parser.add_argument('--workers', type=parse_int_list, default=[10],
+                        help='Comma-separated MAX_WORKERS values (customers in flight for asyncio)')
+    parser.add_argument('--rate-limit', type=parse_int_list, default=[100], help='Comma-separated API_RATE_LIMIT values (RPM)')
+    parser.add_argument('--limiter', default='fixed',
+                        help='Comma-separated limiter modes: fixed, adaptive (adaptive starts at --rate-limit)')
+    parser.add_argument('--rpm-ceiling', type=int, default=125, help='Stub quota ceiling (RPM)')
+    parser.add_argument('--model-latency-ms', type=float, default=1500, help='Median InvokeModel latency')
+    parser.add_argument('--agent-latency-ms', type=float, default=8000, help='Median InvokeAgent latency')
+    parser.add_argument('--latency-sigma', type=float, default=0.35, help='Lognormal latency jitter')
+    parser.add_argument('--s3-latency-ms', type=float, default=0, help='Simulated S3 round trip per call')
+    parser.add_argument('--write-behind', default='off',
+                        help='Comma-separated result persistence modes: off, on (threads/asyncio engines)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true', help='Show pipeline logs')
+    args = parser.parse_args()
+
+    api = local_aws.load_lambda('api_handler')
+    csv_paths = args.csv or local_aws.demo_csvs()
+
+    stub_config = bedrock_stub.StubConfig(
+        rpm_ceiling=args.rpm_ceiling,
+        model_latency_ms=args.model_latency_ms,
+        agent_latency_ms=args.agent_latency_ms,
+        latency_sigma=args.latency_sigma,
+        seed=args.seed
+    )
+
+    print("=" * 124)
+    print(f"🏁 PIPELINE BENCHMARK (stub ceiling {args.rpm_ceiling} RPM, "
+          f"model ~{args.model_latency_ms:.0f}ms, agent ~{args.agent_latency_ms:.0f}ms)")
+    print("=" * 124)
+    print(f"{'csv':<36} {'engine':>8} {'workers':>7} {'rpm':>5} {'limiter':>8} {'wb':>3} {'n':>4} {'fail':>4} "
+          f"{'cust/min':>9} {'p50 s':>7} {'p99 s':>7} {'throttles':>9} {'retries':>7} {'end rpm':>8}")
+    print("-" * 124)
+
+    for csv_path in csv_paths:
+        customers = local_aws.load_customers(csv_path)
+        for engine in args.engine.split(','):
+            for workers in args.workers:
+                for rate_limit in args.rate_limit:
+                    for limiter in args.limiter.split(','):
+                        for write_behind in args.write_behind.split(','):
+                            m = run_once(api, customers, workers, rate_limit, stub_config, args.verbose, engine,
+                                         limiter, args.s3_latency_ms, write_behind)
+                            print(f"{os.path.basename(csv_path):<36} {engine:>8} {workers:>7} {rate_limit:>5} "
+                                  f"{limiter:>8} {write_behind:>3} {m['customers']:>4} {m['failed']:>4} "
+                                  f"{m['customers_per_minute']:>9.1f} {m['p50']:>7.2f} {m['p99']:>7.2f} "
+                                  f"{m['throttles']:>9} {m['retries']:>7} {m['final_rpm']:>8}")
+                            sys.stdout.flush()
+
+    print("=" * 124)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark: cold-start import and init cost per Lambda route.
+
+Every measurement runs in a fresh Python process, the way a new Lambda
+container starts. For each route it reports:
+
+    import ms    loading lambda_function.py (module-level init included)
+    warmup ms    the {"warmup": true} event (warm mode only)
+    first ms     the route's first invocation (clients/modules it builds lazily)
+    second ms    the same invocation again, fully warm
+    boto3        whether boto3 was loaded after import / after the first call
+    rss MB       peak resident memory of the process
+
+'cold' runs the route straight after import; 'warm' sends the warmup event
+first, which shows what eager initialization would cost up front and how
+much of the first call it removes. Bedrock is the offline stub (zero
+latency) and S3 the in-memory client, so no request leaves the machine;
+client construction itself is measured by client_registry_benchmark.py.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --route executor:/calculateCLV,api:/results --mode cold --repeat 5
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(os.path.dirname(BENCH_DIR), 'lambda')
+
+CUSTOMER = {
+    'customer_id': 'C001',
+    'company_name': 'DataTech Solutions',
+    'mrr': '2499',
+    'subscription_tier': 'enterprise',
+    'churn_date': '2025-10-01',
+    'cancellation_reason': 'Needed better API rate limits'
+}
+
+
+def _agent_event(action_group, api_path, params):
+    return {
+        'messageVersion': '1.0',
+        'actionGroup': action_group,
+        'apiPath': api_path,
+        'httpMethod': 'POST',
+        'parameters': [{'name': name, 'type': 'string', 'value': value} for name, value in params.items()],
+        'requestBody': {}
+    }
+
+
+# route name -> (Lambda directory, event)
+ROUTES = {
+    'executor:/calculateCLV': ('bedrock_agent_executor', _agent_event(
+        'churn-analysis-tools', '/calculateCLV', {'mrr': '2499', 'subscription_tier': 'enterprise'}
+    )),
+    'executor:/retrieveCustomerData': ('bedrock_agent_executor', _agent_event(
+        'data-tools', '/retrieveCustomerData', {'upload_id': 'bench', 'customer_id': 'C001'}
+    )),
+    'executor:/analyzeChurn': ('bedrock_agent_executor', _agent_event(
+        'churn-analysis-tools', '/analyzeChurn', CUSTOMER
+    )),
+    'api:/results': ('api_handler', {
+        'httpMethod': 'GET', 'path': '/results', 'queryStringParameters': {'upload_id': 'bench'}
+    }),
+    'api:/analyze-customer': ('api_handler', {
+        'httpMethod': 'POST', 'path': '/analyze-customer', 'body': json.dumps(CUSTOMER)
+    })
+}
+
+
+def child(route, mode):
+    """Measure one route in this (fresh) process and print a JSON line."""
+    os.environ.setdefault('BEDROCK_BACKEND', 'stub')
+    os.environ.setdefault('BEDROCK_STUB_MODEL_LATENCY_MS', '0')
+    os.environ.setdefault('BEDROCK_STUB_AGENT_LATENCY_MS', '0')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    sys.path.insert(0, LAMBDA_DIR)
+    lambda_name, event = ROUTES[route]
+
+    import importlib.util
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('lambda_function', os.path.join(LAMBDA_DIR, lambda_name, 'lambda_function.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    import_ms = (time.perf_counter() - start) * 1000
+    boto3_at_import = 'boto3' in sys.modules
+
+    # Local S3 after the timed import, so its own imports aren't counted
+    from local_aws import InMemoryS3Client
+    from shared.client_registry import set_client
+
+    s3 = InMemoryS3Client()
+    for region in (None, 'us-east-1'):
+        set_client('s3', s3, region_name=region)
+    s3.put_object(Bucket='revive-ai-data', Key='uploads/bench/customers.json', Body=json.dumps([CUSTOMER]))
+    s3.put_object(Bucket='revive-ai-data', Key='results/bench/status.json',
+                  Body=json.dumps({'status': 'completed', 'completed': 1, 'failed': 0, 'total': 1}))
+
+    devnull = open(os.devnull, 'w')
+    stdout = sys.stdout
+    sys.stdout = devnull
+    try:
+        warmup_ms = None
+        if mode == 'warm':
+            start = time.perf_counter()
+            module.lambda_handler({'warmup': True}, None)
+            warmup_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            module.lambda_handler(event, None)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        sys.stdout = stdout
+
+    print(json.dumps({
+        'import_ms': import_ms,
+        'warmup_ms': warmup_ms,
+        'first_ms': timings[0],
+        'second_ms': timings[1],
+        'boto3_at_import': boto3_at_import,
+        'boto3_after_call': 'boto3' in sys.modules,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def measure(route, mode, repeat):
+    """Run `repeat` fresh processes and return the median of each timing."""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', route, '--mode', mode],
+            capture_output=True, text=True, check=True, cwd=BENCH_DIR
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    def median(field):
+        values = sorted(run[field] for run in runs if run[field] is not None)
+        return values[len(values) // 2] if values else None
+
+    result = {field: median(field) for field in ('import_ms', 'warmup_ms', 'first_ms', 'second_ms', 'rss_mb')}
+    result['boto3_at_import'] = runs[-1]['boto3_at_import']
+    result['boto3_after_call'] = runs[-1]['boto3_after_call']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--route', default=','.join(ROUTES), help='Comma-separated routes: ' + ', '.join(ROUTES))
+    parser.add_argument('--mode', default='cold,warm', help='Comma-separated modes: cold, warm')
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per measurement (median reported)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.mode)
+        return
+
+    print("=" * 100)
+    print(f"🏁 STARTUP BENCHMARK (median of {args.repeat} fresh processes)")
+    print("=" * 100)
+    print(f"{'route':>32} {'mode':>5} {'import ms':>9} {'warmup ms':>9} {'first ms':>9} {'second ms':>9} "
+          f"{'boto3':>11} {'rss MB':>7}")
+    print("-" * 100)
+
+    for route in args.route.split(','):
+        for mode in args.mode.split(','):
+            m = measure(route, mode, args.repeat)
+            warmup = f"{m['warmup_ms']:>9.1f}" if m['warmup_ms'] is not None else f"{'-':>9}"
+            boto3 = f"{'yes' if m['boto3_at_import'] else 'no'}/{'yes' if m['boto3_after_call'] else 'no'}"
+            print(f"{route:>32} {mode:>5} {m['import_ms']:>9.1f} {warmup} {m['first_ms']:>9.1f} "
+                  f"{m['second_ms']:>9.1f} {boto3:>11} {m['rss_mb']:>7.1f}")
+            sys.stdout.flush()
+
+    print("=" * 100)
+    print("boto3 = loaded after import / after the first call")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ import csv
 import io
 import base64
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Any, Callable, Dict, List
 import uuid
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -17,11 +17,20 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 # Add shared module to path
 sys.path.insert(0, '/opt/python')
 
-from shared.s3_helper import S3Helper
+from shared.s3_helper import S3Helper, WriteBehindError
+from shared.progress_reporter import ProgressReporter, read_progress
+from shared.results_manifest import MAIN_WRITER, ResultsManifest, manifest_entry, read_manifest
 from shared.schemas import create_status_stub, validate_customer
-from shared.rate_limiter import TokenBucketRateLimiter
-
-import boto3
+from shared.rate_limiter import AdaptiveRateLimiter, TokenBucketRateLimiter
+from shared.quota_limiter import get_model_quota, get_quota_limiter
+from shared.circuit_breaker import get_circuit_breaker
+from shared.agent_calls import AGENT_MODEL_ID, begin_agent_call, finish_agent_call
+from shared.retry_policy import AGENT_RETRY_POLICY, get_retry_budget, is_throttle, new_retry_budget, set_retry_budget
+from shared.bedrock_client import get_usage_totals
+from shared.client_registry import get_bedrock_client, get_client
+from shared.response_cache import get_response_cache
+from shared.single_flight import get_single_flight
+from shared.warmup import import_module, warm_up
 
 # Environment variables
 DATA_BUCKET = os.environ.get('DATA_BUCKET', 'revive-ai-data')
@@ -41,14 +50,135 @@ CAMPAIGN_GENERATOR_AGENT_ID = os.environ.get('CAMPAIGN_GENERATOR_AGENT_ID', 'HXM
 MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '10'))  # High concurrency for 1-500 customers
 API_RATE_LIMIT = int(os.environ.get('API_RATE_LIMIT', '100'))  # Target 100 RPM (80% of 125 limit)
 
+# RATE_LIMITER_MODE=adaptive starts at API_RATE_LIMIT and tunes the rate from
+# throttling feedback (AIMD) within [ADAPTIVE_MIN_RPM, ADAPTIVE_MAX_RPM]
+RATE_LIMITER_MODE = os.environ.get('RATE_LIMITER_MODE', 'fixed').lower()
+ADAPTIVE_MIN_RPM = float(os.environ.get('ADAPTIVE_MIN_RPM', '10'))
+ADAPTIVE_MAX_RPM = float(os.environ.get('ADAPTIVE_MAX_RPM', '250'))
+ADAPTIVE_INCREASE_RPM = float(os.environ.get('ADAPTIVE_INCREASE_RPM', '0.5'))
+ADAPTIVE_DECREASE_FACTOR = float(os.environ.get('ADAPTIVE_DECREASE_FACTOR', '0.7'))
+
+# RATE_LIMITER_MODE=distributed shares one API_RATE_LIMIT bucket across all
+# containers/uploads; RATE_LIMITER_BACKEND is 's3' (conditional puts on
+# DATA_BUCKET/RATE_LIMITER_KEY) or 'sqlite' (local file, for tests)
+RATE_LIMITER_BACKEND = os.environ.get('RATE_LIMITER_BACKEND', 's3').lower()
+RATE_LIMITER_KEY = os.environ.get('RATE_LIMITER_KEY', 'ratelimit/bedrock.json')
+RATE_LIMITER_SQLITE_PATH = os.environ.get('RATE_LIMITER_SQLITE_PATH', '/tmp/revive_rate_limiter.db')
+RATE_LIMITER_LEASE_SIZE = int(os.environ.get('RATE_LIMITER_LEASE_SIZE', '5'))
+
 CAMPAIGN_GENERATOR_ALIAS_ID = os.environ.get('CAMPAIGN_GENERATOR_ALIAS_ID', 'TSTALIASID')
+
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
+# Model for campaign generation and key-finding extraction
+HAIKU_MODEL_ID = 'us.anthropic.claude-haiku-4-5-20251001-v1:0'
+
+# Processing engine for async_process invocations:
+# - 'threads' (default): ThreadPoolExecutor with MAX_WORKERS
+# - 'asyncio': single event loop with up to ASYNC_MAX_IN_FLIGHT customers in flight
+# - 'pipeline': per-stage worker pools and rate budgets joined by bounded queues
+PROCESSING_ENGINE = os.environ.get('PROCESSING_ENGINE', 'threads').lower()
+ASYNC_MAX_IN_FLIGHT = int(os.environ.get('ASYNC_MAX_IN_FLIGHT', '200'))
+
+# Pipeline engine: workers and RPM budget per stage (RPM 0 = unlimited).
+# The analysis stage is limited by the shared rate_limiter (API_RATE_LIMIT).
+PIPELINE_ANALYSIS_WORKERS = int(os.environ.get('PIPELINE_ANALYSIS_WORKERS', str(MAX_WORKERS)))
+PIPELINE_CAMPAIGN_WORKERS = int(os.environ.get('PIPELINE_CAMPAIGN_WORKERS', '4'))
+PIPELINE_CAMPAIGN_RPM = int(os.environ.get('PIPELINE_CAMPAIGN_RPM', '0'))
+PIPELINE_FINDINGS_WORKERS = int(os.environ.get('PIPELINE_FINDINGS_WORKERS', '4'))
+PIPELINE_FINDINGS_RPM = int(os.environ.get('PIPELINE_FINDINGS_RPM', '0'))
+PIPELINE_PERSIST_WORKERS = int(os.environ.get('PIPELINE_PERSIST_WORKERS', '2'))
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', '20'))
+
+# Write-behind persistence of per-customer results (threads/asyncio engines):
+# workers queue the put and move on; RESULT_WRITER_THREADS uploaders drain a
+# queue of at most RESULT_WRITE_QUEUE results, flushed before completion
+RESULT_WRITE_BEHIND = os.environ.get('RESULT_WRITE_BEHIND', 'on').lower() in ('on', 'true', '1')
+RESULT_WRITER_THREADS = int(os.environ.get('RESULT_WRITER_THREADS', '4'))
+RESULT_WRITE_QUEUE = int(os.environ.get('RESULT_WRITE_QUEUE', '50'))
+
+# Fan-out: /process splits an upload into PROCESSING_SHARDS async invocations,
+# each writing its own progress object (results/{upload_id}/progress/{shard}.json);
+# /results merges them and finalizes once every shard is done
+PROCESSING_SHARDS = max(1, int(os.environ.get('PROCESSING_SHARDS', '1')))
+
+# Max concurrent GETs when /results aggregates per-customer result objects
+# (stay within CLIENT_MAX_POOL_CONNECTIONS)
+RESULT_READ_CONCURRENCY = int(os.environ.get('RESULT_READ_CONCURRENCY', '16'))
+
+# Cancellation-reason clustering: customers with near-identical reasons share
+# one ChurnAnalyzer agent call (first member runs it, the rest reuse it)
+REASON_CLUSTERING = os.environ.get('REASON_CLUSTERING', 'off').lower() in ('on', 'true', '1')
+REASON_CLUSTER_THRESHOLD = float(os.environ.get('REASON_CLUSTER_THRESHOLD', '0.6'))
+
+# Company context used for campaign generation
+COMPANY_INFO = {
+    'name': 'ReviveAI',
+    'product_name': 'ReviveAI Platform',
+    'value_proposition': 'AI-powered customer analytics and retention platform'
+}
+
+
+
+def build_distributed_rate_limiter():
+    """DistributedTokenBucketRateLimiter on the configured shared store."""
+    from shared.distributed_rate_limiter import (
+        DistributedTokenBucketRateLimiter, S3BucketStore, SQLiteBucketStore
+    )
+
+    if RATE_LIMITER_BACKEND == 'sqlite':
+        store = SQLiteBucketStore(RATE_LIMITER_SQLITE_PATH)
+    else:
+        store = S3BucketStore(get_client('s3', region_name=AWS_REGION), DATA_BUCKET, RATE_LIMITER_KEY)
+    return DistributedTokenBucketRateLimiter(store, API_RATE_LIMIT, lease_size=RATE_LIMITER_LEASE_SIZE)
+
+
 # Global rate limiter instance (shared across threads)
-rate_limiter = TokenBucketRateLimiter(rate_per_minute=API_RATE_LIMIT)
+if RATE_LIMITER_MODE == 'distributed':
+    rate_limiter = build_distributed_rate_limiter()
+elif RATE_LIMITER_MODE == 'adaptive':
+    rate_limiter = AdaptiveRateLimiter(
+        rate_per_minute=API_RATE_LIMIT,
+        min_rate=ADAPTIVE_MIN_RPM,
+        max_rate=ADAPTIVE_MAX_RPM,
+        increase=ADAPTIVE_INCREASE_RPM,
+        decrease_factor=ADAPTIVE_DECREASE_FACTOR
+    )
+else:
+    rate_limiter = TokenBucketRateLimiter(rate_per_minute=API_RATE_LIMIT)
+
+
+def get_agent_runtime():
+    """
+    Bedrock agent runtime client, built on first use so routes that never
+    invoke an agent (/upload, /results) don't create it on a cold start
+    (BEDROCK_BACKEND=stub swaps in the offline stand-in).
+    """
+    return get_client('bedrock-agent-runtime', region_name=AWS_REGION)
+
+
+def handle_warmup(event) -> Dict[str, Any]:
+    """
+    Pre-initialize clients and process-wide caches without doing any work.
 
-# Initialize Bedrock agent runtime client
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=AWS_REGION)
+    Invoke with {"warmup": true}, e.g. from an EventBridge schedule or after
+    a deploy, so the first real request finds a warm container.
+    """
+    seconds = warm_up({
+        'agents': import_module('shared.agents'),
+        'engine': import_module(
+            {'asyncio': 'shared.async_engine', 'pipeline': 'shared.stage_pipeline'}.get(PROCESSING_ENGINE, 'shared.step_graph')
+        ),
+        's3': lambda: get_client('s3', region_name=AWS_REGION),
+        'lambda': lambda: get_client('lambda', region_name=AWS_REGION),
+        'bedrock-agent-runtime': get_agent_runtime,
+        'bedrock_client': lambda: get_bedrock_client(HAIKU_MODEL_ID),
+        'response_cache': get_response_cache,
+        'single_flight': get_single_flight,
+        'model_quotas': lambda: (get_model_quota(HAIKU_MODEL_ID), get_model_quota(AGENT_MODEL_ID)),
+        'throttle_breaker': get_circuit_breaker
+    })
+    return {'warmup': True, 'seconds': seconds}
 
 
 def lambda_handler(event, context):
@@ -62,14 +192,21 @@ def lambda_handler(event, context):
     - GET /results - Get results
     - POST /demo - Load demo data
     - async_process - Background processing (async invocation)
+    - warmup - Pre-initialize clients and caches (direct invocation)
     """
     print(f"Event: {json.dumps(event)}")
 
+    if event.get('warmup'):
+        return handle_warmup(event)
+
     # Check if this is an async processing invocation
     if event.get('async_process'):
         return handle_async_processing(event, context)
 
-    # API Gateway request
+    # API Gateway request. Its retries get a fresh budget: a warm container
+    # still holds the last upload's budget, with its deadline long past
+    set_retry_budget(new_retry_budget(context))
+
     http_method = event.get('httpMethod', event.get('requestContext', {}).get('http', {}).get('method', ''))
     path = event.get('path', event.get('rawPath', ''))
 
@@ -232,12 +369,11 @@ def extract_cta(text: str) -> str:
     return "Schedule a Call"
 
 
-def extract_key_findings_with_ai(analysis_text: str, customer: Dict[str, Any]) -> List[str]:
+def build_key_findings_prompts(analysis_text: str, customer: Dict[str, Any]) -> tuple:
     """
-    Use AI (Claude Haiku) to intelligently extract 2-5 key findings from analysis.
+    Build (system_prompt, prompt_prefix, user_prompt) for key findings extraction.
+    The system prompt and prefix are static so they can be prompt-cached.
     """
-    from shared.bedrock_client import BedrockClient
-
     system_prompt = """You are an expert at analyzing customer churn data and identifying the most critical, actionable insights.
 
 Your task: Extract 2-5 KEY FINDINGS that are truly noteworthy.
@@ -259,9 +395,14 @@ Use emojis to highlight importance:
 
 If there are fewer than 2 truly noteworthy findings, return empty array."""
 
-    user_prompt = f"""Analyze this customer churn intelligence report and extract 2-5 KEY FINDINGS.
+    prompt_prefix = """Analyze the customer churn intelligence report below and extract 2-5 KEY FINDINGS.
+
+Return ONLY a JSON array of 2-5 strings (or empty array if no noteworthy findings).
+
+Example format:
+["🚨 High-value customer: $85,000 CLV at risk", "✅ Strong win-back potential (78%)", "📉 Barely using product (15% adoption)"]"""
 
-Customer Context:
+    user_prompt = f"""Customer Context:
 - Company: {customer.get('company_name', 'Unknown')}
 - MRR: ${customer.get('mrr', '0')}/month
 - Tier: {customer.get('subscription_tier', 'Unknown')}
@@ -270,37 +411,75 @@ Customer Context:
 Churn Intelligence Report:
 {analysis_text[:2000]}
 
-Return ONLY a JSON array of 2-5 strings (or empty array if no noteworthy findings).
+Your response (JSON array only):"""
 
-Example format:
-["🚨 High-value customer: $85,000 CLV at risk", "✅ Strong win-back potential (78%)", "📉 Barely using product (15% adoption)"]
+    return system_prompt, prompt_prefix, user_prompt
 
-Your response (JSON array only):"""
+
+def _parse_key_findings(response: Dict[str, Any]) -> List[str]:
+    findings = response.get('data', [])
+
+    if isinstance(findings, list) and all(isinstance(f, str) for f in findings):
+        return findings[:5]
+    else:
+        return []
+
+
+def extract_key_findings_with_ai(analysis_text: str, customer: Dict[str, Any]) -> List[str]:
+    """
+    Use AI (Claude Haiku) to intelligently extract 2-5 key findings from analysis.
+    """
+
+    system_prompt, prompt_prefix, user_prompt = build_key_findings_prompts(analysis_text, customer)
 
     try:
-        bedrock = BedrockClient(model_id='us.anthropic.claude-haiku-4-5-20251001-v1:0')
+        bedrock = get_bedrock_client(HAIKU_MODEL_ID)
         response = bedrock.invoke_json(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.3,
-            max_tokens=512
+            max_tokens=512,
+            prompt_prefix=prompt_prefix
         )
+        return _parse_key_findings(response)
+    except Exception as e:
+        print(f"Error extracting key findings with AI: {e}")
+        return []
 
-        findings = response.get('data', [])
 
-        if isinstance(findings, list) and all(isinstance(f, str) for f in findings):
-            return findings[:5]
-        else:
-            return []
+async def extract_key_findings_with_ai_async(analysis_text: str, customer: Dict[str, Any]) -> List[str]:
+    """Async extract_key_findings_with_ai() for the asyncio engine."""
+
+    system_prompt, prompt_prefix, user_prompt = build_key_findings_prompts(analysis_text, customer)
+
+    try:
+        bedrock = get_bedrock_client(HAIKU_MODEL_ID)
+        response = await bedrock.invoke_json_async(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=0.3,
+            max_tokens=512,
+            prompt_prefix=prompt_prefix
+        )
+        return _parse_key_findings(response)
     except Exception as e:
         print(f"Error extracting key findings with AI: {e}")
         return []
 
 
-def create_intelligence_summary(analysis_text: str, tools_used: List[Dict], campaign_emails: List[Dict], customer: Dict[str, Any]) -> Dict[str, Any]:
+def create_intelligence_summary(
+    analysis_text: str,
+    tools_used: List[Dict],
+    campaign_emails: List[Dict],
+    customer: Dict[str, Any],
+    key_findings: List[str] = None
+) -> Dict[str, Any]:
     """
     Create visual intelligence summary using AI for key findings extraction.
     Shows the AI's decision-making process for UI display.
+
+    Pass key_findings when they were already extracted (e.g. concurrently
+    with campaign generation) to skip the extraction call.
     """
     import re
 
@@ -325,7 +504,9 @@ def create_intelligence_summary(analysis_text: str, tools_used: List[Dict], camp
             summary['data_sources'].append(tool_names[tool_path])
 
     # 2. Extract key findings using AI (intelligent, context-aware)
-    summary['key_findings'] = extract_key_findings_with_ai(analysis_text, customer)
+    if key_findings is None:
+        key_findings = extract_key_findings_with_ai(analysis_text, customer)
+    summary['key_findings'] = key_findings
 
     # 3. Campaign strategy chosen (analyze email content)
     email_bodies = " ".join([e.get('body', '') for e in campaign_emails]).lower()
@@ -345,11 +526,158 @@ def create_intelligence_summary(analysis_text: str, tools_used: List[Dict], camp
     return summary
 
 
+def build_analysis_for_campaign(churn_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape ChurnAnalyzer output into the analysis dict CampaignGenerationAgent expects."""
+    return {
+        'full_text': churn_result.get('analysis', ''),
+        'category': churn_result.get('category', 'unclear'),
+        'confidence': churn_result.get('confidence', 0),
+        'insights': churn_result.get('insights', []),
+        'recommendation': churn_result.get('recommendation', '')
+    }
+
+
+def format_customer_result(
+    customer: Dict[str, Any],
+    churn_result: Dict[str, Any],
+    campaign_result: Dict[str, Any],
+    intelligence_summary: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Build the per-customer result document saved to S3 and shown in the UI."""
+    # Format result - flatten customer fields to top level for frontend
+    return {
+        'customer_id': customer.get('customer_id', 'unknown'),
+        'status': 'success',
+        # Customer fields at top level
+        'email': customer.get('email'),
+        'company_name': customer.get('company_name'),
+        'subscription_tier': customer.get('subscription_tier'),
+        'mrr': customer.get('mrr'),
+        'churn_date': customer.get('churn_date'),
+        'cancellation_reason': customer.get('cancellation_reason'),
+        # Also keep nested customer for backward compatibility
+        'customer': {
+            'email': customer.get('email'),
+            'company_name': customer.get('company_name'),
+            'subscription_tier': customer.get('subscription_tier'),
+            'mrr': customer.get('mrr'),
+            'churn_date': customer.get('churn_date'),
+            'cancellation_reason': customer.get('cancellation_reason')
+        },
+        'analysis': {
+            'category': churn_result.get('category'),
+            'confidence': churn_result.get('confidence'),
+            'full_text': churn_result.get('analysis', ''),
+            'tools_used': churn_result.get('tools_used', [])
+        },
+        'campaign': campaign_result,
+        'intelligence_summary': intelligence_summary,
+        'processed_at': datetime.utcnow().isoformat() + 'Z'
+    }
+
+
+def failed_customer_result(customer_id: str, error: Exception) -> Dict[str, Any]:
+    """Result entry for a customer that could not be processed."""
+    print(f"[Async] ✗ Failed to process customer {customer_id}: {error}")
+    import traceback
+    traceback.print_exception(type(error), error, error.__traceback__)
+
+    return {
+        'customer_id': customer_id,
+        'status': 'failed',
+        'error': str(error)
+    }
+
+
+def manifest_recorder(manifest: ResultsManifest, result: Dict[str, Any], key: str):
+    """on_written callback recording a stored result in the manifest (None without a manifest)."""
+    if manifest is None:
+        return None
+    return lambda size: manifest.append(manifest_entry(result, key, size))
+
+
+def record_failure(manifest: ResultsManifest, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Record a failed customer in the manifest (when there is one) and return its result."""
+    if manifest is not None:
+        manifest.append(manifest_entry(result))
+    return result
+
+
+def build_customer_step_graph(
+    customer: Dict[str, Any],
+    company_info: Dict[str, Any],
+    use_async: bool = False,
+    reason_clusters=None
+):
+    """
+    Per-customer workflow as a step graph:
+
+        analysis -> campaign  -> summary
+                 -> findings  ->
+
+    Campaign generation and key-findings extraction both depend only on the
+    churn analysis, so they run concurrently.
+
+    Args:
+        customer: Customer data dict
+        company_info: Company context for campaign generation
+        use_async: Build coroutine steps for StepGraph.run_async()
+        reason_clusters: Optional ReasonClusters sharing analyses across similar reasons
+
+    Returns:
+        StepGraph with steps 'analysis', 'campaign', 'findings', 'summary'
+    """
+    from shared.agents import CampaignGenerationAgent
+    from shared.step_graph import StepGraph
+
+    bedrock = get_bedrock_client(HAIKU_MODEL_ID)
+    campaign_agent = CampaignGenerationAgent(bedrock)
+
+    if use_async:
+        # Rate limited on the event loop
+        if reason_clusters is not None:
+            analyze = lambda: reason_clusters.analyze_async(customer, invoke_churn_analyzer_enhanced_async)
+        else:
+            analyze = lambda: invoke_churn_analyzer_enhanced_async(customer)
+        campaign = lambda analysis: campaign_agent.generate_async(
+            customer.copy(), build_analysis_for_campaign(analysis), company_info
+        )
+        findings = lambda analysis: extract_key_findings_with_ai_async(analysis.get('analysis', ''), customer)
+    else:
+        # Rate limiting happens inside invoke function
+        if reason_clusters is not None:
+            analyze = lambda: reason_clusters.analyze(customer, invoke_churn_analyzer_enhanced)
+        else:
+            analyze = lambda: invoke_churn_analyzer_enhanced(customer)
+        campaign = lambda analysis: campaign_agent.generate(
+            customer.copy(), build_analysis_for_campaign(analysis), company_info
+        )
+        findings = lambda analysis: extract_key_findings_with_ai(analysis.get('analysis', ''), customer)
+
+    def summary(analysis, campaign, findings):
+        return create_intelligence_summary(
+            analysis_text=analysis.get('analysis', ''),
+            tools_used=analysis.get('tools_used', []),
+            campaign_emails=campaign.get('emails', []),
+            customer=customer,
+            key_findings=findings
+        )
+
+    graph = StepGraph()
+    graph.add('analysis', analyze)
+    graph.add('campaign', campaign, inputs=['analysis'])
+    graph.add('findings', findings, inputs=['analysis'])
+    graph.add('summary', summary, inputs=['analysis', 'campaign', 'findings'])
+    return graph
+
+
 def process_single_customer(
     customer: Dict[str, Any],
     upload_id: str,
     company_info: Dict[str, Any],
-    s3: S3Helper
+    s3: S3Helper,
+    reason_clusters=None,
+    manifest: ResultsManifest = None
 ) -> Dict[str, Any]:
     """
     Process a single customer through churn analysis and campaign generation.
@@ -360,6 +688,8 @@ def process_single_customer(
         upload_id: Upload ID for result storage
         company_info: Company context for campaign generation
         s3: S3 helper instance
+        reason_clusters: Optional ReasonClusters sharing analyses across similar reasons
+        manifest: Optional ResultsManifest the result is recorded in once written
 
     Returns:
         Formatted result dict with status='success' or 'failed'
@@ -369,103 +699,283 @@ def process_single_customer(
     try:
         print(f"[Async] Processing customer {customer_id}...")
 
-        # Step 1: ChurnAnalyzer Agent (rate limiting happens inside invoke function)
-        churn_result = invoke_churn_analyzer_enhanced(customer)
-        analysis_text = churn_result.get('analysis', '')
+        graph = build_customer_step_graph(customer, company_info, reason_clusters=reason_clusters)
+        steps = graph.run()
 
-        # Step 2: CampaignGenerationAgent
-        from shared.bedrock_client import BedrockClient
-        from shared.agents import CampaignGenerationAgent
+        formatted_result = format_customer_result(
+            customer, steps['analysis'], steps['campaign'], steps['summary']
+        )
+        formatted_result['step_timings'] = graph.timings
 
-        bedrock = BedrockClient(model_id='us.anthropic.claude-haiku-4-5-20251001-v1:0')
-        campaign_agent = CampaignGenerationAgent(bedrock)
+        # Save individual result (queued when write-behind is on)
+        key = f"results/{upload_id}/customers/{customer_id}.json"
+        s3.put_json_behind(key, formatted_result, on_written=manifest_recorder(manifest, formatted_result, key))
+        print(f"[Async] ✓ Successfully processed {customer_id} in {graph.critical_path_seconds():.2f}s")
 
-        customer_for_campaign = customer.copy()
-        analysis_for_campaign = {
-            'full_text': analysis_text,
-            'category': churn_result.get('category', 'unclear'),
-            'confidence': churn_result.get('confidence', 0),
-            'insights': churn_result.get('insights', []),
-            'recommendation': churn_result.get('recommendation', '')
-        }
+        return formatted_result
 
-        campaign_result = campaign_agent.generate(customer_for_campaign, analysis_for_campaign, company_info)
+    except Exception as e:
+        return record_failure(manifest, failed_customer_result(customer_id, e))
 
-        # Step 3: Create intelligence summary
-        intelligence_summary = create_intelligence_summary(
-            analysis_text=analysis_text,
-            tools_used=churn_result.get('tools_used', []),
-            campaign_emails=campaign_result.get('emails', []),
-            customer=customer
-        )
 
-        # Format result - flatten customer fields to top level for frontend
-        formatted_result = {
-            'customer_id': customer_id,
-            'status': 'success',
-            # Customer fields at top level
-            'email': customer.get('email'),
-            'company_name': customer.get('company_name'),
-            'subscription_tier': customer.get('subscription_tier'),
-            'mrr': customer.get('mrr'),
-            'churn_date': customer.get('churn_date'),
-            'cancellation_reason': customer.get('cancellation_reason'),
-            # Also keep nested customer for backward compatibility
-            'customer': {
-                'email': customer.get('email'),
-                'company_name': customer.get('company_name'),
-                'subscription_tier': customer.get('subscription_tier'),
-                'mrr': customer.get('mrr'),
-                'churn_date': customer.get('churn_date'),
-                'cancellation_reason': customer.get('cancellation_reason')
-            },
-            'analysis': {
-                'category': churn_result.get('category'),
-                'confidence': churn_result.get('confidence'),
-                'full_text': analysis_text,
-                'tools_used': churn_result.get('tools_used', [])
-            },
-            'campaign': campaign_result,
-            'intelligence_summary': intelligence_summary,
-            'processed_at': datetime.utcnow().isoformat() + 'Z'
-        }
+async def process_single_customer_async(
+    customer: Dict[str, Any],
+    upload_id: str,
+    company_info: Dict[str, Any],
+    s3: S3Helper,
+    reason_clusters=None,
+    manifest: ResultsManifest = None
+) -> Dict[str, Any]:
+    """
+    Async process_single_customer() for the asyncio engine.
+    Same steps, same result document; waits happen on the event loop.
+    """
+    customer_id = customer.get('customer_id', 'unknown')
 
-        # Save individual result
-        s3.put_json(f"results/{upload_id}/customers/{customer_id}.json", formatted_result)
-        print(f"[Async] ✓ Successfully processed {customer_id}")
+    try:
+        print(f"[Async] Processing customer {customer_id}...")
+
+        graph = build_customer_step_graph(customer, company_info, use_async=True, reason_clusters=reason_clusters)
+        steps = await graph.run_async()
+
+        formatted_result = format_customer_result(
+            customer, steps['analysis'], steps['campaign'], steps['summary']
+        )
+        formatted_result['step_timings'] = graph.timings
+
+        # Save individual result (queued when write-behind is on)
+        key = f"results/{upload_id}/customers/{customer_id}.json"
+        await s3.put_json_behind_async(key, formatted_result, manifest_recorder(manifest, formatted_result, key))
+        print(f"[Async] ✓ Successfully processed {customer_id} in {graph.critical_path_seconds():.2f}s")
 
         return formatted_result
 
     except Exception as e:
-        print(f"[Async] ✗ Failed to process customer {customer_id}: {e}")
-        import traceback
-        traceback.print_exc()
+        return record_failure(manifest, failed_customer_result(customer_id, e))
 
-        return {
-            'customer_id': customer_id,
-            'status': 'failed',
-            'error': str(e)
-        }
+
+def prepare_reason_clusters(customers: List[Dict[str, Any]]):
+    """Cluster cancellation reasons when REASON_CLUSTERING is on (else None)."""
+    if not REASON_CLUSTERING:
+        return None
+
+    from shared.reason_clustering import ReasonClusters
+
+    reason_clusters = ReasonClusters(customers, threshold=REASON_CLUSTER_THRESHOLD)
+    print(f"[Async] Reason clustering: {reason_clusters.stats()}")
+    return reason_clusters
+
+
+def reason_cluster_status(reason_clusters) -> Dict[str, Any]:
+    """status.json fields for reason clustering ({} when disabled)."""
+    if reason_clusters is None:
+        return {}
+    return {'reason_clusters': reason_clusters.stats()}
+
+
+def progress_metrics() -> Dict[str, Any]:
+    """Live limiter, quota, breaker and retry stats written with every status.json update."""
+    metrics = {'rate_limiter': rate_limiter.stats()}
+    quota_limiter = get_quota_limiter()
+    if quota_limiter is not None:
+        metrics['model_quotas'] = quota_limiter.stats()
+    breaker = get_circuit_breaker()
+    if breaker is not None:
+        metrics['throttle_breaker'] = breaker.stats()
+    metrics['retries'] = get_retry_budget().stats()
+    return metrics
+
+
+def results_store() -> S3Helper:
+    """S3Helper for an async_process run; per-customer result puts go write-behind when RESULT_WRITE_BEHIND=on."""
+    s3 = S3Helper(DATA_BUCKET)
+    if RESULT_WRITE_BEHIND:
+        s3.start_write_behind(workers=RESULT_WRITER_THREADS, queue_size=RESULT_WRITE_QUEUE)
+    return s3
+
+
+def split_into_shards(customers: List[Dict[str, Any]], shards: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Split customers into up to `shards` contiguous, near-equal slices.
+
+    Returns:
+        {shard_id: customers} - shard IDs are '0', '1', ...
+    """
+    shards = max(1, min(shards, len(customers)))
+    size, remainder = divmod(len(customers), shards)
+    slices = {}
+    start = 0
+    for index in range(shards):
+        end = start + size + (1 if index < remainder else 0)
+        slices[str(index)] = customers[start:end]
+        start = end
+    return slices
+
+
+def start_progress_reporter(
+    s3: S3Helper,
+    event: Dict[str, Any],
+    extra: Callable[[], Dict[str, Any]] = None
+) -> ProgressReporter:
+    """
+    ProgressReporter for an async_process event.
+
+    The initial status comes with the event (written by /process), so
+    status.json is only read for events queued before it was included. A
+    shard of a fanned-out upload writes its own progress object instead.
+
+    Args:
+        s3: S3Helper for DATA_BUCKET
+        event: async_process event
+        extra: Engine-specific live fields (e.g. pipeline stage stats)
+    """
+    upload_id = event.get('upload_id')
+    customers = event.get('customers', [])
+    shard = event.get('shard')
+    if shard is not None:
+        initial_status = {'upload_id': upload_id, 'shard': shard, 'total': len(customers)}
+    else:
+        initial_status = (
+            event.get('status')
+            or s3.get_json(f"results/{upload_id}/status.json")
+            or create_status_stub(upload_id, len(customers), 'agent-based')
+        )
+
+    def snapshot():
+        metrics = progress_metrics()
+        if extra is not None:
+            metrics.update(extra())
+        return metrics
+
+    manifest = ResultsManifest(upload_id, shard if shard is not None else MAIN_WRITER)
+    reporter = ProgressReporter(s3, upload_id, initial_status, snapshot, shard=shard, manifest=manifest)
+    print(f"[Async] Progress writes: every {reporter.flush_seconds}s or {reporter.flush_delta} customers")
+    return reporter
+
+
+def current_coalesced_calls() -> int:
+    """Process-wide single-flight coalesced count (0 when disabled)."""
+    single_flight = get_single_flight()
+    return single_flight.stats()['coalesced'] if single_flight is not None else 0
+
+
+def finalize_processing(
+    s3: S3Helper,
+    reporter: ProgressReporter,
+    upload_id: str,
+    completed: int,
+    failed: int,
+    total: int,
+    results: List[Dict[str, Any]],
+    coalesced_baseline: int = 0,
+    extra: Dict[str, Any] = None,
+    usage_baseline: Dict[str, int] = None
+) -> Dict[str, Any]:
+    """
+    Mark the upload complete, save aggregated results and build the handler response.
+
+    coalesced_baseline and usage_baseline are the single-flight counter and
+    token totals at the start of the run, so status.json reports this upload's
+    coalesced calls and token usage (including prompt-cache reads/writes)
+    rather than the container's.
+
+    A shard only marks its progress object done; /results aggregates the
+    per-customer results and completes status.json once all shards finish.
+
+    Queued write-behind result puts are flushed first, so nothing reports
+    complete before every result is in S3. Failed puts are listed under
+    'persist_errors', and their customers count as failed (in the totals,
+    the manifest and customers.json) since their result isn't stored.
+    """
+    single_flight = get_single_flight()
+
+    persist_errors = {}
+    try:
+        s3.close()
+    except WriteBehindError as e:
+        print(f"[Async] {e}")
+        persist_errors = e.failures
+    for index, result in enumerate(results):
+        key = f"results/{upload_id}/customers/{result.get('customer_id')}.json"
+        if result.get('status') == 'success' and key in persist_errors:
+            error = RuntimeError(f"Result could not be saved: {persist_errors[key]}")
+            results[index] = record_failure(reporter.manifest, failed_customer_result(result['customer_id'], error))
+            completed -= 1
+            failed += 1
+
+    final_status = {
+        'status': 'complete',
+        'completed': completed,
+        'failed': failed,
+        'progress': 100
+    }
+    if extra:
+        final_status.update(extra)
+    if single_flight is not None:
+        final_status['coalesced_calls'] = single_flight.stats()['coalesced'] - coalesced_baseline
+    usage_baseline = usage_baseline or {}
+    token_usage = {
+        name: total - usage_baseline.get(name, 0)
+        for name, total in get_usage_totals().items()
+    }
+    final_status['token_usage'] = token_usage
+    if persist_errors:
+        final_status['persist_errors'] = sorted(persist_errors)
+    if s3.write_behind_stats()['queued']:
+        final_status['result_writes'] = s3.write_behind_stats()
+    if reporter.shard is not None:
+        final_status['done'] = True
+        reporter.close(final_status)
+    else:
+        reporter.close(final_status)
+        s3.put_json(f"results/{upload_id}/customers.json", results)
+
+    print(f"[Async] Completed concurrent processing: {completed} succeeded, {failed} failed")
+
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        print(f"[Async] Response cache: {response_cache.stats()}")
+    if single_flight is not None:
+        print(f"[Async] Single-flight: {single_flight.stats()}")
+    print(f"[Async] Token usage: {token_usage}")
+
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'upload_id': upload_id,
+            'status': 'complete',
+            'completed': completed,
+            'failed': failed,
+            'total': total
+        })
+    }
 
 
 def handle_async_processing(event: Dict[str, Any], context) -> Dict[str, Any]:
     """
     Handle async processing triggered by Event invocation.
-    Processes customers concurrently using ThreadPoolExecutor with rate limiting.
+    Processes customers concurrently using ThreadPoolExecutor with rate limiting,
+    on a single event loop when PROCESSING_ENGINE=asyncio, or through
+    per-stage worker pools when PROCESSING_ENGINE=pipeline.
     """
+    # Fresh retry budget per upload, bounded by this invocation's remaining time
+    set_retry_budget(new_retry_budget(context))
+
+    if PROCESSING_ENGINE == 'asyncio':
+        import asyncio
+        return asyncio.run(handle_async_processing_asyncio(event, context))
+    if PROCESSING_ENGINE == 'pipeline':
+        return handle_async_processing_pipeline(event, context)
+
     upload_id = event.get('upload_id')
     customers = event.get('customers', [])
 
     print(f"[Async] Starting concurrent processing for upload {upload_id} with {len(customers)} customers (MAX_WORKERS={MAX_WORKERS}, API_RATE_LIMIT={API_RATE_LIMIT} RPM)")
 
-    s3 = S3Helper(DATA_BUCKET)
-
-    # Prepare company info
-    company_info = {
-        'name': 'ReviveAI',
-        'product_name': 'ReviveAI Platform',
-        'value_proposition': 'AI-powered customer analytics and retention platform'
-    }
+    s3 = results_store()
+    coalesced_baseline = current_coalesced_calls()
+    usage_baseline = get_usage_totals()
+    reason_clusters = prepare_reason_clusters(customers)
 
     # Thread-safe counters
     completed_lock = threading.Lock()
@@ -473,32 +983,13 @@ def handle_async_processing(event: Dict[str, Any], context) -> Dict[str, Any]:
     failed = 0
     results = []
 
-    # Adaptive progress update frequency based on batch size
-    if len(customers) < 10:
-        update_interval = 1  # Every customer for small batches
-    elif len(customers) < 50:
-        update_interval = 5  # Every 5 customers for medium batches
-    else:
-        update_interval = 10  # Every 10 customers for large batches
-
-    print(f"[Async] Progress update interval: every {update_interval} customers")
-
-    def update_progress():
-        """Thread-safe progress update."""
-        nonlocal completed, failed
-        with completed_lock:
-            status = s3.get_json(f"results/{upload_id}/status.json") or {}
-            status['completed'] = completed
-            status['failed'] = failed
-            status['progress'] = int((completed / len(customers)) * 100) if len(customers) > 0 else 0
-            status['updated_at'] = datetime.utcnow().isoformat() + 'Z'
-            s3.put_json(f"results/{upload_id}/status.json", status)
-
-    # Process customers concurrently
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    # Process customers concurrently; status.json is written behind by the reporter
+    with start_progress_reporter(s3, event) as reporter, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         # Submit all tasks
         future_to_customer = {
-            executor.submit(process_single_customer, customer, upload_id, company_info, s3): customer
+            executor.submit(
+                process_single_customer, customer, upload_id, COMPANY_INFO, s3, reason_clusters, reporter.manifest
+            ): customer
             for customer in customers
         }
 
@@ -513,33 +1004,190 @@ def handle_async_processing(event: Dict[str, Any], context) -> Dict[str, Any]:
                     completed += 1
                 else:
                     failed += 1
+            reporter.record(result['status'] == 'success')
 
-            # Update progress adaptively
-            if (completed + failed) % update_interval == 0 or (completed + failed) == len(customers):
-                update_progress()
+        return finalize_processing(
+            s3, reporter, upload_id, completed, failed, len(customers), results, coalesced_baseline,
+            extra=reason_cluster_status(reason_clusters), usage_baseline=usage_baseline
+        )
 
-    # Finalize
-    final_status = s3.get_json(f"results/{upload_id}/status.json") or {}
-    final_status['status'] = 'complete'
-    final_status['completed'] = completed
-    final_status['failed'] = failed
-    final_status['progress'] = 100
-    final_status['updated_at'] = datetime.utcnow().isoformat() + 'Z'
-    s3.put_json(f"results/{upload_id}/status.json", final_status)
-    s3.put_json(f"results/{upload_id}/customers.json", results)
 
-    print(f"[Async] Completed concurrent processing: {completed} succeeded, {failed} failed")
+async def handle_async_processing_asyncio(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    asyncio engine for handle_async_processing.
 
-    return {
-        'statusCode': 200,
-        'body': json.dumps({
-            'upload_id': upload_id,
-            'status': 'complete',
-            'completed': completed,
-            'failed': failed,
-            'total': len(customers)
-        })
-    }
+    Keeps up to ASYNC_MAX_IN_FLIGHT customers in flight on one event loop;
+    API_RATE_LIMIT is enforced by awaiting the shared token bucket, so the
+    quota rather than a thread count bounds throughput. Results, progress
+    cadence and status.json fields match the threaded engine.
+    """
+    import asyncio
+    from shared.async_engine import run_blocking
+
+    upload_id = event.get('upload_id')
+    customers = event.get('customers', [])
+
+    print(f"[Async] Starting asyncio processing for upload {upload_id} with {len(customers)} customers (ASYNC_MAX_IN_FLIGHT={ASYNC_MAX_IN_FLIGHT}, API_RATE_LIMIT={API_RATE_LIMIT} RPM)")
+
+    s3 = results_store()
+    coalesced_baseline = current_coalesced_calls()
+    usage_baseline = get_usage_totals()
+    reason_clusters = prepare_reason_clusters(customers)
+
+    completed = 0
+    failed = 0
+    results = []
+
+    in_flight = asyncio.Semaphore(ASYNC_MAX_IN_FLIGHT)
+    reporter = start_progress_reporter(s3, event)
+
+    async def bounded(customer):
+        async with in_flight:
+            return await process_single_customer_async(
+                customer, upload_id, COMPANY_INFO, s3, reason_clusters, reporter.manifest
+            )
+
+    tasks = [asyncio.ensure_future(bounded(customer)) for customer in customers]
+
+    with reporter:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            results.append(result)
+
+            if result['status'] == 'success':
+                completed += 1
+            else:
+                failed += 1
+            # Only counts in memory; the reporter's thread does the S3 write
+            reporter.record(result['status'] == 'success')
+
+        return await run_blocking(
+            finalize_processing, s3, reporter, upload_id, completed, failed, len(customers), results,
+            coalesced_baseline, extra=reason_cluster_status(reason_clusters), usage_baseline=usage_baseline
+        )
+
+
+def build_customer_pipeline(
+    upload_id: str,
+    company_info: Dict[str, Any],
+    s3: S3Helper,
+    reason_clusters=None,
+    manifest: ResultsManifest = None
+):
+    """
+    Stages of the per-customer workflow for the pipeline engine:
+    analysis -> campaign -> findings -> persist.
+
+    Each item is a context dict starting as {'customer': {...}}; every stage
+    adds its output to it.
+    """
+    from shared.agents import CampaignGenerationAgent
+    from shared.stage_pipeline import Stage, StagePipeline
+
+    def analyze(ctx):
+        print(f"[Async] Processing customer {ctx['customer'].get('customer_id', 'unknown')}...")
+        # Rate limiting happens inside invoke function (shared API_RATE_LIMIT budget)
+        if reason_clusters is not None:
+            ctx['churn_result'] = reason_clusters.analyze(ctx['customer'], invoke_churn_analyzer_enhanced)
+        else:
+            ctx['churn_result'] = invoke_churn_analyzer_enhanced(ctx['customer'])
+        return ctx
+
+    def campaign(ctx):
+        bedrock = get_bedrock_client(HAIKU_MODEL_ID)
+        ctx['campaign_result'] = CampaignGenerationAgent(bedrock).generate(
+            ctx['customer'].copy(), build_analysis_for_campaign(ctx['churn_result']), company_info
+        )
+        return ctx
+
+    def findings(ctx):
+        churn_result = ctx['churn_result']
+        ctx['intelligence_summary'] = create_intelligence_summary(
+            analysis_text=churn_result.get('analysis', ''),
+            tools_used=churn_result.get('tools_used', []),
+            campaign_emails=ctx['campaign_result'].get('emails', []),
+            customer=ctx['customer']
+        )
+        return ctx
+
+    def persist(ctx):
+        customer = ctx['customer']
+        customer_id = customer.get('customer_id', 'unknown')
+        ctx['result'] = format_customer_result(
+            customer, ctx['churn_result'], ctx['campaign_result'], ctx['intelligence_summary']
+        )
+        key = f"results/{upload_id}/customers/{customer_id}.json"
+        size = s3.put_json(key, ctx['result'])
+        if manifest is not None:
+            manifest.append(manifest_entry(ctx['result'], key, size))
+        print(f"[Async] ✓ Successfully processed {customer_id}")
+        return ctx
+
+    def budget(rpm):
+        return TokenBucketRateLimiter(rate_per_minute=rpm) if rpm > 0 else None
+
+    return StagePipeline([
+        Stage('analysis', analyze, PIPELINE_ANALYSIS_WORKERS, queue_size=PIPELINE_QUEUE_SIZE),
+        Stage('campaign', campaign, PIPELINE_CAMPAIGN_WORKERS, budget(PIPELINE_CAMPAIGN_RPM), PIPELINE_QUEUE_SIZE),
+        Stage('findings', findings, PIPELINE_FINDINGS_WORKERS, budget(PIPELINE_FINDINGS_RPM), PIPELINE_QUEUE_SIZE),
+        Stage('persist', persist, PIPELINE_PERSIST_WORKERS, queue_size=PIPELINE_QUEUE_SIZE)
+    ])
+
+
+def pipeline_item_result(ctx: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    """Turn a finished pipeline item into the same result entry the threaded engine produces."""
+    if error is not None:
+        return failed_customer_result(ctx['customer'].get('customer_id', 'unknown'), error)
+    return ctx['result']
+
+
+def handle_async_processing_pipeline(event: Dict[str, Any], context) -> Dict[str, Any]:
+    """
+    Pipeline engine for handle_async_processing.
+
+    A slow agent call only occupies an analysis worker; campaign generation,
+    findings extraction and persistence keep draining their own queues.
+    Per-stage throughput and queue depth are written to status.json under 'pipeline'.
+    """
+    upload_id = event.get('upload_id')
+    customers = event.get('customers', [])
+
+    print(f"[Async] Starting pipeline processing for upload {upload_id} with {len(customers)} customers (analysis={PIPELINE_ANALYSIS_WORKERS}, campaign={PIPELINE_CAMPAIGN_WORKERS}, findings={PIPELINE_FINDINGS_WORKERS}, persist={PIPELINE_PERSIST_WORKERS}, queue={PIPELINE_QUEUE_SIZE})")
+
+    s3 = S3Helper(DATA_BUCKET)
+    coalesced_baseline = current_coalesced_calls()
+    usage_baseline = get_usage_totals()
+    reason_clusters = prepare_reason_clusters(customers)
+    reporter = start_progress_reporter(s3, event, extra=lambda: {'pipeline': pipeline.stats()})
+    pipeline = build_customer_pipeline(upload_id, COMPANY_INFO, s3, reason_clusters, reporter.manifest)
+
+    completed = 0
+    failed = 0
+    results = []
+
+    def on_result(ctx, error):
+        nonlocal completed, failed
+        result = pipeline_item_result(ctx, error)
+        if error is not None:
+            record_failure(reporter.manifest, result)
+        results.append(result)
+
+        if result['status'] == 'success':
+            completed += 1
+        else:
+            failed += 1
+        reporter.record(result['status'] == 'success')
+
+    with reporter:
+        pipeline.run(({'customer': customer} for customer in customers), on_result)
+
+        print(f"[Async] Pipeline stages: {pipeline.stats()}")
+
+        return finalize_processing(
+            s3, reporter, upload_id, completed, failed, len(customers), results, coalesced_baseline,
+            extra=dict(reason_cluster_status(reason_clusters), pipeline=pipeline.stats()),
+            usage_baseline=usage_baseline
+        )
 
 
 def handle_upload(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -621,26 +1269,38 @@ def handle_process_with_agent(event: Dict[str, Any], context) -> Dict[str, Any]:
             'message': f'Poll /results?upload_id={upload_id} for progress'
         })
 
-    # Initialize status
+    # Initialize status (with the shard IDs when fanning out, so readers can merge without a LIST)
+    shards = split_into_shards(customers, PROCESSING_SHARDS)
     status = create_status_stub(upload_id, len(customers), 'agent-based')
+    if len(shards) > 1:
+        status['shards'] = list(shards)
     s3.put_json(f"results/{upload_id}/status.json", status)
 
     # Invoke async processing
-    lambda_client = boto3.client('lambda', region_name=AWS_REGION)
-
-    async_payload = {
-        'async_process': True,
-        'upload_id': upload_id,
-        'customers': customers
-    }
+    lambda_client = get_client('lambda', region_name=AWS_REGION)
+
+    # The initial status travels with the event so the worker never reads status.json back
+    if len(shards) > 1:
+        async_payloads = [
+            {'async_process': True, 'upload_id': upload_id, 'customers': shard_customers, 'shard': shard}
+            for shard, shard_customers in shards.items()
+        ]
+    else:
+        async_payloads = [{
+            'async_process': True,
+            'upload_id': upload_id,
+            'customers': customers,
+            'status': status
+        }]
 
     try:
-        lambda_client.invoke(
-            FunctionName=context.function_name,  # Invoke self
-            InvocationType='Event',  # Async invocation
-            Payload=json.dumps(async_payload)
-        )
-        print(f"[API] Started async processing for {upload_id}")
+        for async_payload in async_payloads:
+            lambda_client.invoke(
+                FunctionName=context.function_name,  # Invoke self
+                InvocationType='Event',  # Async invocation
+                Payload=json.dumps(async_payload)
+            )
+        print(f"[API] Started async processing for {upload_id} ({len(async_payloads)} invocation(s))")
     except Exception as e:
         print(f"[API] Failed to start async processing: {e}")
         return response(500, {'error': f'Failed to start processing: {str(e)}'})
@@ -726,8 +1386,9 @@ Please provide:
 3. Win-back campaign recommendations
 """
 
+    agent_call = begin_agent_call(input_text)
     try:
-        response = bedrock_agent_runtime.invoke_agent(
+        response = get_agent_runtime().invoke_agent(
             agentId=COORDINATOR_AGENT_ID,
             agentAliasId=COORDINATOR_ALIAS_ID,
             sessionId=session_id,
@@ -766,6 +1427,8 @@ Please provide:
                                     'action_group': tool_info.get('actionGroupName', 'unknown')
                                 })
 
+        finish_agent_call(agent_call, reasoning_traces)
+
         return {
             'analysis': full_response,
             'reasoning_traces': reasoning_traces,
@@ -776,60 +1439,13 @@ Please provide:
 
     except Exception as e:
         print(f"Error invoking Coordinator agent: {e}")
+        finish_agent_call(agent_call, error=e)
         raise
 
 
-def invoke_bedrock_agent_with_retry(agent_id: str, alias_id: str, session_id: str, input_text: str, max_retries: int = 5):
-    """
-    Invoke Bedrock agent with exponential backoff retry logic.
-    Handles throttling exceptions gracefully.
-    """
-    import time
-    import random
-
-    for attempt in range(max_retries):
-        try:
-            response = bedrock_agent_runtime.invoke_agent(
-                agentId=agent_id,
-                agentAliasId=alias_id,
-                sessionId=session_id,
-                inputText=input_text,
-                enableTrace=True
-            )
-            return response
-
-        except Exception as e:
-            error_message = str(e)
-
-            # Check if it's a throttling error
-            if 'throttlingException' in error_message or 'ThrottlingException' in error_message:
-                if attempt < max_retries - 1:
-                    # Exponential backoff: 2^attempt + random jitter
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    print(f"[Retry] Throttled, waiting {wait_time:.2f}s before retry {attempt + 1}/{max_retries}")
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    print(f"[Retry] Max retries reached, giving up")
-                    raise
-            else:
-                # Not a throttling error, raise immediately
-                raise
-
-    # Should never reach here
-    raise Exception("Unexpected retry loop exit")
-
-
-def invoke_churn_analyzer_enhanced(customer: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Invoke ChurnAnalyzer with enhanced prompt to trigger multiple intelligence tools.
-    Shows autonomous decision-making and multi-source analysis.
-    Includes exponential backoff retry for throttling.
-    """
-    session_id = str(uuid.uuid4())
-
-    # Smart prompt - agent decides which tools are actually needed
-    input_text = f"""
+def build_churn_analyzer_input(customer: Dict[str, Any]) -> str:
+    """Smart prompt for the ChurnAnalyzer agent - agent decides which tools are actually needed."""
+    return f"""
 Analyze churned customer {customer.get('customer_id', 'unknown')} from {customer.get('company_name', 'unknown')}.
 
 Customer Details:
@@ -855,97 +1471,143 @@ IMPORTANT: Be efficient. Only call tools that will add meaningful value based on
 Provide a strategic win-back analysis with actionable recommendations.
 """
 
-    import time
-    import random
 
-    max_retries = 5
-    for attempt in range(max_retries):
-        try:
-            # Rate limit: Acquire 1 token before API call
-            rate_limiter.acquire(tokens=1)
-
-            response = bedrock_agent_runtime.invoke_agent(
-                agentId=CHURN_ANALYZER_AGENT_ID,
-                agentAliasId=CHURN_ANALYZER_ALIAS_ID,
-                sessionId=session_id,
-                inputText=input_text,
-                enableTrace=True
-            )
+def collect_agent_stream(completion) -> tuple:
+    """
+    Consume an InvokeAgent completion stream.
 
-            # Collect response and traces
-            full_response = ""
-            reasoning_traces = []
-            tools_used = []
+    Returns:
+        (full_response, reasoning_traces, tools_used)
+    """
+    full_response = ""
+    reasoning_traces = []
+    tools_used = []
+
+    # THIS is where throttling actually happens - during stream iteration
+    for event in completion:
+        if 'chunk' in event:
+            chunk = event['chunk']
+            if 'bytes' in chunk:
+                full_response += chunk['bytes'].decode('utf-8')
+
+        if 'trace' in event:
+            trace = event['trace']
+            reasoning_traces.append(trace)
+
+            # Extract tool usage from traces
+            if 'trace' in trace:
+                trace_details = trace['trace']
+                if 'orchestrationTrace' in trace_details:
+                    orch_trace = trace_details['orchestrationTrace']
+
+                    # DEBUG: Print orchestration trace keys
+                    print(f"DEBUG orch_trace keys: {list(orch_trace.keys())}")
+                    if 'invocationInput' in orch_trace:
+                        print(f"DEBUG invocationInput type: {type(orch_trace['invocationInput'])}, length: {len(orch_trace['invocationInput']) if isinstance(orch_trace['invocationInput'], list) else 'N/A'}")
+
+                    # Look for invocationInput (tool being called) - can be array for parallel calls
+                    if 'invocationInput' in orch_trace:
+                        inv_inputs = orch_trace['invocationInput']
+
+                        # Handle both single invocation and parallel invocations
+                        if not isinstance(inv_inputs, list):
+                            inv_inputs = [inv_inputs]
+
+                        for inv_input in inv_inputs:
+                            if 'actionGroupInvocationInput' in inv_input:
+                                tool_info = inv_input['actionGroupInvocationInput']
+                                tools_used.append({
+                                    'tool': tool_info.get('apiPath', 'unknown'),
+                                    'action_group': tool_info.get('actionGroupName', 'unknown')
+                                })
 
-            # THIS is where throttling actually happens - during stream iteration
-            for event in response['completion']:
-                if 'chunk' in event:
-                    chunk = event['chunk']
-                    if 'bytes' in chunk:
-                        full_response += chunk['bytes'].decode('utf-8')
+    return full_response, reasoning_traces, tools_used
 
-                if 'trace' in event:
-                    trace = event['trace']
-                    reasoning_traces.append(trace)
 
-                # Extract tool usage from traces
-                if 'trace' in trace:
-                    trace_details = trace['trace']
-                    if 'orchestrationTrace' in trace_details:
-                        orch_trace = trace_details['orchestrationTrace']
+def _invoke_churn_analyzer_once(input_text: str, session_id: str) -> Dict[str, Any]:
+    """Single InvokeAgent call to ChurnAnalyzer, fully consuming the stream."""
+    agent_call = begin_agent_call(input_text)
+    try:
+        response = get_agent_runtime().invoke_agent(
+            agentId=CHURN_ANALYZER_AGENT_ID,
+            agentAliasId=CHURN_ANALYZER_ALIAS_ID,
+            sessionId=session_id,
+            inputText=input_text,
+            enableTrace=True
+        )
 
-                        # DEBUG: Print orchestration trace keys
-                        print(f"DEBUG orch_trace keys: {list(orch_trace.keys())}")
-                        if 'invocationInput' in orch_trace:
-                            print(f"DEBUG invocationInput type: {type(orch_trace['invocationInput'])}, length: {len(orch_trace['invocationInput']) if isinstance(orch_trace['invocationInput'], list) else 'N/A'}")
+        full_response, reasoning_traces, tools_used = collect_agent_stream(response['completion'])
+    except Exception as e:
+        finish_agent_call(agent_call, error=e)
+        raise
+    finish_agent_call(agent_call, reasoning_traces)
 
-                        # Look for invocationInput (tool being called) - can be array for parallel calls
-                        if 'invocationInput' in orch_trace:
-                            inv_inputs = orch_trace['invocationInput']
+    return {
+        'analysis': full_response,
+        'reasoning_traces': reasoning_traces,
+        'tools_used': tools_used,
+        'tool_count': len(tools_used),
+        'session_id': session_id
+    }
 
-                            # Handle both single invocation and parallel invocations
-                            if not isinstance(inv_inputs, list):
-                                inv_inputs = [inv_inputs]
 
-                            for inv_input in inv_inputs:
-                                if 'actionGroupInvocationInput' in inv_input:
-                                    tool_info = inv_input['actionGroupInvocationInput']
-                                    tools_used.append({
-                                        'tool': tool_info.get('apiPath', 'unknown'),
-                                        'action_group': tool_info.get('actionGroupName', 'unknown')
-                                    })
+def invoke_churn_analyzer_enhanced(customer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Invoke ChurnAnalyzer with enhanced prompt to trigger multiple intelligence tools.
+    Shows autonomous decision-making and multi-source analysis.
+    Throttled and transient failures are retried under AGENT_RETRY_POLICY.
+    """
+    session_id = str(uuid.uuid4())
+    input_text = build_churn_analyzer_input(customer)
+    label = f" (customer: {customer.get('customer_id', 'unknown')})"
+
+    def attempt():
+        # Rate limit: Acquire 1 token before API call
+        rate_limiter.acquire(tokens=1)
+        try:
+            result = _invoke_churn_analyzer_once(input_text, session_id)
+        except Exception as e:
+            if is_throttle(e):
+                rate_limiter.on_throttle()
+            raise
+        rate_limiter.on_success()
+        return result
+
+    try:
+        return AGENT_RETRY_POLICY.call(attempt, 'InvokeAgent', label=label)
+    except Exception as e:
+        print(f"Error invoking ChurnAnalyzer agent{label}: {e}")
+        raise
+
+
+async def invoke_churn_analyzer_enhanced_async(customer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async invoke_churn_analyzer_enhanced() for the asyncio engine.
+    Rate limiting and backoff sleeps are awaited on the event loop; only the
+    InvokeAgent call and stream read run on the I/O pool.
+    """
+    from shared.async_engine import acquire_limiter, run_blocking
 
-            # Success! Return results
-            return {
-                'analysis': full_response,
-                'reasoning_traces': reasoning_traces,
-                'tools_used': tools_used,
-                'tool_count': len(tools_used),
-                'session_id': session_id
-            }
+    session_id = str(uuid.uuid4())
+    input_text = build_churn_analyzer_input(customer)
+    label = f" (customer: {customer.get('customer_id', 'unknown')})"
 
+    async def attempt():
+        await acquire_limiter(rate_limiter)
+        try:
+            result = await run_blocking(_invoke_churn_analyzer_once, input_text, session_id)
         except Exception as e:
-            error_message = str(e)
-
-            # Check if it's a throttling error
-            if 'throttlingException' in error_message.lower() or 'throttling' in error_message.lower():
-                if attempt < max_retries - 1:
-                    # Longer exponential backoff: (2^attempt * 3) + random jitter
-                    # attempt 0: 3-4s, attempt 1: 6-7s, attempt 2: 12-13s, attempt 3: 24-25s, attempt 4: 48-49s
-                    wait_time = (2 ** attempt * 3) + random.uniform(0, 1)
-                    print(f"[Retry] Throttled, waiting {wait_time:.2f}s before retry {attempt + 1}/{max_retries} (customer: {customer.get('customer_id', 'unknown')})")
-                    time.sleep(wait_time)
-                    continue  # Retry
-                else:
-                    print(f"[Retry] Max retries reached after {max_retries} attempts (customer: {customer.get('customer_id', 'unknown')})")
-                    raise
-            else:
-                # Not a throttling error, raise immediately
-                print(f"Error invoking ChurnAnalyzer agent (customer: {customer.get('customer_id', 'unknown')}): {e}")
-                raise
+            if is_throttle(e):
+                rate_limiter.on_throttle()
+            raise
+        rate_limiter.on_success()
+        return result
 
-    # Should never reach here
-    raise Exception("Unexpected retry loop exit")
+    try:
+        return await AGENT_RETRY_POLICY.call_async(attempt, 'InvokeAgent', label=label)
+    except Exception as e:
+        print(f"Error invoking ChurnAnalyzer agent{label}: {e}")
+        raise
 
 
 def invoke_campaign_generator(customer: Dict[str, Any], analysis: str) -> Dict[str, Any]:
@@ -976,8 +1638,9 @@ Generate a comprehensive win-back campaign including:
 4. Optimal timing and channel recommendations
 """
 
+    agent_call = begin_agent_call(input_text)
     try:
-        response = bedrock_agent_runtime.invoke_agent(
+        response = get_agent_runtime().invoke_agent(
             agentId=CAMPAIGN_GENERATOR_AGENT_ID,
             agentAliasId=CAMPAIGN_GENERATOR_ALIAS_ID,
             sessionId=session_id,
@@ -1015,6 +1678,8 @@ Generate a comprehensive win-back campaign including:
                                     'action_group': tool_info.get('actionGroupName', 'unknown')
                                 })
 
+        finish_agent_call(agent_call, reasoning_traces)
+
         return {
             'campaign': full_response,
             'reasoning_traces': reasoning_traces,
@@ -1025,6 +1690,7 @@ Generate a comprehensive win-back campaign including:
 
     except Exception as e:
         print(f"Error invoking CampaignGenerator agent: {e}")
+        finish_agent_call(agent_call, error=e)
         raise
 
 
@@ -1048,8 +1714,9 @@ Customer Details:
 Provide comprehensive multi-source intelligence analysis.
 """
 
+    agent_call = begin_agent_call(input_text)
     try:
-        response = bedrock_agent_runtime.invoke_agent(
+        response = get_agent_runtime().invoke_agent(
             agentId=CHURN_ANALYZER_AGENT_ID,
             agentAliasId=CHURN_ANALYZER_ALIAS_ID,
             sessionId=session_id,
@@ -1106,6 +1773,8 @@ Provide comprehensive multi-source intelligence analysis.
                                 # Tool completed successfully
                                 pass
 
+        finish_agent_call(agent_call, reasoning_traces)
+
         return {
             'analysis': full_response,
             'reasoning_traces': reasoning_traces,
@@ -1116,6 +1785,7 @@ Provide comprehensive multi-source intelligence analysis.
 
     except Exception as e:
         print(f"Error invoking ChurnAnalyzer agent: {e}")
+        finish_agent_call(agent_call, error=e)
         raise
 
 
@@ -1139,8 +1809,10 @@ def handle_results(event: Dict[str, Any]) -> Dict[str, Any]:
         else:
             return response(404, {'error': 'Demo data not found'})
 
-    # Read status
+    # Read status (summing shard counters for fanned-out uploads)
     status = s3.get_json(f"results/{upload_id}/status.json")
+    if status:
+        status = read_progress(s3, upload_id, status)
 
     if not status:
         return response(200, {
@@ -1155,53 +1827,45 @@ def handle_results(event: Dict[str, Any]) -> Dict[str, Any]:
     completed = status.get('completed', 0)
     failed = status.get('failed', 0)
     total = status.get('total', 0)
+    shards = status.get('shards') or []
 
-    # If all workers are done, finalize status and aggregate results
-    if status['status'] == 'processing' and (completed + failed) >= total and total > 0:
+    # If every shard is done, finalize status and aggregate results
+    if status['status'] == 'processing' and shards and status.get('shards_done', 0) >= len(shards):
         print(f"[Results] All workers done: {completed} completed, {failed} failed out of {total}")
 
-        # Aggregate individual customer results
-        campaigns = []
+        # Aggregate individual customer results from the shards' manifests (no LIST)
         try:
-            # List all customer result files
-            import boto3
-            s3_client = boto3.client('s3')
-            prefix = f"results/{upload_id}/customers/"
-
-            paginator = s3_client.get_paginator('list_objects_v2')
-            pages = paginator.paginate(Bucket=DATA_BUCKET, Prefix=prefix)
+            entries = read_manifest(s3, upload_id, status)
+            keys = [entry['key'] for entry in entries if entry.get('status') == 'success' and entry.get('key')]
+            campaigns = [result for result in s3.get_many(keys, concurrency=RESULT_READ_CONCURRENCY) if result]
+            completed = sum(1 for entry in entries if entry.get('status') == 'success')
+            failed = len(entries) - completed
 
-            for page in pages:
-                if 'Contents' in page:
-                    for obj in page['Contents']:
-                        key = obj['Key']
-                        if key.endswith('.json'):
-                            customer_result = s3.get_json(key)
-                            if customer_result:
-                                campaigns.append(customer_result)
-
-            print(f"[Results] Aggregated {len(campaigns)} customer results")
+            print(f"[Results] Aggregated {len(campaigns)} customer results from {len(entries)} manifest entries")
 
             # Save aggregated results
             s3.put_json(f"results/{upload_id}/customers.json", campaigns)
 
             # Finalize status
             status['status'] = 'complete'
+            status['completed'] = completed
+            status['failed'] = failed
             status['estimated_remaining_seconds'] = 0
             s3.put_json(f"results/{upload_id}/status.json", status)
 
-        except Exception as e:
-            print(f"[Results] Error aggregating results: {e}")
-            # Continue anyway
+            return response(200, {
+                'status': 'complete',
+                'upload_id': upload_id,
+                'total': total,
+                'completed': completed,
+                'failed': failed,
+                'campaigns': campaigns
+            })
 
-        return response(200, {
-            'status': 'complete',
-            'upload_id': upload_id,
-            'total': total,
-            'completed': completed,
-            'failed': failed,
-            'campaigns': campaigns
-        })
+        except Exception as e:
+            # Nothing is finalized (BulkGetError included: a result couldn't be
+            # read); report progress so the next poll retries the aggregation
+            print(f"[Results] Error aggregating results, will retry: {e}")
 
     # If still processing, return progress
     if status['status'] == 'processing':
@@ -3,7 +3,6 @@ Bedrock Agent Action Group Executor
 Handles tool invocations from Bedrock Agents
 """
 import json
-import boto3
 import os
 import sys
 from datetime import datetime
@@ -11,9 +10,11 @@ from datetime import datetime
 # Add shared module to path
 sys.path.insert(0, '/opt/python')
 
-from shared.bedrock_client import BedrockClient
-from shared.agents import ChurnAnalysisAgent, CampaignGenerationAgent
+from shared.agent_calls import begin_agent_call, finish_agent_call
+from shared.client_registry import get_bedrock_client, get_client
 from shared.s3_helper import S3Helper
+from shared.retry_policy import AGENT_RETRY_POLICY, get_retry_budget, new_retry_budget, set_retry_budget
+from shared.warmup import import_module, warm_up
 
 # Environment
 DATA_BUCKET = os.environ.get('DATA_BUCKET', 'revive-ai-data')
@@ -40,6 +41,13 @@ def lambda_handler(event, context):
     """
     print(f"Event: {json.dumps(event)}")
 
+    # {"warmup": true}: build clients ahead of real tool calls, no work done
+    if event.get('warmup'):
+        return handle_warmup()
+
+    # Retries for this tool call must finish before the action group times out
+    set_retry_budget(new_retry_budget(context))
+
     try:
         # Extract request details
         action_group = event.get('actionGroup', '')
@@ -60,6 +68,7 @@ def lambda_handler(event, context):
 
         # Route to appropriate handler
         result = route_action(action_group, api_path, params_dict, request_body)
+        print(f"[Retry] Metrics: {json.dumps(get_retry_budget().stats())}")
 
         # Return in Bedrock Agent format
         return {
@@ -98,6 +107,21 @@ def lambda_handler(event, context):
         }
 
 
+def handle_warmup():
+    """
+    Pre-initialize what tool calls create lazily: the agents module and the
+    S3, Bedrock agent runtime and Bedrock model clients. Pure-Python tools
+    like /calculateCLV never need them, so they are not built at import.
+    """
+    seconds = warm_up({
+        'agents': import_module('shared.agents'),
+        's3': lambda: get_client('s3'),
+        'bedrock-agent-runtime': lambda: get_client('bedrock-agent-runtime', region_name='us-east-1'),
+        'bedrock_client': lambda: get_bedrock_client(BEDROCK_MODEL_ID)
+    })
+    return {'warmup': True, 'seconds': seconds}
+
+
 def route_action(action_group, api_path, params, request_body):
     """Route to appropriate tool handler."""
 
@@ -167,7 +191,8 @@ def handle_analyze_churn(params, request_body):
     print(f"Analyzing customer: {customer['customer_id']}")
 
     # Use existing analysis agent
-    bedrock = BedrockClient(model_id=BEDROCK_MODEL_ID)
+    from shared.agents import ChurnAnalysisAgent
+    bedrock = get_bedrock_client(BEDROCK_MODEL_ID)
     analysis_agent = ChurnAnalysisAgent(bedrock)
     result = analysis_agent.analyze(customer)
 
@@ -179,41 +204,11 @@ def handle_calculate_clv(params):
     """Calculate Customer Lifetime Value."""
     print("Executing: calculateCLV")
 
+    from shared.customer_value import calculate_clv
+
     mrr = float(params.get('mrr', 0))
     subscription_tier = params.get('subscription_tier', 'growth')
-
-    # Simple CLV calculation: MRR × average tenure
-    # Tier-based tenure assumptions
-    tenure_months = {
-        'starter': 12,
-        'growth': 24,
-        'enterprise': 36
-    }
-
-    avg_tenure = tenure_months.get(subscription_tier, 24)
-    clv = mrr * avg_tenure
-
-    # Prioritization
-    if clv > 50000:
-        priority = "CRITICAL"
-        recommendation = "Escalate to VP Sales - high-value customer"
-    elif clv > 20000:
-        priority = "HIGH"
-        recommendation = "Premium automated campaign + sales notification"
-    elif clv > 5000:
-        priority = "MEDIUM"
-        recommendation = "Standard automated campaign"
-    else:
-        priority = "LOW"
-        recommendation = "Basic campaign or no action"
-
-    result = {
-        'clv': clv,
-        'avg_tenure_months': avg_tenure,
-        'priority': priority,
-        'recommendation': recommendation,
-        'winback_probability': 0.65 if priority in ['HIGH', 'CRITICAL'] else 0.45
-    }
+    result = calculate_clv(mrr, subscription_tier)
 
     print(f"CLV result: {result}")
     return result
@@ -246,7 +241,8 @@ def handle_generate_campaign(params, request_body):
     print(f"Generating campaign for: {customer['customer_id']}, category: {analysis['category']}")
 
     # Use existing campaign agent
-    bedrock = BedrockClient(model_id=BEDROCK_MODEL_ID)
+    from shared.agents import CampaignGenerationAgent
+    bedrock = get_bedrock_client(BEDROCK_MODEL_ID)
     campaign_agent = CampaignGenerationAgent(bedrock)
     result = campaign_agent.generate(customer, analysis)
 
@@ -268,7 +264,7 @@ def handle_save_results(params, request_body):
     s3 = S3Helper(DATA_BUCKET)
     key = f"results/{upload_id}/customers/{customer_id}.json"
 
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
     s3_client.put_object(
         Bucket=DATA_BUCKET,
         Key=key,
@@ -341,6 +337,42 @@ def handle_escalate(params, request_body):
     return escalation
 
 
+def invoke_agent_gated(agent_id: str, alias_id: str, session_id: str, input_text: str) -> str:
+    """
+    One InvokeAgent call, gated by the throttle circuit breaker and charged
+    against the agent model's quota (settled from the trace usage once the
+    stream is consumed).
+
+    Returns:
+        The agent's full text response
+    """
+    agent_call = begin_agent_call(input_text)
+    reasoning_traces = []
+    try:
+        response = get_client('bedrock-agent-runtime', region_name='us-east-1').invoke_agent(
+            agentId=agent_id,
+            agentAliasId=alias_id,
+            sessionId=session_id,
+            inputText=input_text,
+            enableTrace=True  # Traces carry the usage the quota charge is settled from
+        )
+
+        # Collect response (throttling surfaces while reading the stream)
+        full_response = ""
+        for event in response['completion']:
+            if 'chunk' in event:
+                chunk = event['chunk']
+                if 'bytes' in chunk:
+                    full_response += chunk['bytes'].decode('utf-8')
+            if 'trace' in event:
+                reasoning_traces.append(event['trace'])
+    except Exception as e:
+        finish_agent_call(agent_call, error=e)
+        raise
+    finish_agent_call(agent_call, reasoning_traces)
+    return full_response
+
+
 def handle_invoke_churn_analyzer(params, request_body):
     """Invoke Churn Analyzer agent (for coordinator)."""
     print("Executing: invokeChurnAnalyzer (via Coordinator)")
@@ -359,9 +391,6 @@ def handle_invoke_churn_analyzer(params, request_body):
 
     print(f"Coordinator invoking Churn Analyzer for: {customer['customer_id']}")
 
-    # Use bedrock-agent-runtime to invoke the churn analyzer agent
-    bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name='us-east-1')
-
     # Format input for churn analyzer agent
     input_text = f"""Analyze this customer:
 - Customer ID: {customer['customer_id']}
@@ -371,22 +400,16 @@ def handle_invoke_churn_analyzer(params, request_body):
 - Churn Date: {customer.get('churn_date', 'N/A')}
 - Reason: {customer['cancellation_reason']}"""
 
-    try:
-        response = bedrock_agent_runtime.invoke_agent(
-            agentId='HAKDC7PY1Z',
-            agentAliasId='TSTALIASID',  # Use DRAFT alias with all 5 intelligence tools
-            sessionId=str(customer['customer_id']) + '-session',
-            inputText=input_text,
-            enableTrace=True  # Enable traces to capture tool usage
+    def invoke():
+        return invoke_agent_gated(
+            agent_id='HAKDC7PY1Z',
+            alias_id='TSTALIASID',  # Use DRAFT alias with all 5 intelligence tools
+            session_id=str(customer['customer_id']) + '-session',
+            input_text=input_text
         )
 
-        # Collect response
-        full_response = ""
-        for event in response['completion']:
-            if 'chunk' in event:
-                chunk = event['chunk']
-                if 'bytes' in chunk:
-                    full_response += chunk['bytes'].decode('utf-8')
+    try:
+        full_response = AGENT_RETRY_POLICY.call(invoke, 'InvokeAgent')
 
         print(f"Churn Analyzer response: {full_response[:200]}...")
 
@@ -401,7 +424,8 @@ def handle_invoke_churn_analyzer(params, request_body):
     except Exception as e:
         print(f"Error invoking Churn Analyzer agent: {e}")
         # Fallback to direct analysis
-        bedrock = BedrockClient(model_id=BEDROCK_MODEL_ID)
+        from shared.agents import ChurnAnalysisAgent
+        bedrock = get_bedrock_client(BEDROCK_MODEL_ID)
         analysis_agent = ChurnAnalysisAgent(bedrock)
         return analysis_agent.analyze(customer)
 
@@ -424,9 +448,6 @@ def handle_invoke_campaign_generator(params, request_body):
 
     print(f"Coordinator invoking Campaign Generator for: {customer_id}")
 
-    # Invoke the CampaignGenerator Bedrock agent
-    bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name='us-east-1')
-
     # Format input for campaign generator agent
     churn_analysis_summary = f"""Customer: {company_name}
 Category: {churn_analysis.get('churn_category', 'unclear')}
@@ -441,22 +462,16 @@ Churn Analysis:
 
 Generate a 3-email sequence to win back this customer."""
 
-    try:
-        response = bedrock_agent_runtime.invoke_agent(
-            agentId='HXMON0RCRP',
-            agentAliasId='TSTALIASID',  # Use DRAFT alias
-            sessionId=str(customer_id) + '-campaign-session',
-            inputText=input_text,
-            enableTrace=True
+    def invoke():
+        return invoke_agent_gated(
+            agent_id='HXMON0RCRP',
+            alias_id='TSTALIASID',  # Use DRAFT alias
+            session_id=str(customer_id) + '-campaign-session',
+            input_text=input_text
         )
 
-        # Collect response
-        full_response = ""
-        for event in response['completion']:
-            if 'chunk' in event:
-                chunk = event['chunk']
-                if 'bytes' in chunk:
-                    full_response += chunk['bytes'].decode('utf-8')
+    try:
+        full_response = AGENT_RETRY_POLICY.call(invoke, 'InvokeAgent')
 
         print(f"Campaign Generator response: {full_response[:200]}...")
 
@@ -486,7 +501,8 @@ Generate a 3-email sequence to win back this customer."""
             'recommendation': churn_analysis.get('recommendation', 'Re-engage with targeted campaign')
         }
 
-        bedrock = BedrockClient(model_id=BEDROCK_MODEL_ID)
+        from shared.agents import CampaignGenerationAgent
+        bedrock = get_bedrock_client(BEDROCK_MODEL_ID)
         campaign_agent = CampaignGenerationAgent(bedrock)
         result = campaign_agent.generate(customer, analysis_fixed)
         return result
@@ -563,7 +579,7 @@ def handle_save_workflow_results(params, request_body):
     workflow_data['workflow_version'] = '2.0-multi-agent'
 
     # Save to S3
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
     key = f"workflows/{upload_id}/customers/{customer_id}.json"
 
     s3_client.put_object(
@@ -614,7 +630,8 @@ def handle_generate_email_sequence(params, request_body):
         'recommendation': 'Re-engage with targeted campaign'
     }
 
-    bedrock = BedrockClient(model_id=BEDROCK_MODEL_ID)
+    from shared.agents import CampaignGenerationAgent
+    bedrock = get_bedrock_client(BEDROCK_MODEL_ID)
     campaign_agent = CampaignGenerationAgent(bedrock)
     result = campaign_agent.generate(customer, analysis)
 
@@ -671,7 +688,7 @@ def handle_check_product_roadmap(params, request_body):
     print(f"Checking roadmap for churn category: {churn_category}")
 
     # Load roadmap from S3
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
     try:
         response = s3_client.get_object(
             Bucket=DATA_BUCKET,
@@ -728,7 +745,7 @@ def handle_get_crm_history(params, request_body):
     print(f"Retrieving CRM history for: {customer_id}")
 
     # Load CRM data from S3
-    s3_client = boto3.client('s3')
+    s3_client = get_client('s3')
     try:
         response = s3_client.get_object(
             Bucket=DATA_BUCKET,
@@ -0,0 +1,94 @@
+"""
+Quota and circuit-breaker gating for InvokeAgent calls.
+
+Every InvokeAgent call, from the api_handler engines or from the action
+group executor (coordinator tools invoking sub-agents), is wrapped as:
+
+    call = begin_agent_call(input_text)
+    try:
+        ... invoke_agent() and consume the completion stream ...
+    except Exception as e:
+        finish_agent_call(call, error=e)
+        raise
+    finish_agent_call(call, reasoning_traces)
+
+Configured with:
+    AGENT_MODEL_ID        Foundation model behind the Bedrock agents, whose RPM/TPM
+                          quota agent calls are charged against
+    AGENT_TOKEN_ESTIMATE  Tokens reserved per InvokeAgent (orchestration steps plus
+                          tool results) until the trace usage settles the charge (8000)
+"""
+import os
+from typing import Any, Dict, List
+
+from .circuit_breaker import get_circuit_breaker
+from .quota_limiter import estimate_tokens, get_model_quota, usage_tokens
+from .retry_policy import is_throttle
+
+AGENT_MODEL_ID = os.environ.get('AGENT_MODEL_ID', 'anthropic.claude-sonnet-4-5-20250929-v1:0')
+AGENT_TOKEN_ESTIMATE = int(os.environ.get('AGENT_TOKEN_ESTIMATE', '8000'))
+
+
+def agent_trace_usage(reasoning_traces: List[Dict[str, Any]]) -> tuple:
+    """
+    Model calls and tokens an agent invocation made, from the usage metadata
+    on modelInvocationOutput traces.
+
+    Returns:
+        (model_calls, tokens)
+    """
+    model_calls = 0
+    tokens = 0
+    for trace in reasoning_traces:
+        for part in (trace.get('trace') or {}).values():
+            output = part.get('modelInvocationOutput') if isinstance(part, dict) else None
+            usage = ((output or {}).get('metadata') or {}).get('usage')
+            if usage:
+                model_calls += 1
+                tokens += usage_tokens(usage)
+    return model_calls, tokens
+
+
+def begin_agent_call(input_text: str) -> tuple:
+    """
+    Gate one InvokeAgent call: wait on the throttle circuit breaker, then
+    charge it against AGENT_MODEL_ID's RPM/TPM quota.
+
+    Returns:
+        (probe, charged) to pass to finish_agent_call()
+    """
+    breaker = get_circuit_breaker()
+    probe = breaker.before_call() if breaker is not None else None
+    quota = get_model_quota(AGENT_MODEL_ID)
+    charged = quota.acquire(estimate_tokens(input_text) + AGENT_TOKEN_ESTIMATE) if quota is not None else 0
+    return probe, charged
+
+
+def finish_agent_call(call: tuple, reasoning_traces: List[Dict[str, Any]] = None, error: Exception = None) -> None:
+    """
+    Report an agent call's outcome to the breaker and settle its quota
+    charge: refunded in full if throttled, otherwise reconciled with the
+    usage in the traces (each orchestration step past the first is an extra
+    model request). Without traces the estimate stands.
+    """
+    probe, charged = call
+    breaker = get_circuit_breaker()
+    quota = get_model_quota(AGENT_MODEL_ID)
+    throttled = error is not None and is_throttle(error)
+
+    if breaker is not None:
+        if throttled:
+            breaker.on_throttle(probe)
+        elif error is not None:
+            breaker.on_error(probe)
+        else:
+            breaker.on_success(probe)
+
+    if quota is None:
+        return
+    if throttled:
+        quota.release(charged)
+        return
+    model_calls, tokens = agent_trace_usage(reasoning_traces or [])
+    if error is None and model_calls:
+        quota.settle(charged, tokens, extra_requests=model_calls - 1)
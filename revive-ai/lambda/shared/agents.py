@@ -1,12 +1,14 @@
 """AI Agent implementations for churn analysis and campaign generation."""
 from typing import Dict, Any
 from .bedrock_client import BedrockClient
-from .schemas import validate_analysis, validate_campaign
+from .schemas import ANALYSIS_SCHEMA, CAMPAIGN_SCHEMA, validate_analysis, validate_campaign
 
 
 class ChurnAnalysisAgent:
     """Agent 1: Analyze why customer churned."""
 
+    SYSTEM_PROMPT = "You are a SaaS customer success analyst expert at understanding churn patterns."
+
     def __init__(self, bedrock_client: BedrockClient):
         self.bedrock = bedrock_client
 
@@ -20,7 +22,7 @@ class ChurnAnalysisAgent:
         Returns:
             Analysis dict with category, confidence, insights, recommendation
         """
-        system_prompt = "You are a SaaS customer success analyst expert at understanding churn patterns."
+        system_prompt = self.SYSTEM_PROMPT
 
         cancellation_reason = customer.get('cancellation_reason', 'Not provided')
 
@@ -50,7 +52,9 @@ Respond ONLY with valid JSON:
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.3,
-            max_tokens=1024
+            max_tokens=1024,
+            schema=ANALYSIS_SCHEMA,
+            schema_name='record_churn_analysis'
         )
 
         analysis = response['data']
@@ -84,6 +88,38 @@ class CampaignGenerationAgent:
         Returns:
             Campaign dict with emails array
         """
+        system_prompt, prompt_prefix, user_prompt = self._build_prompts(customer, analysis, company_info)
+
+        response = self.bedrock.invoke_json(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=0.7,
+            max_tokens=2048,
+            schema=CAMPAIGN_SCHEMA,
+            schema_name='record_campaign',
+            prompt_prefix=prompt_prefix
+        )
+
+        return self._finalize(response, customer)
+
+    async def generate_async(self, customer: Dict[str, Any], analysis: Dict[str, Any], company_info: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Async generate() for the asyncio engine. Same prompt, validation and output."""
+        system_prompt, prompt_prefix, user_prompt = self._build_prompts(customer, analysis, company_info)
+
+        response = await self.bedrock.invoke_json_async(
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=0.7,
+            max_tokens=2048,
+            schema=CAMPAIGN_SCHEMA,
+            schema_name='record_campaign',
+            prompt_prefix=prompt_prefix
+        )
+
+        return self._finalize(response, customer)
+
+    def _build_prompts(self, customer: Dict[str, Any], analysis: Dict[str, Any], company_info: Dict[str, Any] = None) -> tuple:
+        """Build (system_prompt, prompt_prefix, user_prompt) for campaign generation."""
         # Default company info if not provided
         if company_info is None:
             company_info = {
@@ -114,24 +150,17 @@ Insights:
 {insights_text}
 Recommendation: {analysis.get('recommendation', '')}"""
 
-        user_prompt = f"""Create a highly personalized 3-email win-back sequence for this churned customer.
+        # Static instructions first (identical for every customer of a company,
+        # so they can be prompt-cached); customer data goes in the suffix
+        prompt_prefix = f"""Create a highly personalized 3-email win-back sequence for the churned customer described at the end of this message.
 
 YOUR COMPANY CONTEXT (write from this perspective):
 - Company Name: {company_info.get('name', 'our platform')}
 - Product: {company_info.get('product_name', 'our product')}
 - Value Proposition: {company_info.get('value_proposition', 'powerful analytics and insights')}
 
-CUSTOMER CONTEXT:
-- Company: {customer.get('company_name', 'Unknown')}
-- Previous Plan: {customer.get('subscription_tier', 'Unknown')} (${customer.get('mrr', '0')}/month)
-- Churn Date: {customer.get('churn_date', 'Unknown')}
-- Stated Reason: {customer.get('cancellation_reason', 'Not provided')}
-
-COMPREHENSIVE CHURN INTELLIGENCE:
-{full_analysis}
-
 TASK:
-Based on this intelligence, create the most effective 3-email win-back campaign. Use your expertise to:
+Based on the churn intelligence provided, create the most effective 3-email win-back campaign. Use your expertise to:
 
 1. Identify the ROOT CAUSE of churn (look beyond surface-level reasons)
 2. Choose the right tone, messaging, and offers for THIS specific customer
@@ -163,13 +192,19 @@ Respond ONLY with valid JSON:
   ]
 }}"""
 
-        response = self.bedrock.invoke_json(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            temperature=0.7,
-            max_tokens=2048
-        )
+        user_prompt = f"""CUSTOMER CONTEXT:
+- Company: {customer.get('company_name', 'Unknown')}
+- Previous Plan: {customer.get('subscription_tier', 'Unknown')} (${customer.get('mrr', '0')}/month)
+- Churn Date: {customer.get('churn_date', 'Unknown')}
+- Stated Reason: {customer.get('cancellation_reason', 'Not provided')}
+
+COMPREHENSIVE CHURN INTELLIGENCE:
+{full_analysis}"""
+
+        return system_prompt, prompt_prefix, user_prompt
 
+    def _finalize(self, response: Dict[str, Any], customer: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach customer_id and validate the generated campaign."""
         campaign = response['data']
 
         # Add customer_id to result
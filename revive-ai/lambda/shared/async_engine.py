@@ -0,0 +1,56 @@
+"""
+Helpers for the asyncio processing engine.
+
+boto3 has no native async API, so blocking SDK calls are handed to a
+dedicated I/O thread pool while the event loop does all scheduling, rate
+limiting and backoff. The pool only bounds concurrent socket waits; it is
+sized well above MAX_WORKERS so hundreds of customers can be in flight.
+
+Nothing awaited on the loop may block it: rate limiters are acquired with
+acquire_limiter(), which only awaits acquire_async() on limiters that keep
+their I/O off the loop.
+
+    ASYNC_IO_THREADS    Size of the blocking-call pool (default 256)
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for blocking SDK calls (created on first use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get('ASYNC_IO_THREADS', '256')),
+                thread_name_prefix='async-io'
+            )
+        return _executor
+
+
+async def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable on the I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def acquire_limiter(limiter, tokens: int = 1) -> bool:
+    """
+    Acquire rate limiter tokens without blocking the event loop.
+
+    TokenBucketRateLimiter and its subclasses keep acquire_async() loop-safe
+    (any store I/O goes through run_blocking); any other limiter's blocking
+    acquire() waits on the I/O pool instead.
+    """
+    from .rate_limiter import TokenBucketRateLimiter
+
+    if isinstance(limiter, TokenBucketRateLimiter):
+        return await limiter.acquire_async(tokens=tokens)
+    return await run_blocking(limiter.acquire, tokens)
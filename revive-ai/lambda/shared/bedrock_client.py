@@ -1,15 +1,124 @@
 """Shared Bedrock client for all Lambda functions."""
+import copy
 import json
-import boto3
+import os
+import time
 import re
+import threading
 from typing import Dict, Any, Optional
 
+from .bedrock_stub import is_stub_enabled, StubBedrockRuntime, StubBedrockAgentRuntime
+from .circuit_breaker import get_circuit_breaker
+from .cassette import get_cassette_mode, wrap_client
+from .client_registry import get_client, new_client
+from .json_stream import IncrementalJSONScanner, JSONStreamError
+from .quota_limiter import estimate_tokens, get_model_quota, usage_tokens
+from .response_cache import ResponseCache, cache_key, get_response_cache
+from .retry_policy import MODEL_RETRY_POLICY, is_throttle
+from .single_flight import get_single_flight
+
+
+# Shortest prefix (tokens, up to a cache_control breakpoint) each model family
+# will cache; Bedrock accepts shorter breakpoints but never creates an entry
+PROMPT_CACHE_MIN_TOKENS = [
+    ('claude-haiku-4-5', 4096),
+    ('claude-opus-4-5', 4096),
+    ('claude-3-5-haiku', 2048),
+]
+DEFAULT_PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def prompt_cache_min_tokens(model_id: str) -> int:
+    """Minimum cacheable prefix for a model (Sonnet 4/4.5, Opus 4 and 3.7 Sonnet: 1024)."""
+    for family, minimum in PROMPT_CACHE_MIN_TOKENS:
+        if family in model_id:
+            return minimum
+    return DEFAULT_PROMPT_CACHE_MIN_TOKENS
+
+
+# Process-wide token usage from InvokeModel calls (cache hits and coalesced
+# waiters excluded), including prompt-cache read/write counts
+_usage_lock = threading.Lock()
+_usage_totals = {
+    'calls': 0,
+    'input_tokens': 0,
+    'output_tokens': 0,
+    'cache_read_input_tokens': 0,
+    'cache_write_input_tokens': 0
+}
+
+
+def record_usage(usage: Dict[str, Any]) -> None:
+    """Add one response's usage block to the process totals."""
+    with _usage_lock:
+        _usage_totals['calls'] += 1
+        _usage_totals['input_tokens'] += int(usage.get('input_tokens', 0) or 0)
+        _usage_totals['output_tokens'] += int(usage.get('output_tokens', 0) or 0)
+        _usage_totals['cache_read_input_tokens'] += int(usage.get('cache_read_input_tokens', 0) or 0)
+        _usage_totals['cache_write_input_tokens'] += int(usage.get('cache_creation_input_tokens', 0) or 0)
+
+
+def get_usage_totals() -> Dict[str, int]:
+    """Snapshot of the process token totals."""
+    with _usage_lock:
+        return dict(_usage_totals)
+
+
+def create_client(service_name: str, region_name: str = 'us-east-1'):
+    """
+    Create a Bedrock runtime client.
+
+    Honours BEDROCK_BACKEND=stub (offline stand-in) and BEDROCK_CASSETTE_MODE
+    (record/replay). Replay mode never builds a real client.
+
+    Args:
+        service_name: 'bedrock-runtime' or 'bedrock-agent-runtime'
+        region_name: AWS region
+
+    Returns:
+        boto3 client or a drop-in replacement
+    """
+    if get_cassette_mode() == 'replay':
+        client = None
+    elif is_stub_enabled() and service_name == 'bedrock-runtime':
+        client = StubBedrockRuntime()
+    elif is_stub_enabled() and service_name == 'bedrock-agent-runtime':
+        client = StubBedrockAgentRuntime()
+    else:
+        client = new_client(service_name, region_name)
+
+    return wrap_client(client, service_name)
+
+
 class BedrockClient:
     """Wrapper for AWS Bedrock API calls."""
 
-    def __init__(self, model_id: str = "anthropic.claude-sonnet-4-5-20250929-v1:0", region: str = "us-east-1"):
+    def __init__(
+        self,
+        model_id: str = "anthropic.claude-sonnet-4-5-20250929-v1:0",
+        region: str = "us-east-1",
+        cache: Optional[ResponseCache] = None,
+        streaming: Optional[bool] = None,
+        structured_output: Optional[bool] = None
+    ):
         self.model_id = model_id
-        self.client = boto3.client('bedrock-runtime', region_name=region)
+        self.client = get_client('bedrock-runtime', region_name=region)
+        # InvokeModelWithResponseStream instead of InvokeModel (BEDROCK_STREAMING=on)
+        if streaming is None:
+            streaming = os.environ.get('BEDROCK_STREAMING', 'off').lower() in ('on', 'true', '1')
+        self.streaming = streaming
+        # invoke_json(schema=...) forces a tool call instead of scraping JSON (BEDROCK_STRUCTURED_OUTPUT=on)
+        if structured_output is None:
+            structured_output = os.environ.get('BEDROCK_STRUCTURED_OUTPUT', 'off').lower() in ('on', 'true', '1')
+        self.structured_output = structured_output
+        # cache_control breakpoints on the system prompt and static prompt prefix (BEDROCK_PROMPT_CACHE=on)
+        self.prompt_cache = os.environ.get('BEDROCK_PROMPT_CACHE', 'off').lower() in ('on', 'true', '1')
+        # Shared response cache (None unless BEDROCK_CACHE=on)
+        self.cache = cache if cache is not None else get_response_cache()
+        # Process-wide coalescer for identical concurrent requests
+        self.single_flight = get_single_flight()
+        # Per-model RPM/TPM buckets shared by every client of this model (None when disabled)
+        self.quota = get_model_quota(model_id)
 
     def invoke(
         self,
@@ -17,25 +126,47 @@ class BedrockClient:
         user_prompt: str,
         temperature: float = 0.7,
         max_tokens: int = 2048,
-        max_retries: int = 5
+        max_retries: int = 5,
+        use_cache: bool = True,
+        expect_json: bool = False,
+        tool: Optional[Dict[str, Any]] = None,
+        prompt_prefix: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Invoke Bedrock with Claude model with exponential backoff retry.
+        Invoke Bedrock with Claude model, retrying under MODEL_RETRY_POLICY.
 
         Args:
             system_prompt: System context for the AI
             user_prompt: User message
             temperature: 0.0-1.0, lower is more deterministic
             max_tokens: Maximum tokens in response
-            max_retries: Maximum retry attempts on throttling
+            max_retries: Maximum attempts on throttling or transient errors
+            use_cache: Allow serving/storing this call in the response cache
+            expect_json: When streaming, abort as soon as the output stops
+                looking like a JSON object/array and regenerate it once
+                with InvokeModel
+            tool: Tool spec (name, description, input_schema) the model is
+                forced to call; its arguments are returned as 'tool_input'
+            prompt_prefix: Static instructions sent ahead of user_prompt. With
+                prompt caching on, the system prompt and this prefix are
+                marked cacheable once they reach the model's minimum
+                cacheable length (prompt_cache_min_tokens)
 
         Returns:
-            Parsed JSON response from Claude
+            Dict with 'text' and 'usage' (plus 'ttft_seconds' when streamed
+            and 'tool_input' when a tool was forced)
         """
-        import time
-        import random
+        full_user_prompt = f"{prompt_prefix}\n\n{user_prompt}" if prompt_prefix else user_prompt
+        key = cache_key(self.model_id, system_prompt, full_user_prompt, temperature, max_tokens, tool)
+        cacheable = use_cache and self.cache is not None and self.cache.is_cacheable(temperature)
 
-        body = json.dumps({
+        if cacheable:
+            cached = self.cache.get(key)
+            if cached is not None:
+                # Deep copy: callers mutate what they get back (tool_input especially)
+                return dict(copy.deepcopy(cached), cached=True)
+
+        request = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": max_tokens,
             "temperature": temperature,
@@ -43,64 +174,255 @@ class BedrockClient:
             "messages": [
                 {
                     "role": "user",
-                    "content": user_prompt
+                    "content": full_user_prompt
                 }
             ]
-        })
+        }
+        if self.prompt_cache:
+            # Breakpoints only where the prefix up to them is long enough to be cached
+            minimum = prompt_cache_min_tokens(self.model_id)
+            system_tokens = estimate_tokens(system_prompt)
+            if system_tokens >= minimum:
+                request["system"] = [
+                    {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+                ]
+            if prompt_prefix and system_tokens + estimate_tokens(prompt_prefix) >= minimum:
+                request["messages"][0]["content"] = [
+                    {"type": "text", "text": prompt_prefix, "cache_control": {"type": "ephemeral"}},
+                    {"type": "text", "text": user_prompt}
+                ]
+        if tool is not None:
+            request["tools"] = [tool]
+            request["tool_choice"] = {"type": "tool", "name": tool["name"]}
+        body = json.dumps(request)
+        # Charged against the model's TPM up front, settled from the response usage
+        estimated_tokens = (
+            estimate_tokens(system_prompt) + estimate_tokens(full_user_prompt)
+            + (estimate_tokens(json.dumps(tool)) if tool is not None else 0) + max_tokens
+        )
 
-        for attempt in range(max_retries):
-            try:
-                response = self.client.invoke_model(
-                    modelId=self.model_id,
-                    body=body
-                )
+        def call_model():
+            if self.streaming:
+                try:
+                    result = self._invoke_model_stream(body, max_retries, expect_json, estimated_tokens)
+                except JSONStreamError:
+                    # A malformed generation is rarely repeated: regenerate once,
+                    # buffered, and leave the verdict to invoke_json's parser
+                    print("[BedrockClient Stream] Regenerating aborted response with InvokeModel")
+                    result = self._invoke_model(body, max_retries, estimated_tokens)
+            else:
+                result = self._invoke_model(body, max_retries, estimated_tokens)
+            record_usage(result.get('usage', {}))
+            if cacheable:
+                self.cache.put(key, copy.deepcopy(result))
+            return result
 
-                response_body = json.loads(response['body'].read())
+        if self.single_flight is None:
+            return call_model()
 
-                # Extract text from Claude response
-                if 'content' in response_body and len(response_body['content']) > 0:
+        # Identical prompts already in flight (duplicate customers, repeated reasons)
+        # wait for that call instead of spending another request
+        result, coalesced = self.single_flight.do(key, call_model)
+        # Every waiter gets the leader's result object, so each caller needs its own copy
+        result = copy.deepcopy(result)
+        return dict(result, coalesced=True) if coalesced else result
+
+    def _invoke_model(self, body: str, max_retries: int, estimated_tokens: int = 0) -> Dict[str, Any]:
+        """InvokeModel with exponential backoff on throttling."""
+        def call():
+            response = self.client.invoke_model(
+                modelId=self.model_id,
+                body=body
+            )
+
+            response_body = json.loads(response['body'].read())
+
+            # Forced tool call: typed arguments instead of text
+            for block in response_body.get('content', []):
+                if block.get('type') == 'tool_use':
                     return {
-                        'text': response_body['content'][0]['text'],
+                        'text': json.dumps(block['input']),
+                        'tool_input': block['input'],
                         'usage': response_body.get('usage', {})
                     }
 
+            # Extract text from Claude response
+            if 'content' in response_body and len(response_body['content']) > 0:
+                return {
+                    'text': response_body['content'][0]['text'],
+                    'usage': response_body.get('usage', {})
+                }
+
+            raise ValueError("Invalid response from Bedrock")
+
+        return self._with_retries(call, 'InvokeModel', max_retries, estimated_tokens)
+
+    def _invoke_model_stream(
+        self,
+        body: str,
+        max_retries: int,
+        expect_json: bool,
+        estimated_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """
+        InvokeModelWithResponseStream with the same backoff as _invoke_model.
+
+        Records time-to-first-token. With expect_json, text is fed to an
+        IncrementalJSONScanner and the stream is closed (generation abandoned)
+        as soon as the output can no longer parse as JSON; invoke() then
+        regenerates the response once without streaming.
+        """
+        def call():
+            start = time.perf_counter()
+            ttft = None
+            parts = []
+            tool_parts = []
+            usage = {}
+            scanner = IncrementalJSONScanner() if expect_json else None
+
+            response = self.client.invoke_model_with_response_stream(
+                modelId=self.model_id,
+                body=body
+            )
+            stream = response['body']
+
+            try:
+                for event in stream:
+                    if 'chunk' not in event:
+                        continue
+                    payload = json.loads(event['chunk']['bytes'])
+                    kind = payload.get('type')
+
+                    if kind == 'message_start':
+                        usage.update(payload.get('message', {}).get('usage', {}))
+                    elif kind == 'message_delta':
+                        usage.update(payload.get('usage', {}))
+                    elif kind == 'content_block_delta':
+                        delta = payload.get('delta', {})
+                        # Tool arguments arrive as input_json_delta fragments
+                        text = delta.get('text') or delta.get('partial_json') or ''
+                        if not text:
+                            continue
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                        (tool_parts if delta.get('type') == 'input_json_delta' else parts).append(text)
+                        if scanner is not None:
+                            scanner.feed(text)
+            except JSONStreamError as e:
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+                print(f"[BedrockClient Stream] Aborted after {sum(len(p) for p in parts)} chars "
+                      f"({time.perf_counter() - start:.2f}s): {e}")
+                raise
+
+            if tool_parts:
+                tool_input = json.loads(''.join(tool_parts))
+                return {
+                    'text': json.dumps(tool_input),
+                    'tool_input': tool_input,
+                    'usage': usage,
+                    'ttft_seconds': round(ttft, 3)
+                }
+
+            if not parts:
                 raise ValueError("Invalid response from Bedrock")
 
+            return {
+                'text': ''.join(parts),
+                'usage': usage,
+                'ttft_seconds': round(ttft, 3)
+            }
+
+        return self._with_retries(call, 'InvokeModelWithResponseStream', max_retries, estimated_tokens)
+
+    def _with_retries(self, call, operation: str, max_retries: int, estimated_tokens: int = 0) -> Dict[str, Any]:
+        """
+        Run call() under the shared MODEL_RETRY_POLICY.
+
+        Each attempt first waits on the shared throttle circuit breaker, then
+        is charged one request and estimated_tokens against the model quota;
+        the charge is settled from the response usage, or returned in full
+        when the attempt is throttled.
+        """
+        breaker = get_circuit_breaker()
+
+        def attempt():
+            probe = breaker.before_call() if breaker is not None else None
+            charged = self.quota.acquire(estimated_tokens) if self.quota is not None else 0
+            try:
+                result = call()
             except Exception as e:
-                error_message = str(e)
-
-                # Check if it's a throttling error
-                if 'ThrottlingException' in error_message or 'throttlingException' in error_message or 'Too many requests' in error_message:
-                    if attempt < max_retries - 1:
-                        # Exponential backoff: 2^attempt + random jitter
-                        wait_time = (2 ** attempt) + random.uniform(0, 1)
-                        print(f"[BedrockClient Retry] Throttled on InvokeModel, waiting {wait_time:.2f}s before retry {attempt + 1}/{max_retries}")
-                        time.sleep(wait_time)
-                        continue  # Retry
-                    else:
-                        print(f"[BedrockClient Retry] Max retries reached on InvokeModel")
-                        raise
-                else:
-                    # Not a throttling error, raise immediately
-                    raise
+                if is_throttle(e):
+                    if self.quota is not None:
+                        self.quota.release(charged)
+                    if breaker is not None:
+                        breaker.on_throttle(probe)
+                elif breaker is not None:
+                    breaker.on_error(probe)
+                raise
+
+            if self.quota is not None:
+                self.quota.settle(charged, usage_tokens(result.get('usage')))
+            if breaker is not None:
+                breaker.on_success(probe)
+            return result
 
-        # Should never reach here
-        raise Exception("Unexpected retry loop exit in BedrockClient.invoke")
+        return MODEL_RETRY_POLICY.call(attempt, operation, max_attempts=max_retries)
+
+    async def invoke_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async invoke() for the asyncio engine (SDK call runs on the I/O pool)."""
+        from .async_engine import run_blocking
+        return await run_blocking(self.invoke, *args, **kwargs)
+
+    async def invoke_json_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Async invoke_json() for the asyncio engine."""
+        from .async_engine import run_blocking
+        return await run_blocking(self.invoke_json, *args, **kwargs)
 
     def invoke_json(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.7,
-        max_tokens: int = 2048
+        max_tokens: int = 2048,
+        schema: Optional[Dict[str, Any]] = None,
+        schema_name: str = 'record_output',
+        prompt_prefix: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Invoke Bedrock and parse JSON response.
 
+        With structured output enabled and a schema given, the schema is sent
+        as a forced tool call and the tool arguments are returned directly,
+        skipping the text scraping below.
+
+        Args:
+            schema: JSON schema (object root) for the expected output
+            schema_name: Tool name used for the forced call
+            prompt_prefix: Static instructions placed before user_prompt (see invoke)
+
         Returns:
             Parsed JSON object from Claude's response
         """
-        response = self.invoke(system_prompt, user_prompt, temperature, max_tokens)
+        tool = None
+        if schema is not None and self.structured_output:
+            tool = {
+                'name': schema_name,
+                'description': 'Record the requested result. Always call this tool with the complete output.',
+                'input_schema': schema
+            }
+
+        response = self.invoke(
+            system_prompt, user_prompt, temperature, max_tokens,
+            expect_json=True, tool=tool, prompt_prefix=prompt_prefix
+        )
+        if 'tool_input' in response:
+            return {
+                'data': response['tool_input'],
+                'usage': response.get('usage', {})
+            }
+
         text = response['text'].strip()
 
         # Try to extract JSON from response
@@ -172,4 +494,8 @@ class BedrockClient:
                     'usage': response.get('usage', {})
                 }
             except Exception as e:
+                # Don't keep serving an unparseable response from cache
+                if response.get('cached') and self.cache is not None:
+                    full_user_prompt = f"{prompt_prefix}\n\n{user_prompt}" if prompt_prefix else user_prompt
+                    self.cache.invalidate(cache_key(self.model_id, system_prompt, full_user_prompt, temperature, max_tokens, tool))
                 raise ValueError(f"Failed to parse JSON from Claude response: {e}\nResponse: {text[:500]}")
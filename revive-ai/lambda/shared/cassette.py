@@ -0,0 +1,265 @@
+"""
+Record/replay cassettes for Bedrock calls.
+
+Wraps bedrock-runtime / bedrock-agent-runtime clients so InvokeModel,
+InvokeModelWithResponseStream and InvokeAgent responses (including stream
+events and their timing) can be recorded to a local directory and served
+back later with no network.
+
+    BEDROCK_CASSETTE_MODE    'record' or 'replay' (unset = disabled)
+    BEDROCK_CASSETTE_DIR     Cassette directory (default ./cassettes)
+    BEDROCK_CASSETTE_TIMING  'original' replays recorded latency, 'none' returns instantly (default)
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional
+
+CASSETTE_FORMAT_VERSION = 1
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+def get_cassette_mode() -> str:
+    """Current mode: 'record', 'replay' or '' when disabled."""
+    mode = os.environ.get('BEDROCK_CASSETTE_MODE', '').lower()
+    return mode if mode in ('record', 'replay') else ''
+
+
+def request_hash(request: Dict[str, Any]) -> str:
+    """Stable SHA-256 of a request dict."""
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CassetteStore:
+    """Directory of <hash>.json recordings."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, entry: Dict[str, Any]) -> None:
+        """Write atomically so concurrent workers never see partial files."""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = dict(entry, version=CASSETTE_FORMAT_VERSION, recorded_at=time.time())
+        tmp_path = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2, default=str)
+        with self.lock:
+            os.replace(tmp_path, self.path(key))
+
+
+def _encode_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Make an agent stream event JSON-safe (chunk bytes are base64)."""
+    if 'chunk' in event and 'bytes' in event['chunk']:
+        chunk = dict(event['chunk'])
+        chunk['bytes'] = base64.b64encode(chunk['bytes']).decode('ascii')
+        return dict(event, chunk=chunk)
+    return event
+
+
+def _decode_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    if 'chunk' in event and 'bytes' in event['chunk']:
+        chunk = dict(event['chunk'])
+        chunk['bytes'] = base64.b64decode(chunk['bytes'])
+        return dict(event, chunk=chunk)
+    return event
+
+
+class CassetteBedrockRuntime:
+    """Record/replay wrapper around a bedrock-runtime client."""
+
+    def __init__(self, inner, store: CassetteStore, mode: str, replay_timing: bool = False):
+        self.inner = inner
+        self.store = store
+        self.mode = mode
+        self.replay_timing = replay_timing
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    @staticmethod
+    def fingerprint(modelId: str, body: str) -> str:
+        return request_hash({'operation': 'InvokeModel', 'modelId': modelId, 'body': json.loads(body)})
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        key = self.fingerprint(modelId, body)
+
+        if self.mode == 'replay':
+            entry = self.store.load(key)
+            if entry is None:
+                raise CassetteMissError(f"No cassette for InvokeModel request {key[:12]}")
+            if self.replay_timing:
+                time.sleep(entry.get('elapsed_seconds', 0))
+            return {
+                'body': io.BytesIO(entry['response']['body'].encode('utf-8')),
+                'contentType': entry['response'].get('contentType', 'application/json')
+            }
+
+        start = time.perf_counter()
+        response = self.inner.invoke_model(modelId=modelId, body=body, **kwargs)
+        raw = response['body'].read()
+        elapsed = time.perf_counter() - start
+
+        self.store.save(key, {
+            'operation': 'InvokeModel',
+            'request': {'modelId': modelId, 'body': json.loads(body)},
+            'response': {'body': raw.decode('utf-8'), 'contentType': response.get('contentType', 'application/json')},
+            'elapsed_seconds': elapsed
+        })
+
+        return dict(response, body=io.BytesIO(raw))
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        key = request_hash({'operation': 'InvokeModelWithResponseStream', 'modelId': modelId, 'body': json.loads(body)})
+
+        if self.mode == 'replay':
+            entry = self.store.load(key)
+            if entry is None:
+                raise CassetteMissError(f"No cassette for InvokeModelWithResponseStream request {key[:12]}")
+            return {'body': _replay_events(entry['events'], self.replay_timing)}
+
+        start = time.perf_counter()
+        response = self.inner.invoke_model_with_response_stream(modelId=modelId, body=body, **kwargs)
+        request = {'modelId': modelId, 'body': json.loads(body)}
+        return dict(response, body=_record_events(
+            self.store, key, 'InvokeModelWithResponseStream', request, response['body'], start
+        ))
+
+
+class CassetteBedrockAgentRuntime:
+    """Record/replay wrapper around a bedrock-agent-runtime client."""
+
+    def __init__(self, inner, store: CassetteStore, mode: str, replay_timing: bool = False):
+        self.inner = inner
+        self.store = store
+        self.mode = mode
+        self.replay_timing = replay_timing
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    @staticmethod
+    def fingerprint(agentId: str, agentAliasId: str, inputText: str, enableTrace: bool) -> str:
+        # sessionId is a fresh UUID per call, so it is left out of the key
+        return request_hash({
+            'operation': 'InvokeAgent',
+            'agentId': agentId,
+            'agentAliasId': agentAliasId,
+            'inputText': inputText,
+            'enableTrace': enableTrace
+        })
+
+    def invoke_agent(
+        self,
+        agentId: str,
+        agentAliasId: str,
+        sessionId: str,
+        inputText: str,
+        enableTrace: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        key = self.fingerprint(agentId, agentAliasId, inputText, enableTrace)
+
+        if self.mode == 'replay':
+            entry = self.store.load(key)
+            if entry is None:
+                raise CassetteMissError(f"No cassette for InvokeAgent request {key[:12]}")
+            return {
+                'completion': self._replay(entry['events']),
+                'contentType': 'application/json',
+                'sessionId': sessionId
+            }
+
+        start = time.perf_counter()
+        response = self.inner.invoke_agent(
+            agentId=agentId,
+            agentAliasId=agentAliasId,
+            sessionId=sessionId,
+            inputText=inputText,
+            enableTrace=enableTrace,
+            **kwargs
+        )
+        request = {
+            'agentId': agentId,
+            'agentAliasId': agentAliasId,
+            'inputText': inputText,
+            'enableTrace': enableTrace
+        }
+        return dict(response, completion=self._record(key, request, response['completion'], start))
+
+    def _record(self, key: str, request: Dict[str, Any], stream, start: float) -> Iterator[Dict[str, Any]]:
+        return _record_events(self.store, key, 'InvokeAgent', request, stream, start)
+
+    def _replay(self, events: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        return _replay_events(events, self.replay_timing)
+
+
+def _record_events(
+    store: CassetteStore,
+    key: str,
+    operation: str,
+    request: Dict[str, Any],
+    stream,
+    start: float
+) -> Iterator[Dict[str, Any]]:
+    """Pass events through, saving the cassette only if the stream completes."""
+    events: List[Dict[str, Any]] = []
+    for event in stream:
+        events.append({'offset_seconds': time.perf_counter() - start, 'event': _encode_event(event)})
+        yield event
+
+    store.save(key, {
+        'operation': operation,
+        'request': request,
+        'events': events,
+        'elapsed_seconds': time.perf_counter() - start
+    })
+
+
+def _replay_events(events: List[Dict[str, Any]], replay_timing: bool) -> Iterator[Dict[str, Any]]:
+    start = time.perf_counter()
+    for item in events:
+        if replay_timing:
+            delay = item['offset_seconds'] - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        yield _decode_event(item['event'])
+
+
+def wrap_client(client, service_name: str):
+    """
+    Wrap a Bedrock client for record/replay when BEDROCK_CASSETTE_MODE is set.
+
+    Returns the client unchanged when cassettes are disabled or the service
+    is not a Bedrock runtime.
+    """
+    mode = get_cassette_mode()
+    if not mode:
+        return client
+
+    store = CassetteStore(os.environ.get('BEDROCK_CASSETTE_DIR', 'cassettes'))
+    replay_timing = os.environ.get('BEDROCK_CASSETTE_TIMING', 'none').lower() == 'original'
+
+    if service_name == 'bedrock-runtime':
+        return CassetteBedrockRuntime(client, store, mode, replay_timing)
+    if service_name == 'bedrock-agent-runtime':
+        return CassetteBedrockAgentRuntime(client, store, mode, replay_timing)
+    return client
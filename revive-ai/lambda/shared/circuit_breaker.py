@@ -0,0 +1,245 @@
+"""
+Process-wide throttle circuit breaker for Bedrock calls.
+
+Without it, every worker that hits ThrottlingException backs off on its own
+schedule, and they wake together and trip the quota again. The breaker
+watches the throttle rate over a sliding window and, once it crosses the
+threshold, opens: every new call waits out one shared cool-down. It then
+goes half-open and admits probe calls with slow start (1, 2, 4, ... in
+flight). Enough successful probes close it again; a throttled probe
+reopens it with a doubled cool-down. Each half-open period is a numbered
+round and probes carry the round that admitted them, so a slow probe
+finishing after its round ended can't affect the next one.
+
+Configured with:
+    THROTTLE_BREAKER                       on (default) / off
+    THROTTLE_BREAKER_THRESHOLD             Throttle rate that opens the breaker (0.5)
+    THROTTLE_BREAKER_WINDOW_SECONDS        Sliding window for the rate (10)
+    THROTTLE_BREAKER_MIN_CALLS             Outcomes needed in the window before tripping (5)
+    THROTTLE_BREAKER_COOLDOWN_SECONDS      First cool-down; doubles per consecutive trip (5)
+    THROTTLE_BREAKER_MAX_COOLDOWN_SECONDS  Cool-down ceiling (60)
+    THROTTLE_BREAKER_PROBES                Successful probes needed to close (7)
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ThrottleCircuitBreaker:
+    """
+    Closed / open / half-open breaker shared by every worker thread (the
+    asyncio engine's Bedrock calls run on its I/O pool threads).
+
+    Callers run before_call() ahead of each Bedrock request and report the
+    outcome with on_success(), on_throttle() or on_error(), passing back the
+    probe token before_call() returned.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        window_seconds: float = 10.0,
+        min_calls: int = 5,
+        cooldown_seconds: float = 5.0,
+        max_cooldown_seconds: float = 60.0,
+        probes_to_close: int = 7,
+        max_transitions: int = 20
+    ):
+        """
+        Args:
+            threshold: Throttled fraction of recent calls that opens the breaker
+            window_seconds: Sliding window the fraction is measured over
+            min_calls: Outcomes required in the window before it can trip
+            cooldown_seconds: First cool-down; doubles on each consecutive trip
+            max_cooldown_seconds: Cool-down ceiling
+            probes_to_close: Successful half-open probes needed to close
+            max_transitions: State transitions kept for status reporting
+        """
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.probes_to_close = probes_to_close
+
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.state = CLOSED
+        self.outcomes: deque = deque()  # (timestamp, throttled) while closed
+        self.open_until = 0.0
+        self.consecutive_trips = 0
+        self.probe_limit = 1
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self.round = 0  # Half-open round; probes are tagged with it
+        self.transitions: deque = deque(maxlen=max_transitions)
+        self.counters = {'trips': 0, 'calls_paused': 0, 'paused_seconds': 0.0}
+
+    def _throttle_rate(self, now: float) -> float:
+        while self.outcomes and self.outcomes[0][0] < now - self.window_seconds:
+            self.outcomes.popleft()
+        if len(self.outcomes) < self.min_calls:
+            return 0.0
+        return sum(1 for _, throttled in self.outcomes if throttled) / len(self.outcomes)
+
+    def _transition(self, new_state: str, **details) -> None:
+        """Change state and record it. Caller holds self.lock."""
+        record = dict(
+            {'from': self.state, 'to': new_state, 'at': datetime.utcnow().isoformat() + 'Z'},
+            **details
+        )
+        print(f"[CircuitBreaker] {self.state} -> {new_state}" + (f" {details}" if details else ''))
+        self.transitions.append(record)
+        self.state = new_state
+        self.changed.notify_all()
+
+    def _trip(self, now: float, throttle_rate: float) -> None:
+        """Open with a cool-down that doubles per consecutive trip. Caller holds self.lock."""
+        self.consecutive_trips += 1
+        self.counters['trips'] += 1
+        cooldown = min(self.max_cooldown_seconds, self.cooldown_seconds * 2 ** (self.consecutive_trips - 1))
+        # Jitter so breakers in different containers don't reopen in lockstep
+        cooldown *= random.uniform(0.9, 1.1)
+        self.open_until = now + cooldown
+        self.outcomes.clear()
+        self._transition(OPEN, throttle_rate=round(throttle_rate, 2), cooldown_seconds=round(cooldown, 2))
+
+    def _admit(self, now: float) -> tuple:
+        """
+        Try to admit one call. Caller holds self.lock.
+
+        Returns:
+            (admitted, probe, wait) - probe is the round of a half-open
+            probe (None for other calls); wait is seconds until the breaker
+            reopens, or None when waiting for a half-open probe slot
+        """
+        if self.state == OPEN:
+            if now < self.open_until:
+                return False, None, self.open_until - now
+            self.probe_limit = 1
+            self.probes_in_flight = 0
+            self.probe_successes = 0
+            self.round += 1
+            self._transition(HALF_OPEN, round=self.round)
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= self.probe_limit:
+                return False, None, None
+            self.probes_in_flight += 1
+            return True, self.round, 0
+
+        return True, None, 0
+
+    def _is_current_probe(self, probe: Optional[int]) -> bool:
+        """True if `probe` was admitted by the half-open round still running. Caller holds self.lock."""
+        return probe is not None and self.state == HALF_OPEN and probe == self.round
+
+    def before_call(self) -> Optional[int]:
+        """
+        Block while the breaker is open or half-open slots are taken.
+
+        Returns:
+            Probe token to pass to the outcome callback: the half-open round
+            that admitted this call as a probe, or None for a normal call
+        """
+        paused_at = None
+        with self.lock:
+            while True:
+                admitted, probe, wait = self._admit(time.time())
+                if admitted:
+                    if paused_at is not None:
+                        self.counters['calls_paused'] += 1
+                        self.counters['paused_seconds'] += time.time() - paused_at
+                    return probe
+                if paused_at is None:
+                    paused_at = time.time()
+                self.changed.wait(wait)
+
+    def on_success(self, probe: Optional[int] = None) -> None:
+        with self.lock:
+            if self._is_current_probe(probe):
+                self.probes_in_flight -= 1
+                self.probe_successes += 1
+                if self.probe_successes >= self.probes_to_close:
+                    self.consecutive_trips = 0
+                    self.outcomes.clear()
+                    self._transition(CLOSED, probes=self.probe_successes)
+                else:
+                    # Slow start: +1 slot per successful probe, so the probes
+                    # allowed in flight double with each round
+                    self.probe_limit += 1
+                    self.changed.notify_all()
+            elif self.state == CLOSED:
+                self.outcomes.append((time.time(), False))
+
+    def on_throttle(self, probe: Optional[int] = None) -> None:
+        with self.lock:
+            now = time.time()
+            if self._is_current_probe(probe):
+                self.probes_in_flight -= 1
+                self._trip(now, 1.0)
+            elif self.state == CLOSED:
+                self.outcomes.append((now, True))
+                throttle_rate = self._throttle_rate(now)
+                if throttle_rate >= self.threshold:
+                    self._trip(now, throttle_rate)
+
+    def on_error(self, probe: Optional[int] = None) -> None:
+        """A call failed for a non-throttling reason; frees its probe slot."""
+        with self.lock:
+            if self._is_current_probe(probe):
+                self.probes_in_flight -= 1
+                self.changed.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """State, counters and recent transitions for status.json."""
+        with self.lock:
+            return dict(
+                self.counters,
+                state=self.state,
+                paused_seconds=round(self.counters['paused_seconds'], 2),
+                transitions=list(self.transitions)
+            )
+
+
+_breaker: Optional[ThrottleCircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> Optional[ThrottleCircuitBreaker]:
+    """
+    Process-wide breaker configured from THROTTLE_BREAKER_* env vars.
+
+    Returns:
+        Shared ThrottleCircuitBreaker, or None when THROTTLE_BREAKER=off
+    """
+    global _breaker
+    if os.environ.get('THROTTLE_BREAKER', 'on').lower() in ('off', 'false', '0'):
+        return None
+
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = ThrottleCircuitBreaker(
+                threshold=float(os.environ.get('THROTTLE_BREAKER_THRESHOLD', '0.5')),
+                window_seconds=float(os.environ.get('THROTTLE_BREAKER_WINDOW_SECONDS', '10')),
+                min_calls=int(os.environ.get('THROTTLE_BREAKER_MIN_CALLS', '5')),
+                cooldown_seconds=float(os.environ.get('THROTTLE_BREAKER_COOLDOWN_SECONDS', '5')),
+                max_cooldown_seconds=float(os.environ.get('THROTTLE_BREAKER_MAX_COOLDOWN_SECONDS', '60')),
+                probes_to_close=int(os.environ.get('THROTTLE_BREAKER_PROBES', '7'))
+            )
+        return _breaker
+
+
+def reset_circuit_breaker() -> None:
+    """Drop the process-wide breaker so the next use rebuilds it (closed) from env."""
+    global _breaker
+    with _breaker_lock:
+        _breaker = None
@@ -0,0 +1,155 @@
+"""
+Process-wide AWS client registry.
+
+boto3 clients are thread-safe once built, but building one is expensive
+(loading service models, resolving endpoints, a fresh connection pool and
+TLS handshake), and building them concurrently from the default session is
+not safe. Clients are therefore created once per (service, region) under a
+lock and shared by every thread and invocation in the container, and
+BedrockClient wrappers are shared per (model, region).
+
+Configured with:
+    CLIENT_MAX_POOL_CONNECTIONS  HTTP connections per client (default: the largest
+                                 concurrency PROCESSING_ENGINE reaches, see
+                                 default_pool_connections())
+    CLIENT_CONNECT_TIMEOUT       Seconds to open a connection (5)
+    CLIENT_READ_TIMEOUT          Seconds to wait for response bytes (120; agent
+                                 streams pause while tools run)
+
+boto3/botocore are imported on the first client build rather than at module
+load, so Lambda routes that never touch AWS don't pay for them on a cold start.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', '10'))
+
+
+def default_pool_connections() -> int:
+    """
+    Connections per client for the most calls the configured processing
+    engine can have in flight at once (same env vars and defaults as the
+    api_handler), so urllib3 never discards pooled connections under load:
+
+        threads   2 x MAX_WORKERS (campaign and findings calls run concurrently)
+        asyncio   2 x ASYNC_MAX_IN_FLIGHT, capped by the ASYNC_IO_THREADS pool
+        pipeline  the sum of the stage worker pools
+
+    At least RESULT_READ_CONCURRENCY, for S3 get_many() reads on /results.
+    """
+    engine = os.environ.get('PROCESSING_ENGINE', 'threads').lower()
+    if engine == 'asyncio':
+        concurrency = min(
+            2 * int(os.environ.get('ASYNC_MAX_IN_FLIGHT', '200')),
+            int(os.environ.get('ASYNC_IO_THREADS', '256'))
+        )
+    elif engine == 'pipeline':
+        concurrency = sum(int(os.environ.get(name, default)) for name, default in (
+            ('PIPELINE_ANALYSIS_WORKERS', str(MAX_WORKERS)),
+            ('PIPELINE_CAMPAIGN_WORKERS', '4'),
+            ('PIPELINE_FINDINGS_WORKERS', '4'),
+            ('PIPELINE_PERSIST_WORKERS', '2')
+        ))
+    else:
+        concurrency = 2 * MAX_WORKERS
+    return max(10, concurrency, int(os.environ.get('RESULT_READ_CONCURRENCY', '16')))
+
+
+CLIENT_MAX_POOL_CONNECTIONS = int(os.environ.get('CLIENT_MAX_POOL_CONNECTIONS', '0')) or default_pool_connections()
+CLIENT_CONNECT_TIMEOUT = float(os.environ.get('CLIENT_CONNECT_TIMEOUT', '5'))
+CLIENT_READ_TIMEOUT = float(os.environ.get('CLIENT_READ_TIMEOUT', '120'))
+
+# Services whose retries are owned by shared/retry_policy.py; botocore's own
+# retry loop would otherwise multiply every policy attempt
+_POLICY_RETRIED_SERVICES = ('bedrock-runtime', 'bedrock-agent-runtime')
+
+_clients: Dict[Tuple[str, Optional[str]], Any] = {}
+_bedrock_clients: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def client_config(service_name: str):
+    """botocore Config for a pooled, keep-alive client of this service."""
+    from botocore.config import Config
+
+    if service_name in _POLICY_RETRIED_SERVICES:
+        retries = {'total_max_attempts': 1}
+    else:
+        retries = {'mode': 'standard', 'max_attempts': 3}
+    return Config(
+        max_pool_connections=CLIENT_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        connect_timeout=CLIENT_CONNECT_TIMEOUT,
+        read_timeout=CLIENT_READ_TIMEOUT,
+        retries=retries
+    )
+
+
+def new_client(service_name: str, region_name: Optional[str] = None):
+    """Build a boto3 client with the registry's pool/timeout settings (not cached)."""
+    import boto3
+
+    return boto3.client(service_name, region_name=region_name, config=client_config(service_name))
+
+
+def get_client(service_name: str, region_name: Optional[str] = None):
+    """
+    Shared client for a service and region.
+
+    Bedrock runtimes go through create_client(), so the offline stub and
+    record/replay cassettes apply as before.
+
+    Args:
+        service_name: e.g. 's3', 'lambda', 'bedrock-runtime'
+        region_name: AWS region (None = environment default)
+
+    Returns:
+        boto3 client or a drop-in replacement
+    """
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if service_name in _POLICY_RETRIED_SERVICES:
+                from .bedrock_client import create_client
+                client = create_client(service_name, region_name=region_name or 'us-east-1')
+            else:
+                client = new_client(service_name, region_name)
+            _clients[key] = client
+        return client
+
+
+def get_bedrock_client(model_id: str, region: str = 'us-east-1'):
+    """Shared BedrockClient for a model and region."""
+    key = (model_id, region)
+    client = _bedrock_clients.get(key)
+    if client is not None:
+        return client
+
+    from .bedrock_client import BedrockClient
+    with _lock:
+        client = _bedrock_clients.get(key)
+    if client is None:
+        # Built outside the lock: BedrockClient itself takes a runtime client from the registry
+        built = BedrockClient(model_id=model_id, region=region)
+        with _lock:
+            client = _bedrock_clients.setdefault(key, built)
+    return client
+
+
+def set_client(service_name: str, client, region_name: Optional[str] = None) -> None:
+    """Install a client for a service and region (e.g. a local stand-in)."""
+    with _lock:
+        _clients[(service_name, region_name)] = client
+
+
+def reset_clients() -> None:
+    """Drop every cached client (e.g. after changing BEDROCK_BACKEND or cassette settings)."""
+    with _lock:
+        _clients.clear()
+        _bedrock_clients.clear()
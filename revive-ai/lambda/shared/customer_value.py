@@ -0,0 +1,48 @@
+"""Customer lifetime value and win-back priority, shared by the calculateCLV action and reason clustering."""
+from typing import Any, Dict
+
+# Average tenure in months by subscription tier
+TIER_TENURE_MONTHS = {
+    'starter': 12,
+    'growth': 24,
+    'enterprise': 36
+}
+DEFAULT_TENURE_MONTHS = 24
+
+
+def calculate_clv(mrr: float, subscription_tier: str) -> Dict[str, Any]:
+    """
+    Simple CLV calculation: MRR × average tenure for the tier, plus the
+    win-back priority it implies.
+
+    Args:
+        mrr: Monthly recurring revenue
+        subscription_tier: starter, growth or enterprise (others use the default tenure)
+
+    Returns:
+        Dict with clv, avg_tenure_months, priority, recommendation and winback_probability
+    """
+    avg_tenure = TIER_TENURE_MONTHS.get(subscription_tier, DEFAULT_TENURE_MONTHS)
+    clv = float(mrr) * avg_tenure
+
+    # Prioritization
+    if clv > 50000:
+        priority = "CRITICAL"
+        recommendation = "Escalate to VP Sales - high-value customer"
+    elif clv > 20000:
+        priority = "HIGH"
+        recommendation = "Premium automated campaign + sales notification"
+    elif clv > 5000:
+        priority = "MEDIUM"
+        recommendation = "Standard automated campaign"
+    else:
+        priority = "LOW"
+        recommendation = "Basic campaign or no action"
+
+    return {
+        'clv': clv,
+        'avg_tenure_months': avg_tenure,
+        'priority': priority,
+        'recommendation': recommendation,
+        'winback_probability': 0.65 if priority in ['HIGH', 'CRITICAL'] else 0.45
+    }
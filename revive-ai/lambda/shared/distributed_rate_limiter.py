@@ -0,0 +1,285 @@
+"""
+Token bucket shared by every Lambda container and invocation.
+
+Bucket state (tokens + last refill time) lives in shared storage and is
+updated with compare-and-swap writes, so concurrent uploads and recycled
+containers draw from one quota instead of each starting with a full burst.
+To avoid a storage round trip per request, containers lease blocks of
+tokens and spend them locally.
+
+Backends:
+    S3BucketStore      S3 object updated with conditional puts (If-Match / If-None-Match)
+    SQLiteBucketStore  Local SQLite file with a version column (tests, local runs)
+"""
+import json
+import random
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from .rate_limiter import TokenBucketRateLimiter
+
+
+class S3BucketStore:
+    """Bucket state in one S3 object; the ETag is the CAS version."""
+
+    def __init__(self, s3_client, bucket: str, key: str = 'ratelimit/bedrock.json'):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+
+    def read(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Returns (state, etag), or (None, None) if the bucket doesn't exist yet."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.key)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                return None, None
+            raise
+        return json.loads(response['Body'].read().decode('utf-8')), response.get('ETag')
+
+    def write(self, state: Dict[str, Any], version: Optional[str]) -> bool:
+        """Conditional put; False if another writer got there first."""
+        condition = {'IfMatch': version} if version is not None else {'IfNoneMatch': '*'}
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=json.dumps(state).encode('utf-8'),
+                ContentType='application/json',
+                **condition
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                return False
+            raise
+
+
+class SQLiteBucketStore:
+    """Bucket state in a SQLite row; an integer version column is the CAS version."""
+
+    def __init__(self, path: str, name: str = 'bedrock'):
+        self.path = path
+        self.name = name
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS token_buckets '
+                '(name TEXT PRIMARY KEY, state TEXT NOT NULL, version INTEGER NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def read(self) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT state, version FROM token_buckets WHERE name = ?', (self.name,)).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def write(self, state: Dict[str, Any], version: Optional[int]) -> bool:
+        with self._connect() as conn:
+            if version is None:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO token_buckets (name, state, version) VALUES (?, ?, 1)',
+                    (self.name, json.dumps(state))
+                )
+            else:
+                cursor = conn.execute(
+                    'UPDATE token_buckets SET state = ?, version = version + 1 WHERE name = ? AND version = ?',
+                    (json.dumps(state), self.name, version)
+                )
+            return cursor.rowcount == 1
+
+
+class DistributedTokenBucketRateLimiter(TokenBucketRateLimiter):
+    """
+    TokenBucketRateLimiter whose bucket lives in a shared store.
+
+    Tokens are leased from the shared bucket lease_size at a time and spent
+    locally; unused leased tokens expire after lease_ttl seconds so an idle
+    container can't hoard a burst. Store round trips run without the
+    limiter lock held, so other threads keep queueing (and refunds keep
+    landing) while the FIFO head leases, and acquire_async() runs them on
+    the asyncio engine's I/O pool rather than the event loop. If the store is unreachable the
+    limiter falls back to the local bucket inherited from
+    TokenBucketRateLimiter for store_retry_seconds before trying it again.
+    """
+
+    def __init__(
+        self,
+        store,
+        rate_per_minute: int,
+        burst: int = None,
+        lease_size: int = 5,
+        lease_ttl: float = 30.0,
+        max_cas_attempts: int = 8,
+        store_retry_seconds: float = 5.0
+    ):
+        """
+        Args:
+            store: S3BucketStore or SQLiteBucketStore
+            rate_per_minute: Shared refill rate across all containers
+            burst: Shared bucket capacity (defaults to rate_per_minute / 10)
+            lease_size: Tokens taken from the shared bucket per round trip
+            lease_ttl: Seconds before unused leased tokens are discarded
+            max_cas_attempts: Conditional-write retries per lease before waiting
+            store_retry_seconds: Seconds to stay on the local bucket after a store error
+        """
+        super().__init__(rate_per_minute, burst or max(1, int(rate_per_minute / 10)))
+        self.store = store
+        self.lease_size = max(1, lease_size)
+        self.lease_ttl = lease_ttl
+        self.max_cas_attempts = max_cas_attempts
+        self.store_retry_seconds = store_retry_seconds
+
+        # Lease state is guarded by self.lock, like the local bucket
+        self.leased = 0.0
+        self.lease_expires = 0.0
+        self.store_retry_at = 0.0
+        self.counters = {'leases': 0, 'leased_tokens': 0, 'cas_conflicts': 0, 'store_errors': 0}
+
+    def _take_local(self, tokens: int) -> Optional[float]:
+        """
+        Take tokens from the lease, or from the local bucket while the store
+        is being avoided. Caller holds self.lock.
+
+        Returns:
+            Like _take(), or None if more tokens must be leased from the store
+        """
+        now = time.time()
+        if now >= self.lease_expires:
+            self.leased = 0.0
+        if self.leased >= tokens:
+            self.leased -= tokens
+            return 0
+        if now < self.store_retry_at:
+            return super()._take(tokens)
+        return None
+
+    def _lease_amounts(self, tokens: int) -> Tuple[float, float]:
+        """(wanted, needed) tokens for the next lease. Caller holds self.lock."""
+        return max(self.lease_size, tokens) - self.leased, tokens - self.leased
+
+    def _add_lease(self, tokens: int, lease: Tuple[float, float, int, Optional[Exception]]) -> float:
+        """
+        Add a _lease() result to the local lease and take tokens from it.
+        Caller holds self.lock.
+
+        Returns:
+            Like _take()
+        """
+        granted, wait, conflicts, error = lease
+        self.counters['cas_conflicts'] += conflicts
+        if error is not None:
+            self.counters['store_errors'] += 1
+            self.store_retry_at = time.time() + self.store_retry_seconds
+            print(f"[RateLimiter] Shared bucket unavailable, using local bucket for "
+                  f"{self.store_retry_seconds:.0f}s: {error}")
+            return super()._take(tokens)
+
+        if granted > 0:
+            if time.time() >= self.lease_expires:
+                self.leased = 0.0
+            self.leased += granted
+            self.lease_expires = time.time() + self.lease_ttl
+            self.counters['leases'] += 1
+            self.counters['leased_tokens'] += granted
+        if wait > 0:
+            return wait
+        if self.leased >= tokens:
+            self.leased -= tokens
+            return 0
+        return 0.1
+
+    def _take(self, tokens: int) -> float:
+        """
+        Take tokens from the local lease, leasing more from the shared bucket
+        when it runs out. Called by the FIFO head with self.lock held; the
+        lock is released for the store round trips.
+
+        Returns:
+            0 if tokens were taken, otherwise seconds until they will be available
+        """
+        taken = self._take_local(tokens)
+        if taken is not None:
+            return taken
+
+        wanted, needed = self._lease_amounts(tokens)
+        self.lock.release()
+        try:
+            lease = self._lease(wanted, needed)
+        finally:
+            self.lock.acquire()
+        return self._add_lease(tokens, lease)
+
+    async def _take_async(self, tokens: int) -> float:
+        """
+        _take() for acquire_async(): only the lease arithmetic runs on the
+        event loop; the store round trips and CAS retry sleeps run on the
+        I/O pool.
+        """
+        from .async_engine import run_blocking
+
+        with self.lock:
+            taken = self._take_local(tokens)
+            if taken is not None:
+                return taken
+            wanted, needed = self._lease_amounts(tokens)
+        lease = await run_blocking(self._lease, wanted, needed)
+        with self.lock:
+            return self._add_lease(tokens, lease)
+
+    def _lease(self, wanted: float, needed: float) -> Tuple[float, float, int, Optional[Exception]]:
+        """
+        Claim up to `wanted` (at least `needed`) tokens from the shared
+        bucket. Runs without self.lock; the caller adds them to the lease.
+
+        Returns:
+            (granted, wait, cas_conflicts, error): wait is 0 on success,
+            otherwise seconds until `needed` tokens will be available
+        """
+        refill_per_second = self.rate / 60.0
+        conflicts = 0
+
+        try:
+            for _ in range(self.max_cas_attempts):
+                now = time.time()
+                state, version = self.store.read()
+                if state is None:
+                    state = {'tokens': float(self.burst), 'last_refill': now}
+
+                available = min(self.burst, state['tokens'] + max(0.0, now - state['last_refill']) * refill_per_second)
+                if available < needed:
+                    return 0.0, (needed - available) / refill_per_second, conflicts, None
+
+                granted = min(wanted, available)
+                if self.store.write({'tokens': available - granted, 'last_refill': now}, version):
+                    return granted, 0.0, conflicts, None
+
+                # Another container won the race; re-read and try again
+                conflicts += 1
+                time.sleep(random.uniform(0, 0.02))
+        except Exception as e:
+            return 0.0, 0.0, conflicts, e
+
+        return 0.0, 0.1, conflicts, None
+
+    def get_available_tokens(self) -> float:
+        """Tokens leased to this container and not yet spent."""
+        with self.lock:
+            return self.leased if time.time() < self.lease_expires else 0.0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(
+                self.counters,
+                mode='distributed',
+                rate_per_minute=self.rate,
+                leased_tokens=round(self.counters['leased_tokens'], 1),
+                local_tokens=round(self.leased, 1),
+                store_fallback=time.time() < self.store_retry_at
+            )
@@ -0,0 +1,99 @@
+"""
+Incremental JSON scanner for streamed model output.
+
+Tracks string/escape state and bracket nesting as text arrives so a
+streaming call can tell, token by token, whether the output is still
+shaped like the JSON the prompt asked for. It does not build the parsed
+value; BedrockClient.invoke_json still parses the finished text, and like
+that parser it accepts any prose or markdown fence before the opening
+bracket.
+"""
+from typing import List, Optional
+
+_JSON_SCALAR_CHARS = set('0123456789-+.eEtruefalsn')
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+class JSONStreamError(ValueError):
+    """Streamed output left the expected JSON shape."""
+
+
+class IncrementalJSONScanner:
+    """
+    Feed text chunks; raises JSONStreamError as soon as the output can no
+    longer parse as a JSON object/array (characters that cannot appear
+    between JSON tokens, mismatched brackets), or optionally once too much
+    prose precedes the opening bracket.
+    """
+
+    def __init__(self, max_preamble_chars: Optional[int] = None):
+        """
+        Args:
+            max_preamble_chars: Non-fence characters tolerated before the
+                opening bracket (None = any amount, as invoke_json does)
+        """
+        self.max_preamble_chars = max_preamble_chars
+        self.state = 'preamble'
+        self.preamble = ''
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape_next = False
+        self.chars_seen = 0
+
+    @property
+    def complete(self) -> bool:
+        """True once the root object/array has been closed."""
+        return self.state == 'done'
+
+    def feed(self, text: str) -> None:
+        for char in text:
+            self.chars_seen += 1
+            if self.state == 'preamble':
+                self._preamble_char(char)
+            elif self.state == 'body':
+                self._body_char(char)
+            # Anything after the root value (closing fence, whitespace) is ignored
+
+    def _preamble_char(self, char: str) -> None:
+        if char in _CLOSERS:
+            self.state = 'body'
+            self.stack.append(_CLOSERS[char])
+            return
+
+        if self.max_preamble_chars is None:
+            return
+        self.preamble += char
+        # Markdown fences ("```json") and whitespace don't count as prose
+        stripped = self.preamble.strip()
+        if stripped.startswith('```'):
+            stripped = stripped[3:]
+            if stripped.lower().startswith('json'):
+                stripped = stripped[4:]
+        prose = ''.join(stripped.split())
+        if len(prose) > self.max_preamble_chars:
+            raise JSONStreamError(f"Prose before JSON: {self.preamble.strip()[:80]!r}")
+
+    def _body_char(self, char: str) -> None:
+        if self.in_string:
+            if self.escape_next:
+                self.escape_next = False
+            elif char == '\\':
+                self.escape_next = True
+            elif char == '"':
+                self.in_string = False
+            return
+
+        if char == '"':
+            self.in_string = True
+        elif char in _CLOSERS:
+            self.stack.append(_CLOSERS[char])
+        elif char in '}]':
+            expected = self.stack.pop()
+            if char != expected:
+                raise JSONStreamError(f"Mismatched bracket {char!r} at char {self.chars_seen} (expected {expected!r})")
+            if not self.stack:
+                self.state = 'done'
+        elif char.isspace() or char in ',:' or char in _JSON_SCALAR_CHARS:
+            pass
+        else:
+            raise JSONStreamError(f"Unexpected character {char!r} outside a JSON string at char {self.chars_seen}")
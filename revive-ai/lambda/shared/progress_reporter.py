@@ -0,0 +1,248 @@
+"""
+Coalescing write-behind writer for an upload's status.json.
+
+Workers only bump in-memory counters; a background thread writes the whole
+document when PROGRESS_FLUSH_SECONDS have passed since the last write, or
+earlier (but at most once per PROGRESS_MIN_INTERVAL_SECONDS) once
+PROGRESS_FLUSH_PERCENT of the upload has finished since then. The document
+is built from the reporter's own state (the initial status plus counters
+and live metrics), so status.json is never read back and status I/O grows
+with the run's duration instead of its customer count. close() stops the
+thread and makes one final, retried write.
+
+Uploads fanned out over several Lambda invocations (shards) never share a
+mutable object: status.json holds the list of shard IDs, each shard's
+reporter writes only results/{upload_id}/progress/{shard}.json, and
+readers sum the shard objects with merge_progress().
+
+Configured with:
+    PROGRESS_FLUSH_SECONDS         Max seconds between writes while progress is pending (10)
+    PROGRESS_FLUSH_PERCENT         Percent of the upload finished that triggers an early write (5)
+    PROGRESS_MIN_INTERVAL_SECONDS  Min seconds between writes (1)
+"""
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+PROGRESS_FLUSH_SECONDS = float(os.environ.get('PROGRESS_FLUSH_SECONDS', '10'))
+PROGRESS_FLUSH_PERCENT = float(os.environ.get('PROGRESS_FLUSH_PERCENT', '5'))
+PROGRESS_MIN_INTERVAL_SECONDS = float(os.environ.get('PROGRESS_MIN_INTERVAL_SECONDS', '1'))
+
+
+def progress_key(upload_id: str, shard: Optional[str] = None) -> str:
+    """status.json, or a shard's own counter object."""
+    if shard is None:
+        return f"results/{upload_id}/status.json"
+    return f"results/{upload_id}/progress/{shard}.json"
+
+
+def merge_progress(status: Dict[str, Any], shard_docs: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    status.json with the counters of its shards summed in.
+
+    Args:
+        status: status.json of a sharded upload
+        shard_docs: Each shard's counter object (None if not written yet)
+
+    Returns:
+        Copy of status with completed, failed, progress and shards_done set
+    """
+    written = [doc for doc in shard_docs if doc]
+    merged = dict(status)
+    merged['completed'] = sum(doc.get('completed', 0) for doc in written)
+    merged['failed'] = sum(doc.get('failed', 0) for doc in written)
+    total = merged.get('total', 0)
+    merged['progress'] = int(merged['completed'] / total * 100) if total > 0 else 0
+    merged['shards_done'] = sum(1 for doc in written if doc.get('done'))
+    return merged
+
+
+def read_progress(s3, upload_id: str, status: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Current progress of an upload: status.json itself, or for a sharded
+    upload still processing, its shard counters merged in (one small GET
+    per shard, fetched concurrently; no LIST - shard IDs are recorded in
+    status.json).
+    """
+    shards = status.get('shards')
+    if not shards or status.get('status') != 'processing':
+        return status
+    return merge_progress(status, s3.get_many([progress_key(upload_id, shard) for shard in shards]))
+
+
+class ProgressReporter:
+    """
+    Background status.json writer for one upload (or its progress object
+    for one shard of an upload).
+
+    Usage:
+        with ProgressReporter(s3, upload_id, initial_status, snapshot=metrics) as reporter:
+            ... reporter.record(success) per finished customer ...
+            reporter.close({'status': 'complete', ...})
+    """
+
+    def __init__(
+        self,
+        s3,
+        upload_id: str,
+        initial_status: Dict[str, Any],
+        snapshot: Optional[Callable[[], Dict[str, Any]]] = None,
+        flush_seconds: float = PROGRESS_FLUSH_SECONDS,
+        flush_percent: float = PROGRESS_FLUSH_PERCENT,
+        min_interval: float = PROGRESS_MIN_INTERVAL_SECONDS,
+        final_attempts: int = 3,
+        shard: Optional[str] = None,
+        manifest=None
+    ):
+        """
+        Args:
+            s3: S3Helper for the results bucket
+            upload_id: Upload whose status.json is written
+            initial_status: Document written by /process (create_status_stub), or the shard's
+                {'upload_id', 'shard', 'total'}; every write starts from it
+            snapshot: Returns live fields (limiter/quota/breaker stats...) merged into each write
+            flush_seconds: Max seconds between writes while progress is pending
+            flush_percent: Percent of total finished that triggers an early write
+            min_interval: Min seconds between writes
+            final_attempts: Attempts for the final write
+            shard: Write results/{upload_id}/progress/{shard}.json instead of status.json
+            manifest: ResultsManifest written just before each progress write
+        """
+        self.s3 = s3
+        self.shard = shard
+        self.manifest = manifest
+        self.key = progress_key(upload_id, shard)
+        self.base = dict(initial_status)
+        self.total = int(self.base.get('total', 0))
+        self.snapshot = snapshot
+        self.flush_seconds = flush_seconds
+        self.flush_delta = max(1, math.ceil(self.total * flush_percent / 100))
+        self.min_interval = min_interval
+        self.final_attempts = final_attempts
+
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.write_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.retry_at = 0.0
+        self.closed = False
+        self.writes = 0
+        self.thread = threading.Thread(target=self._run, name=f"progress-{upload_id}", daemon=True)
+        self.thread.start()
+
+    def record(self, success: bool) -> None:
+        """Count one finished customer. Never blocks on I/O."""
+        with self.lock:
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.pending += 1
+            # The first pending record starts the flush_seconds timer
+            if self.pending == 1 or self.pending >= self.flush_delta:
+                self.changed.notify()
+
+    def _due(self) -> Optional[float]:
+        """0 if a write is due, else seconds until it is (None = nothing pending). Caller holds self.lock."""
+        if self.pending == 0:
+            return None
+        now = time.monotonic()
+        if now < self.retry_at:
+            return self.retry_at - now
+        interval = self.min_interval if self.pending >= self.flush_delta else self.flush_seconds
+        return max(0.0, self.last_flush + interval - now)
+
+    def _run(self) -> None:
+        while True:
+            with self.lock:
+                while not self.closed:
+                    wait = self._due()
+                    if wait == 0:
+                        break
+                    self.changed.wait(wait)
+                if self.closed:
+                    return
+            try:
+                self._write()
+            except Exception as e:
+                # Progress is best-effort; the counters stay pending for the next write
+                print(f"[Progress] Write failed for {self.key}: {e}")
+                with self.lock:
+                    self.retry_at = time.monotonic() + self.flush_seconds
+
+    def document(self, final_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """status.json as it would be written now."""
+        with self.lock:
+            completed, failed = self.completed, self.failed
+        status = dict(self.base)
+        status['completed'] = completed
+        status['failed'] = failed
+        status['progress'] = int(completed / self.total * 100) if self.total > 0 else 0
+        if self.manifest is not None:
+            status['manifest_entries'] = self.manifest.written
+        if self.snapshot is not None:
+            status.update(self.snapshot())
+        if final_fields:
+            status.update(final_fields)
+        status['updated_at'] = datetime.utcnow().isoformat() + 'Z'
+        return status
+
+    def _write(self, final_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # Serialized so an older document can never overwrite a newer one
+        with self.write_lock:
+            with self.lock:
+                written = self.pending
+            # Manifest first, so a progress object never counts entries that aren't in S3 yet
+            if self.manifest is not None:
+                self.manifest.write(self.s3)
+            status = self.document(final_fields)
+            self.s3.put_json(self.key, status)
+            with self.lock:
+                self.pending -= written
+                self.last_flush = time.monotonic()
+                self.writes += 1
+            return status
+
+    def stop(self) -> None:
+        """Stop the background writer without a final write (idempotent)."""
+        with self.lock:
+            self.closed = True
+            self.changed.notify()
+        if self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def close(self, final_fields: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Stop the background writer and write the final document, retrying
+        failed writes.
+
+        Args:
+            final_fields: Fields set only in the final document (status, token usage...)
+
+        Returns:
+            The document written
+        """
+        self.stop()
+        for attempt in range(1, self.final_attempts + 1):
+            try:
+                status = self._write(final_fields)
+                break
+            except Exception as e:
+                if attempt == self.final_attempts:
+                    raise
+                print(f"[Progress] Final write failed ({e}), retrying ({attempt}/{self.final_attempts - 1})")
+                time.sleep(0.5 * attempt)
+        print(f"[Progress] {self.key}: {self.writes} writes for {self.completed + self.failed} customers")
+        return status
+
+    def __enter__(self) -> 'ProgressReporter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,194 @@
+"""
+Per-model Bedrock quota limiter: requests-per-minute and tokens-per-minute.
+
+Bedrock enforces RPM and TPM per model, so each model gets its own pair of
+token buckets. A call is charged one request plus its estimated input
+tokens and max_tokens up front (Bedrock reserves max_tokens against TPM the
+same way), and the difference is refunded once the response's usage block
+says what it really cost.
+
+Quotas are configured with:
+    BEDROCK_QUOTA_LIMITER  on (default) / off
+    BEDROCK_QUOTA_RPM      Default requests per minute per model (200)
+    BEDROCK_QUOTA_TPM      Default tokens per minute per model (400000)
+    BEDROCK_MODEL_QUOTAS   JSON overrides keyed by model ID substring, e.g.
+                           {"haiku": {"rpm": 400, "tpm": 800000}}
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from .rate_limiter import TokenBucketRateLimiter
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return len(text or '') // 4 + 1
+
+
+def usage_tokens(usage: Optional[Dict[str, Any]]) -> Optional[int]:
+    """
+    Tokens billed against TPM for one usage block (InvokeModel snake_case or
+    agent trace camelCase), including prompt-cache reads and writes.
+
+    Returns:
+        Token count, or None if the usage block is empty
+    """
+    if not usage:
+        return None
+    fields = (
+        'input_tokens', 'output_tokens', 'cache_read_input_tokens', 'cache_creation_input_tokens',
+        'inputTokens', 'outputTokens'
+    )
+    return sum(int(usage.get(field, 0) or 0) for field in fields)
+
+
+class ModelQuota:
+    """RPM and TPM buckets for one model."""
+
+    def __init__(self, model_id: str, requests_per_minute: int, tokens_per_minute: int):
+        """
+        Args:
+            model_id: Bedrock model ID this quota applies to
+            requests_per_minute: Request quota
+            tokens_per_minute: Token quota (input + output)
+        """
+        self.model_id = model_id
+        self.requests = TokenBucketRateLimiter(requests_per_minute, max(1, int(requests_per_minute / 10)))
+        self.tokens = TokenBucketRateLimiter(tokens_per_minute, max(1, int(tokens_per_minute / 4)))
+        self.lock = threading.Lock()
+        self.counters = {'calls': 0, 'charged_tokens': 0, 'refunded_tokens': 0, 'used_tokens': 0, 'extra_requests': 0}
+
+    def acquire(self, estimated_tokens: int) -> int:
+        """
+        Block until one request and estimated_tokens are available.
+
+        Args:
+            estimated_tokens: Expected input tokens plus max_tokens
+
+        Returns:
+            Tokens charged (pass to settle() or release())
+        """
+        # A charge larger than the bucket could never be served; cap it
+        charged = min(max(1, int(estimated_tokens)), self.tokens.burst)
+        self.requests.acquire(tokens=1)
+        self.tokens.acquire(tokens=charged)
+        with self.lock:
+            self.counters['calls'] += 1
+            self.counters['charged_tokens'] += charged
+        return charged
+
+    def settle(self, charged: int, used_tokens: Optional[int] = None, extra_requests: int = 0) -> None:
+        """
+        Reconcile a charge with what the call actually used.
+
+        Args:
+            charged: Value returned by acquire()
+            used_tokens: Actual tokens from the usage block (None keeps the estimate)
+            extra_requests: Additional model calls made (e.g. agent orchestration steps)
+        """
+        if extra_requests > 0:
+            self.requests.refund(-extra_requests)
+            with self.lock:
+                self.counters['extra_requests'] += extra_requests
+        if used_tokens is None:
+            return
+        # Positive refunds unused reservation; negative charges an underestimate
+        self.tokens.refund(charged - used_tokens)
+        with self.lock:
+            self.counters['used_tokens'] += used_tokens
+            self.counters['refunded_tokens'] += charged - used_tokens
+
+    def release(self, charged: int) -> None:
+        """Return the whole charge (the call was throttled and never ran)."""
+        self.requests.refund(1)
+        self.tokens.refund(charged)
+        with self.lock:
+            self.counters['refunded_tokens'] += charged
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(
+                self.counters,
+                rpm=self.requests.rate,
+                tpm=self.tokens.rate,
+                available_requests=round(self.requests.get_available_tokens(), 1),
+                available_tokens=int(self.tokens.get_available_tokens())
+            )
+
+
+class QuotaLimiter:
+    """ModelQuota per model ID, created on first use from the configured limits."""
+
+    def __init__(self, default_rpm: int, default_tpm: int, overrides: Optional[Dict[str, Dict[str, int]]] = None):
+        """
+        Args:
+            default_rpm: RPM for models without an override
+            default_tpm: TPM for models without an override
+            overrides: {model_id_substring: {'rpm': ..., 'tpm': ...}}
+        """
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.overrides = overrides or {}
+        self.models: Dict[str, ModelQuota] = {}
+        self.lock = threading.Lock()
+
+    def for_model(self, model_id: str) -> ModelQuota:
+        with self.lock:
+            quota = self.models.get(model_id)
+            if quota is None:
+                limits = next(
+                    (limits for pattern, limits in self.overrides.items() if pattern in model_id),
+                    {}
+                )
+                quota = self.models[model_id] = ModelQuota(
+                    model_id,
+                    int(limits.get('rpm', self.default_rpm)),
+                    int(limits.get('tpm', self.default_tpm))
+                )
+            return quota
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model counters for status reporting."""
+        with self.lock:
+            models = dict(self.models)
+        return {model_id: quota.stats() for model_id, quota in models.items()}
+
+
+_quota_limiter: Optional[QuotaLimiter] = None
+_quota_limiter_lock = threading.Lock()
+
+
+def get_quota_limiter() -> Optional[QuotaLimiter]:
+    """
+    Process-wide quota limiter configured from BEDROCK_QUOTA_* env vars.
+
+    Returns:
+        Shared QuotaLimiter, or None when BEDROCK_QUOTA_LIMITER=off
+    """
+    global _quota_limiter
+    if os.environ.get('BEDROCK_QUOTA_LIMITER', 'on').lower() in ('off', 'false', '0'):
+        return None
+
+    with _quota_limiter_lock:
+        if _quota_limiter is None:
+            _quota_limiter = QuotaLimiter(
+                default_rpm=int(os.environ.get('BEDROCK_QUOTA_RPM', '200')),
+                default_tpm=int(os.environ.get('BEDROCK_QUOTA_TPM', '400000')),
+                overrides=json.loads(os.environ.get('BEDROCK_MODEL_QUOTAS', '') or '{}')
+            )
+        return _quota_limiter
+
+
+def get_model_quota(model_id: str) -> Optional[ModelQuota]:
+    """ModelQuota for model_id from the process-wide limiter (None when disabled)."""
+    limiter = get_quota_limiter()
+    return limiter.for_model(model_id) if limiter is not None else None
+
+
+def reset_quota_limiter() -> None:
+    """Drop the process-wide limiter so the next use rebuilds it from env (full buckets)."""
+    global _quota_limiter
+    with _quota_limiter_lock:
+        _quota_limiter = None
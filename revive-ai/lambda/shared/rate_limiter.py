@@ -1,10 +1,36 @@
 """Token bucket rate limiter for API calls."""
 import time
 import threading
+from collections import deque
+from typing import Optional
+
+
+class _Waiter:
+    """A queued acquire() (thread) or acquire_async() (event loop) call."""
+
+    __slots__ = ('cond', 'loop', 'event')
+
+    def __init__(self, cond: threading.Condition = None, loop=None, event=None):
+        self.cond = cond
+        self.loop = loop
+        self.event = event
+
+    def wake(self) -> None:
+        """Wake this waiter (caller holds the limiter lock)."""
+        if self.cond is not None:
+            self.cond.notify()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
 
 
 class TokenBucketRateLimiter:
-    """Thread-safe token bucket rate limiter."""
+    """
+    Thread-safe token bucket rate limiter.
+
+    Waiters are served in FIFO order: only the caller at the head of the
+    queue may take tokens, and it sleeps for exactly the refill time it
+    needs. The others sleep until they become the head, so nobody polls.
+    """
 
     def __init__(self, rate_per_minute: int, burst: int = None):
         """
@@ -19,34 +45,156 @@ class TokenBucketRateLimiter:
         self.tokens = float(self.burst)
         self.last_refill = time.time()
         self.lock = threading.Lock()
+        self.waiters: deque = deque()
+
+    def _take(self, tokens: int) -> float:
+        """
+        Refill, then take tokens if available. Caller holds self.lock.
 
-    def acquire(self, tokens: int = 1) -> bool:
+        Returns:
+            0 if tokens were taken, otherwise seconds until they will be available
         """
-        Try to acquire tokens. Blocks until tokens are available.
+        now = time.time()
+        elapsed = now - self.last_refill
+
+        # Refill tokens based on elapsed time
+        new_tokens = elapsed * (self.rate / 60.0)  # Convert per-minute to per-second
+        self.tokens = min(self.burst, self.tokens + new_tokens)
+        self.last_refill = now
+
+        # Check if we have enough tokens
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0
+
+        return (tokens - self.tokens) / (self.rate / 60.0)
+
+    def _leave(self, waiter: _Waiter) -> None:
+        """Dequeue a waiter and wake the next head. Caller holds self.lock."""
+        was_head = self.waiters and self.waiters[0] is waiter
+        self.waiters.remove(waiter)
+        if was_head and self.waiters:
+            self.waiters[0].wake()
+
+    def _wake_head(self) -> None:
+        """Let the head re-check its wait (e.g. after a rate change). Caller holds self.lock."""
+        if self.waiters:
+            self.waiters[0].wake()
+
+    def acquire(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Acquire tokens, blocking in FIFO order until they are available.
 
         Args:
             tokens: Number of tokens to acquire (default: 1)
+            timeout: Maximum seconds to wait (None = wait indefinitely)
 
         Returns:
-            True when tokens are acquired
+            True when tokens are acquired, False if the timeout expired first
         """
-        while True:
-            with self.lock:
-                now = time.time()
-                elapsed = now - self.last_refill
+        deadline = None if timeout is None else time.monotonic() + timeout
 
-                # Refill tokens based on elapsed time
-                new_tokens = elapsed * (self.rate / 60.0)  # Convert per-minute to per-second
-                self.tokens = min(self.burst, self.tokens + new_tokens)
-                self.last_refill = now
+        with self.lock:
+            waiter = _Waiter(cond=threading.Condition(self.lock))
+            self.waiters.append(waiter)
+            try:
+                while True:
+                    wait = self._take(tokens) if self.waiters[0] is waiter else None
+                    if wait == 0:
+                        return True
+
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    waiter.cond.wait(wait)
+            finally:
+                self._leave(waiter)
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens if available without blocking. Never jumps the queue:
+        if callers are already waiting, this fails.
+
+        Args:
+            tokens: Number of tokens to acquire
+
+        Returns:
+            0 if tokens were taken, otherwise seconds until they might be available
+        """
+        with self.lock:
+            if self.waiters:
+                return (len(self.waiters) + tokens) / (self.rate / 60.0)
+            return self._take(tokens)
+
+    async def _take_async(self, tokens: int) -> float:
+        """
+        _take() for acquire_async(), called by the FIFO head on the event
+        loop. The local bucket is in-memory arithmetic, so it runs inline;
+        subclasses whose _take() does I/O must override this and hand the
+        I/O to the engine's I/O pool (async_engine.run_blocking).
+        """
+        with self.lock:
+            return self._take(tokens)
+
+    async def acquire_async(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        Async acquire for the asyncio engine. Shares the bucket and the FIFO
+        queue with acquire(); waits on the event loop instead of a thread and
+        never blocks it (see _take_async).
 
-                # Check if we have enough tokens
-                if self.tokens >= tokens:
-                    self.tokens -= tokens
+        Args:
+            tokens: Number of tokens to acquire (default: 1)
+            timeout: Maximum seconds to wait (None = wait indefinitely)
+
+        Returns:
+            True when tokens are acquired, False if the timeout expired first
+        """
+        import asyncio
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waiter = _Waiter(loop=asyncio.get_running_loop(), event=asyncio.Event())
+
+        with self.lock:
+            self.waiters.append(waiter)
+        try:
+            while True:
+                with self.lock:
+                    # Cleared before taking so a wake() after this point is not lost
+                    waiter.event.clear()
+                    head = self.waiters[0] is waiter
+                wait = await self._take_async(tokens) if head else None
+                if wait == 0:
                     return True
 
-            # Wait a bit before retrying
-            time.sleep(0.1)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self.lock:
+                self._leave(waiter)
+
+    def refund(self, tokens: float) -> None:
+        """
+        Return tokens to the bucket (capped at burst); a negative amount
+        charges extra, leaving the bucket in debt until it refills.
+
+        Args:
+            tokens: Tokens to return (negative to charge)
+        """
+        with self.lock:
+            self._take(0)
+            self.tokens = min(self.burst, self.tokens + tokens)
+            self._wake_head()
 
     def get_available_tokens(self) -> float:
         """Get current number of available tokens."""
@@ -55,3 +203,91 @@ class TokenBucketRateLimiter:
             elapsed = now - self.last_refill
             new_tokens = elapsed * (self.rate / 60.0)
             return min(self.burst, self.tokens + new_tokens)
+
+    def on_success(self) -> None:
+        """Feedback hook: a rate-limited call succeeded (no-op for a fixed rate)."""
+
+    def on_throttle(self) -> None:
+        """Feedback hook: a call was throttled (no-op for a fixed rate)."""
+
+    def stats(self) -> dict:
+        """Current rate for status reporting."""
+        return {'mode': 'fixed', 'rate_per_minute': self.rate}
+
+
+class AdaptiveRateLimiter(TokenBucketRateLimiter):
+    """
+    Token bucket whose rate is tuned by throttling feedback (AIMD):
+    +increase RPM per successful call, x decrease_factor on a throttle,
+    kept within [min_rate, max_rate].
+
+    Concurrent in-flight calls tend to be throttled together, so the rate is
+    cut at most once per cooldown_seconds.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: int,
+        min_rate: float = 10,
+        max_rate: float = 250,
+        increase: float = 0.5,
+        decrease_factor: float = 0.7,
+        cooldown_seconds: float = 5.0,
+        burst: int = None
+    ):
+        """
+        Args:
+            rate_per_minute: Starting rate
+            min_rate: Floor for the rate (RPM)
+            max_rate: Ceiling for the rate (RPM)
+            increase: RPM added per successful call
+            decrease_factor: Multiplier applied on throttling
+            cooldown_seconds: Minimum time between two decreases
+            burst: Bucket capacity (defaults to 10% of the starting rate)
+        """
+        super().__init__(rate_per_minute, burst or max(1, int(rate_per_minute / 10)))
+        self.rate = float(min(max(rate_per_minute, min_rate), max_rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.last_decrease = 0.0
+        self.counters = {'successes': 0, 'throttles': 0, 'decreases': 0}
+        self.min_rate_seen = self.rate
+        self.max_rate_seen = self.rate
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.counters['successes'] += 1
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self.max_rate_seen = max(self.max_rate_seen, self.rate)
+            # A faster refill shortens the head waiter's sleep
+            self._wake_head()
+
+    def on_throttle(self) -> None:
+        with self.lock:
+            self.counters['throttles'] += 1
+            now = time.time()
+            if now - self.last_decrease < self.cooldown_seconds:
+                return
+            self.last_decrease = now
+            self.counters['decreases'] += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.min_rate_seen = min(self.min_rate_seen, self.rate)
+            # Drop banked tokens so waiting callers feel the cut immediately,
+            # and have the head waiter recompute its (now longer) wait
+            self.tokens = 0.0
+            self.last_refill = now
+            self._wake_head()
+            print(f"[RateLimiter] Throttled - rate cut to {self.rate:.1f} RPM")
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(
+                self.counters,
+                mode='adaptive',
+                rate_per_minute=round(self.rate, 1),
+                min_rate_seen=round(self.min_rate_seen, 1),
+                max_rate_seen=round(self.max_rate_seen, 1)
+            )
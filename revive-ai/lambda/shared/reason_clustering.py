@@ -0,0 +1,326 @@
+"""
+Cancellation-reason clustering so near-identical reasons share one analysis.
+
+Reasons are normalized, split into character shingles and compared with
+MinHash signatures; locality-sensitive hashing (bands of the signature)
+finds candidate pairs, which are joined when their estimated Jaccard
+similarity reaches the threshold. Everything runs locally.
+
+ReasonClusters then lets the first customer of each cluster run the costly
+analysis while the other members wait for it. Members share only what is
+about the reason (category, confidence, recommendation and the reasoning
+itself); account figures, tool lookups and traces belong to the customer
+they were made for and are rebuilt from each member's own fields.
+"""
+import random
+import re
+import threading
+import zlib
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+_STOPWORDS = {'a', 'an', 'and', 'the', 'for', 'of', 'to', 'our', 'we', 'us', 'with', 'is', 'are', 'was', 'it', 'that'}
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_reason(reason: str) -> str:
+    """Lowercase, strip punctuation and filler words, collapse whitespace."""
+    words = re.sub(r'[^a-z0-9]+', ' ', (reason or '').lower()).split()
+    return ' '.join(word for word in words if word not in _STOPWORDS)
+
+
+def shingles(text: str, k: int = 4) -> set:
+    """Character k-shingles of normalized text (the whole text if shorter than k)."""
+    if len(text) <= k:
+        return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with num_perm universal hash permutations."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, items: set) -> List[int]:
+        hashes = [zlib.crc32(item.encode('utf-8')) for item in items] or [0]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.params
+        ]
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimated Jaccard similarity of the underlying shingle sets."""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def cluster_reasons(reasons: List[str], threshold: float = 0.6, num_perm: int = 64, bands: int = 16) -> List[List[int]]:
+    """
+    Group indexes of similar reasons.
+
+    Args:
+        reasons: Raw cancellation reasons
+        threshold: Minimum estimated Jaccard similarity to join two reasons
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must be divisible by bands)
+
+    Returns:
+        Clusters as lists of indexes (singletons included), in input order
+    """
+    normalized = [normalize_reason(reason) for reason in reasons]
+    hasher = MinHasher(num_perm)
+    rows = num_perm // bands
+
+    parent = list(range(len(reasons)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # Identical normalized reasons always cluster; empty reasons never do
+    first_seen: Dict[str, int] = {}
+    signatures: Dict[int, List[int]] = {}
+    for i, text in enumerate(normalized):
+        if not text:
+            continue
+        if text in first_seen:
+            union(first_seen[text], i)
+            continue
+        first_seen[text] = i
+        signatures[i] = hasher.signature(shingles(text))
+
+    buckets: Dict[tuple, List[int]] = {}
+    for i, signature in signatures.items():
+        for band in range(bands):
+            buckets.setdefault((band, tuple(signature[band * rows:(band + 1) * rows])), []).append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                pair = (members[x], members[y])
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if MinHasher.similarity(signatures[pair[0]], signatures[pair[1]]) >= threshold:
+                    union(*pair)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(reasons)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+# Result fields that describe the cancellation reason rather than the account
+REASON_FIELDS = ('category', 'confidence', 'insights', 'recommendation')
+
+# Identifying fields swapped in shared text, as whole tokens only
+IDENTITY_FIELDS = ('customer_id', 'company_name', 'cancellation_reason')
+
+# Sentences quoting account figures (revenue, CLV, tier, usage percentages)
+# from the source customer's lookups are not shared
+_CUSTOMER_FIGURE = re.compile(r'\$\s?\d|\d\s?%|\b(?:MRR|CLV|ARR)\b|lifetime value|\btier\b', re.IGNORECASE)
+_CONFIDENCE_LINE = re.compile(r'^\W*confidence\b', re.IGNORECASE)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def replace_token(text: str, old: str, new: str) -> str:
+    """Replace old with new where it stands as a whole token (C1 does not match inside C12)."""
+    pattern = r'(?<![A-Za-z0-9_])' + re.escape(old) + r'(?![A-Za-z0-9_])'
+    return re.sub(pattern, lambda _: new, text)
+
+
+def shared_reasoning(text: str) -> str:
+    """
+    The reason-level part of an analysis: headings and sentences quoting
+    account figures are dropped, the confidence line is kept.
+    """
+    lines = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            if lines and lines[-1]:
+                lines.append('')
+            continue
+        if _CONFIDENCE_LINE.match(stripped):
+            lines.append(stripped)
+            continue
+        kept = [sentence for sentence in _SENTENCE_END.split(stripped) if not _CUSTOMER_FIGURE.search(sentence)]
+        if kept:
+            lines.append(' '.join(kept))
+    return '\n'.join(lines).strip()
+
+
+def customer_details(customer: Dict[str, Any]) -> str:
+    """Account section for a member, from its own fields and CLV."""
+    from shared.customer_value import calculate_clv
+
+    try:
+        clv = calculate_clv(float(customer.get('mrr') or 0), customer.get('subscription_tier', 'growth'))
+    except (TypeError, ValueError):
+        clv = None
+    lines = [
+        f"## Churn Analysis: {customer.get('company_name', 'unknown')}",
+        '',
+        'Customer Details:',
+        f"- Customer ID: {customer.get('customer_id', 'unknown')}",
+        f"- Company: {customer.get('company_name', 'unknown')}",
+        f"- Subscription Tier: {customer.get('subscription_tier', 'unknown')}",
+        f"- MRR: ${customer.get('mrr', '0')}",
+    ]
+    if clv is not None:
+        lines.append(f"- Estimated CLV: ${clv['clv']:,.0f} ({clv['avg_tenure_months']}-month average tenure, {clv['priority']} priority)")
+    lines.extend([
+        f"- Churn Date: {customer.get('churn_date', 'unknown')}",
+        f"- Cancellation Reason: {customer.get('cancellation_reason', 'No reason provided')}",
+    ])
+    return '\n'.join(lines)
+
+
+def personalize_analysis(result: Dict[str, Any], source: Dict[str, Any], customer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A cluster member's churn analysis built from the source customer's.
+
+    Only reason-level content is shared: REASON_FIELDS and the reasoning
+    text with per-account sentences removed and the source's identifying
+    fields swapped for the member's. The account section (tier, MRR, CLV)
+    comes from the member's own fields; tool calls, traces and the
+    session made for the source are not carried over.
+
+    Args:
+        result: Source customer's ChurnAnalyzer result
+        source: Customer the analysis was made for
+        customer: Member receiving it
+
+    Returns:
+        ChurnAnalyzer-shaped result for customer
+    """
+    reasoning = shared_reasoning(result.get('analysis', ''))
+    for field in IDENTITY_FIELDS:
+        old, new = source.get(field), customer.get(field)
+        if old and new and old != new:
+            reasoning = replace_token(reasoning, str(old), str(new))
+
+    personalized = {field: result[field] for field in REASON_FIELDS if field in result}
+    personalized.update({
+        'analysis': f"{customer_details(customer)}\n\n{reasoning}" if reasoning else customer_details(customer),
+        'reasoning_traces': [],
+        'tools_used': [],
+        'tool_count': 0,
+        'session_id': None,
+        'reason_cluster_source': source.get('customer_id')
+    })
+    return personalized
+
+
+class ReasonClusters:
+    """
+    Per-run cluster assignment plus a memo of each cluster's analysis.
+
+    analyze() is safe to call from many threads; analyze_async() from the
+    asyncio engine. If a cluster's first analysis fails, members fall back
+    to analyzing themselves.
+    """
+
+    def __init__(self, customers: List[Dict[str, Any]], threshold: float = 0.6):
+        groups = cluster_reasons([c.get('cancellation_reason', '') for c in customers], threshold)
+        self.cluster_of: Dict[str, int] = {}
+        for cluster_id, members in enumerate(groups):
+            if len(members) > 1:
+                for i in members:
+                    self.cluster_of[str(customers[i].get('customer_id'))] = cluster_id
+
+        self.total_customers = len(customers)
+        self.cluster_count = len(groups)
+        self.multi_member_clusters = sum(1 for members in groups if len(members) > 1)
+
+        self.lock = threading.Lock()
+        self.memo: Dict[int, Future] = {}
+        self.fanned_out = 0
+
+    def _claim(self, customer: Dict[str, Any]) -> tuple:
+        """(future, leader) for this customer's cluster, or (None, True) if it has none."""
+        cluster_id = self.cluster_of.get(str(customer.get('customer_id')))
+        if cluster_id is None:
+            return None, True
+        with self.lock:
+            future = self.memo.get(cluster_id)
+            if future is None:
+                future = self.memo[cluster_id] = Future()
+                return future, True
+        return future, False
+
+    def _lead(self, future: Optional[Future], customer: Dict[str, Any], result: Any, error: Optional[Exception]) -> None:
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result((customer, result))
+
+    def _follow(self, outcome: tuple, customer: Dict[str, Any]) -> Dict[str, Any]:
+        source, result = outcome
+        with self.lock:
+            self.fanned_out += 1
+        print(f"[ReasonClusters] Reusing analysis of {source.get('customer_id')} for {customer.get('customer_id')}")
+        return personalize_analysis(result, source, customer)
+
+    def analyze(self, customer: Dict[str, Any], fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return fn(customer), or the cluster's shared result once available."""
+        future, leader = self._claim(customer)
+        if not leader:
+            try:
+                return self._follow(future.result(), customer)
+            except Exception:
+                return fn(customer)
+
+        try:
+            result = fn(customer)
+        except Exception as e:
+            self._lead(future, customer, None, e)
+            raise
+        self._lead(future, customer, result, None)
+        return result
+
+    async def analyze_async(self, customer: Dict[str, Any], fn) -> Dict[str, Any]:
+        """analyze() for the asyncio engine; fn is an async callable."""
+        import asyncio
+
+        future, leader = self._claim(customer)
+        if not leader:
+            try:
+                return self._follow(await asyncio.wrap_future(future), customer)
+            except Exception:
+                return await fn(customer)
+
+        try:
+            result = await fn(customer)
+        except Exception as e:
+            self._lead(future, customer, None, e)
+            raise
+        self._lead(future, customer, result, None)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Cluster counts and agent analyses saved so far."""
+        with self.lock:
+            return {
+                'customers': self.total_customers,
+                'clusters': self.cluster_count,
+                'multi_member_clusters': self.multi_member_clusters,
+                'api_calls_saved': self.fanned_out
+            }
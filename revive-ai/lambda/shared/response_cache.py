@@ -0,0 +1,237 @@
+"""
+Content-addressed cache for Bedrock InvokeModel responses.
+
+Two tiers: a bounded in-memory LRU (per Lambda container) and an optional
+persistent tier in S3 (via S3Helper) or a local directory. Entries are keyed
+by a hash of (model_id, system, user, temperature, max_tokens) and expire
+after a TTL. Opt-in:
+
+    BEDROCK_CACHE                   'on' to enable
+    BEDROCK_CACHE_MAX_ENTRIES       LRU size (default 1024)
+    BEDROCK_CACHE_TTL_SECONDS       Entry lifetime (default 86400)
+    BEDROCK_CACHE_MAX_TEMPERATURE   Only cache calls at or below this temperature (default 0.5)
+    BEDROCK_CACHE_BUCKET            S3 bucket for the persistent tier
+    BEDROCK_CACHE_DIR               Local directory for the persistent tier (if no bucket)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+def cache_key(
+    model_id: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    tool: Optional[Dict[str, Any]] = None
+) -> str:
+    """SHA-256 fingerprint of everything that determines the model output."""
+    request = {
+        'model_id': model_id,
+        'system': system_prompt,
+        'user': user_prompt,
+        'temperature': temperature,
+        'max_tokens': max_tokens
+    }
+    # Forced tool (structured output); omitted otherwise so text-mode keys are unchanged
+    if tool is not None:
+        request['tool'] = tool
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class FileJSONStore:
+    """Directory-backed store with the same get_json/put_json interface as S3Helper."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get_json(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put_json(self, key: str, data: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+
+class ResponseCache:
+    """Thread-safe two-tier response cache with TTL and hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400,
+        max_temperature: float = 0.5,
+        store=None,
+        prefix: str = 'cache/bedrock/'
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum entries held in the in-memory LRU tier
+            ttl_seconds: Entry lifetime in both tiers
+            max_temperature: Calls above this temperature bypass the cache
+            store: Optional persistent tier (S3Helper or FileJSONStore)
+            prefix: Key prefix inside the persistent store
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.max_temperature = max_temperature
+        self.store = store
+        self.prefix = prefix
+        self.entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'persistent_hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'stores': 0,
+            'evictions': 0,
+            'persistent_errors': 0
+        }
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Only near-deterministic calls are worth serving from cache."""
+        return temperature <= self.max_temperature
+
+    def _store_key(self, key: str) -> str:
+        return f"{self.prefix}{key[:2]}/{key}.json"
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get('created_at', 0) < self.ttl
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert into LRU tier. Caller must hold the lock."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _count(self, counter: str) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Cached {'text', 'usage'} dict or None on miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if self._fresh(entry):
+                    self.entries.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return entry['response']
+                del self.entries[key]
+                self.counters['expired'] += 1
+
+        if self.store is not None:
+            try:
+                entry = self.store.get_json(self._store_key(key))
+            except Exception as e:
+                print(f"[ResponseCache] Persistent tier read failed: {e}")
+                self._count('persistent_errors')
+                entry = None
+
+            if entry is not None:
+                if self._fresh(entry):
+                    with self.lock:
+                        self._remember(key, entry)
+                        self.counters['persistent_hits'] += 1
+                    return entry['response']
+                self._count('expired')
+
+        self._count('misses')
+        return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response in both tiers."""
+        entry = {'created_at': time.time(), 'response': response}
+
+        with self.lock:
+            self._remember(key, entry)
+            self.counters['stores'] += 1
+
+        if self.store is not None:
+            try:
+                self.store.put_json(self._store_key(key), entry)
+            except Exception as e:
+                print(f"[ResponseCache] Persistent tier write failed: {e}")
+                self._count('persistent_errors')
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry (e.g. a response that failed to parse) from both tiers."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+        if self.store is not None:
+            try:
+                # S3Helper has no delete; an expired tombstone has the same effect
+                self.store.put_json(self._store_key(key), {'created_at': 0, 'response': None})
+            except Exception as e:
+                print(f"[ResponseCache] Persistent tier invalidate failed: {e}")
+                self._count('persistent_errors')
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus derived hit rate and current LRU size."""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['size'] = len(self.entries)
+        lookups = stats['memory_hits'] + stats['persistent_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['persistent_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Process-wide cache configured from BEDROCK_CACHE_* env vars.
+
+    Returns:
+        Shared ResponseCache, or None when caching is disabled
+    """
+    global _cache
+    if os.environ.get('BEDROCK_CACHE', '').lower() not in ('on', 'true', '1'):
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            store = None
+            if os.environ.get('BEDROCK_CACHE_BUCKET'):
+                from .s3_helper import S3Helper
+                store = S3Helper(os.environ['BEDROCK_CACHE_BUCKET'])
+            elif os.environ.get('BEDROCK_CACHE_DIR'):
+                store = FileJSONStore(os.environ['BEDROCK_CACHE_DIR'])
+
+            _cache = ResponseCache(
+                max_entries=int(os.environ.get('BEDROCK_CACHE_MAX_ENTRIES', '1024')),
+                ttl_seconds=float(os.environ.get('BEDROCK_CACHE_TTL_SECONDS', '86400')),
+                max_temperature=float(os.environ.get('BEDROCK_CACHE_MAX_TEMPERATURE', '0.5')),
+                store=store
+            )
+        return _cache
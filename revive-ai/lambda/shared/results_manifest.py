@@ -0,0 +1,91 @@
+"""
+Per-upload manifest of customer results, so aggregation never LISTs S3.
+
+The processing path appends one entry per finished customer (after its
+result object is written, for successes). Each writer - the single
+async_process invocation, or each shard of a fanned-out upload - owns
+results/{upload_id}/manifest/{writer}.json; entries are only ever added
+and the object is rewritten together with the writer's progress, so
+there is never more than one writer per object.
+
+Readers get the writer IDs from status.json (its 'shards', or 'main') and
+fetch one object per writer: cost depends on the number of writers, not
+on how many customers the upload has.
+"""
+import threading
+from typing import Any, Dict, List, Optional
+
+MAIN_WRITER = 'main'
+
+
+def manifest_key(upload_id: str, writer: str = MAIN_WRITER) -> str:
+    return f"results/{upload_id}/manifest/{writer}.json"
+
+
+def manifest_entry(result: Dict[str, Any], key: Optional[str] = None, size: int = 0) -> Dict[str, Any]:
+    """
+    Manifest entry for one customer result.
+
+    Args:
+        result: format_customer_result() or failed_customer_result() document
+        key: S3 key the result was written to (None when nothing was written)
+        size: Bytes written
+    """
+    return {
+        'customer_id': result.get('customer_id'),
+        'key': key,
+        'size': size,
+        'status': result.get('status'),
+        'category': (result.get('analysis') or {}).get('category'),
+        'mrr': result.get('mrr')
+    }
+
+
+class ResultsManifest:
+    """Thread-safe, append-only entry list for one writer of an upload."""
+
+    def __init__(self, upload_id: str, writer: str = MAIN_WRITER):
+        self.upload_id = upload_id
+        self.writer = writer
+        self.key = manifest_key(upload_id, writer)
+        self.lock = threading.Lock()
+        self.entries: List[Dict[str, Any]] = []
+        self.written = 0
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.entries.append(entry)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+    def write(self, s3) -> bool:
+        """
+        Write the manifest if entries were appended since the last write.
+
+        Returns:
+            True if an object was written
+        """
+        with self.lock:
+            if len(self.entries) == self.written:
+                return False
+            entries = list(self.entries)
+        s3.put_json(self.key, {'upload_id': self.upload_id, 'writer': self.writer, 'entries': entries}, indent=None)
+        with self.lock:
+            self.written = max(self.written, len(entries))
+        return True
+
+
+def manifest_writers(status: Dict[str, Any]) -> List[str]:
+    """Writer IDs of an upload, from its status.json."""
+    return list(status.get('shards') or [MAIN_WRITER])
+
+
+def read_manifest(s3, upload_id: str, status: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """All manifest entries of an upload (one concurrent GET per writer, no LIST)."""
+    entries = []
+    for document in s3.get_many([manifest_key(upload_id, writer) for writer in manifest_writers(status)]):
+        if document:
+            entries.extend(document.get('entries', []))
+    return entries
@@ -0,0 +1,254 @@
+"""
+Retry policy shared by both Lambdas for Bedrock calls.
+
+Errors are classified by botocore error code rather than message text:
+throttles and transient service/connection failures are retried, anything
+else is raised at once. Waits use decorrelated jitter
+(sleep = min(cap, uniform(base, previous * 3))), and every retry has to be
+granted by the current RetryBudget, which caps retries at a fraction of
+calls, refuses waits that would run past the invocation deadline and keeps
+the retry metrics written to status.json.
+
+Configured with:
+    RETRY_BUDGET_RATIO             Max retries as a fraction of calls (0.5)
+    RETRY_BUDGET_MIN_RETRIES       Retries always allowed before the ratio applies (10)
+    RETRY_DEADLINE_MARGIN_SECONDS  Time kept free before the Lambda timeout (5)
+"""
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+
+THROTTLE = 'throttle'
+TRANSIENT = 'transient'
+FATAL = 'fatal'
+
+# Error codes compared case-insensitively: bedrock-agent-runtime uses
+# lowerCamelCase ('throttlingException'), bedrock-runtime PascalCase
+THROTTLE_CODES = {
+    'throttlingexception', 'throttling', 'toomanyrequestsexception',
+    'provisionedthroughputexceededexception', 'requestlimitexceeded', 'slowdown'
+}
+TRANSIENT_CODES = {
+    'serviceunavailableexception', 'serviceunavailable', 'internalserverexception', 'internalfailure',
+    'internalerror', 'modelnotreadyexception', 'modeltimeoutexception', 'requesttimeout',
+    'requesttimeoutexception', 'badgatewayexception', 'dependencyfailedexception'
+}
+
+RETRY_BUDGET_RATIO = float(os.environ.get('RETRY_BUDGET_RATIO', '0.5'))
+RETRY_BUDGET_MIN_RETRIES = int(os.environ.get('RETRY_BUDGET_MIN_RETRIES', '10'))
+RETRY_DEADLINE_MARGIN_SECONDS = float(os.environ.get('RETRY_DEADLINE_MARGIN_SECONDS', '5'))
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify an exception for retrying.
+
+    Returns:
+        THROTTLE, TRANSIENT or FATAL
+    """
+    if isinstance(error, ClientError):
+        code = str(error.response.get('Error', {}).get('Code', '')).lower()
+        if code in THROTTLE_CODES:
+            return THROTTLE
+        if code in TRANSIENT_CODES:
+            return TRANSIENT
+        status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        if status == 429:
+            return THROTTLE
+        if status in (500, 502, 503, 504):
+            return TRANSIENT
+        return FATAL
+    if isinstance(error, (BotoConnectionError, HTTPClientError)):
+        return TRANSIENT
+    return FATAL
+
+
+def is_throttle(error: Exception) -> bool:
+    return classify_error(error) == THROTTLE
+
+
+class RetryBudget:
+    """
+    Retry allowance and metrics for one upload (or one Lambda invocation).
+
+    A retry is granted while retries <= min_retries + ratio * calls and the
+    wait still ends before the deadline.
+    """
+
+    def __init__(self, ratio: float = 0.5, min_retries: int = 10, deadline: Optional[float] = None):
+        """
+        Args:
+            ratio: Max retries as a fraction of first attempts
+            min_retries: Retries always allowed, so small uploads can still retry
+            deadline: time.time() after which no retry wait may end (None = no deadline)
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.counters = {
+            'calls': 0,
+            'retries': 0,
+            'throttle_retries': 0,
+            'transient_retries': 0,
+            'denied_budget': 0,
+            'denied_deadline': 0,
+            'gave_up': 0,
+            'fatal_errors': 0,
+            'backoff_seconds': 0.0
+        }
+        self.by_operation: Dict[str, int] = {}
+
+    def record_call(self) -> None:
+        with self.lock:
+            self.counters['calls'] += 1
+
+    def record_failure(self, kind: str) -> None:
+        """A call failed for good: a fatal error, or a retryable one out of attempts/budget/time."""
+        with self.lock:
+            self.counters['fatal_errors' if kind == FATAL else 'gave_up'] += 1
+
+    def allow_retry(self, operation: str, kind: str, delay: float) -> bool:
+        """Grant (and count) one retry after `delay` seconds, or refuse it."""
+        with self.lock:
+            if self.deadline is not None and time.time() + delay >= self.deadline:
+                self.counters['denied_deadline'] += 1
+                return False
+            if self.counters['retries'] + 1 > self.min_retries + self.ratio * self.counters['calls']:
+                self.counters['denied_budget'] += 1
+                return False
+            self.counters['retries'] += 1
+            self.counters[f'{kind}_retries'] += 1
+            self.counters['backoff_seconds'] += delay
+            self.by_operation[operation] = self.by_operation.get(operation, 0) + 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Retry metrics for status.json."""
+        with self.lock:
+            calls = self.counters['calls']
+            return dict(
+                self.counters,
+                backoff_seconds=round(self.counters['backoff_seconds'], 2),
+                retry_ratio=round(self.counters['retries'] / calls, 3) if calls else 0.0,
+                by_operation=dict(self.by_operation)
+            )
+
+
+def new_retry_budget(context=None) -> RetryBudget:
+    """
+    RetryBudget from RETRY_BUDGET_* env vars, with its deadline taken from
+    the Lambda context's remaining time (minus RETRY_DEADLINE_MARGIN_SECONDS).
+    """
+    deadline = None
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        deadline = time.time() + context.get_remaining_time_in_millis() / 1000.0 - RETRY_DEADLINE_MARGIN_SECONDS
+    return RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_RETRIES, deadline)
+
+
+# Budget retries are charged to. Set per upload/invocation by the Lambda
+# handler; the default one just collects metrics with no deadline.
+_retry_budget = new_retry_budget()
+
+
+def set_retry_budget(budget: RetryBudget) -> None:
+    global _retry_budget
+    _retry_budget = budget
+
+
+def get_retry_budget() -> RetryBudget:
+    return _retry_budget
+
+
+class RetryPolicy:
+    """Retry loop with error classification, decorrelated jitter and the shared budget."""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 20.0):
+        """
+        Args:
+            max_attempts: Attempts including the first
+            base_delay: Minimum wait between attempts (seconds)
+            max_delay: Cap on any single wait (seconds)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: uniform(base, previous * 3), capped."""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous) * 3))
+
+    def _retry_delay(self, error: Exception, operation: str, attempt: int, max_attempts: int,
+                     previous: float, budget: RetryBudget, label: str) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to re-raise."""
+        kind = classify_error(error)
+        if kind == FATAL:
+            budget.record_failure(kind)
+            return None
+        if attempt >= max_attempts:
+            print(f"[Retry] Max retries reached on {operation}{label}")
+            budget.record_failure(kind)
+            return None
+
+        delay = self.next_delay(previous)
+        if not budget.allow_retry(operation, kind, delay):
+            print(f"[Retry] Retry budget or deadline refused retry of {operation}{label}")
+            budget.record_failure(kind)
+            return None
+
+        print(f"[Retry] {kind.capitalize()} on {operation}, waiting {delay:.2f}s before retry "
+              f"{attempt}/{max_attempts - 1}{label}")
+        return delay
+
+    def call(self, fn: Callable[[], Any], operation: str, max_attempts: Optional[int] = None, label: str = '') -> Any:
+        """
+        Run fn() until it succeeds, raises a non-retryable error, runs out of
+        attempts or is refused a retry by the budget.
+
+        Args:
+            fn: One attempt; raise to fail it
+            operation: Name for logs and metrics (e.g. 'InvokeModel')
+            max_attempts: Override the policy's attempt count
+            label: Extra log context (e.g. ' (customer: C001)')
+        """
+        budget = get_retry_budget()
+        budget.record_call()
+        max_attempts = max_attempts or self.max_attempts
+        delay = self.base_delay
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._retry_delay(e, operation, attempt, max_attempts, delay, budget, label)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+    async def call_async(self, fn, operation: str, max_attempts: Optional[int] = None, label: str = '') -> Any:
+        """call() for the asyncio engine; fn is an async callable and waits are awaited."""
+        import asyncio
+
+        budget = get_retry_budget()
+        budget.record_call()
+        max_attempts = max_attempts or self.max_attempts
+        delay = self.base_delay
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._retry_delay(e, operation, attempt, max_attempts, delay, budget, label)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+
+# InvokeModel: 1s floor (was 2^n + jitter)
+MODEL_RETRY_POLICY = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=20.0)
+# InvokeAgent: 3s floor, agents spend several quota units per call (was 3 * 2^n + jitter)
+AGENT_RETRY_POLICY = RetryPolicy(max_attempts=5, base_delay=3.0, max_delay=60.0)
@@ -1,16 +1,46 @@
 """S3 helper functions."""
 import json
-import boto3
-from typing import Dict, Any, Optional
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional
 from botocore.exceptions import ClientError
 
+from .client_registry import get_client
+
+
+class WriteBehindError(Exception):
+    """One or more write-behind puts failed; `failures` maps key -> error."""
+
+    def __init__(self, failures: Dict[str, str]):
+        super().__init__(f"{len(failures)} write-behind put(s) failed: {', '.join(sorted(failures)[:5])}")
+        self.failures = failures
+
+
+class BulkGetError(Exception):
+    """
+    One or more get_many() fetches failed; `failures` maps key -> error and
+    `results` holds everything else (None at the failed positions).
+    """
+
+    def __init__(self, failures: Dict[str, str], results: List[Optional[Any]]):
+        super().__init__(f"{len(failures)} of {len(results)} get(s) failed: {', '.join(sorted(failures)[:5])}")
+        self.failures = failures
+        self.results = results
+
 
 class S3Helper:
     """Helper class for S3 operations."""
 
     def __init__(self, bucket_name: str, region: str = "us-east-1"):
         self.bucket_name = bucket_name
-        self.s3_client = boto3.client('s3', region_name=region)
+        self.s3_client = get_client('s3', region)
+        # Write-behind state (see start_write_behind)
+        self._write_queue: Optional[queue.Queue] = None
+        self._writers: list = []
+        self._write_lock = threading.Lock()
+        self._write_errors: Dict[str, str] = {}
+        self._write_stats = {'queued': 0, 'written': 0, 'failed': 0, 'max_queue_depth': 0}
 
     def get_json(self, key: str) -> Optional[Dict[str, Any]]:
         """
@@ -28,15 +58,176 @@ class S3Helper:
                 return None
             raise
 
-    def put_json(self, key: str, data: Dict[str, Any]) -> None:
-        """Put JSON object to S3."""
-        content = json.dumps(data, indent=2)
+    def get_many(self, keys: List[str], concurrency: int = 16) -> List[Optional[Any]]:
+        """
+        Get many JSON objects at once through a bounded thread pool.
+
+        Every key is fetched independently: a missing object is None, like
+        get_json(), and a failed fetch doesn't stop the others.
+
+        Args:
+            keys: Object keys
+            concurrency: Max fetches in flight (keep within the client's connection pool)
+
+        Returns:
+            Parsed objects in the order of `keys`
+
+        Raises:
+            BulkGetError: If any fetch failed (carries the other results)
+        """
+        results: List[Optional[Any]] = [None] * len(keys)
+        failures: Dict[str, str] = {}
+        if not keys:
+            return results
+
+        def fetch(index: int) -> None:
+            try:
+                results[index] = self.get_json(keys[index])
+            except Exception as e:
+                failures[keys[index]] = str(e)
+
+        workers = max(1, min(concurrency, len(keys)))
+        if workers == 1:
+            for index in range(len(keys)):
+                fetch(index)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='s3-get') as pool:
+                list(pool.map(fetch, range(len(keys))))
+
+        if failures:
+            raise BulkGetError(failures, results)
+        return results
+
+    def put_json(self, key: str, data: Dict[str, Any], indent: Optional[int] = 2) -> int:
+        """
+        Put JSON object to S3 (indent=None writes compact JSON).
+
+        Returns:
+            Bytes written
+        """
+        body = json.dumps(data, indent=indent).encode('utf-8')
         self.s3_client.put_object(
             Bucket=self.bucket_name,
             Key=key,
-            Body=content.encode('utf-8'),
+            Body=body,
             ContentType='application/json'
         )
+        return len(body)
+
+    async def get_json_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """Async get_json for the asyncio engine (runs on the I/O pool)."""
+        from .async_engine import run_blocking
+        return await run_blocking(self.get_json, key)
+
+    async def put_json_async(self, key: str, data: Dict[str, Any]) -> None:
+        """Async put_json for the asyncio engine (runs on the I/O pool)."""
+        from .async_engine import run_blocking
+        await run_blocking(self.put_json, key, data)
+
+    def start_write_behind(self, workers: int = 4, queue_size: int = 100) -> None:
+        """
+        Route put_json_behind() through a bounded queue drained by `workers`
+        uploader threads, so callers don't wait on S3. put_json_behind()
+        only blocks while the queue is full.
+
+        Args:
+            workers: Uploader threads
+            queue_size: Max puts waiting for an uploader
+        """
+        if self._write_queue is not None:
+            return
+        self._write_queue = queue.Queue(maxsize=queue_size)
+        self._writers = [
+            threading.Thread(target=self._drain_writes, name=f"s3-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for writer in self._writers:
+            writer.start()
+
+    def _drain_writes(self) -> None:
+        """Uploader thread: put queued objects until the None sentinel."""
+        write_queue = self._write_queue
+        while True:
+            item = write_queue.get()
+            try:
+                if item is None:
+                    return
+                key, data, on_written = item
+                try:
+                    # Serialized here, off the caller's path; compact since nobody reads these by hand
+                    size = self.put_json(key, data, indent=None)
+                    with self._write_lock:
+                        self._write_stats['written'] += 1
+                    if on_written is not None:
+                        on_written(size)
+                except Exception as e:
+                    print(f"[S3] Write-behind put failed for {key}: {e}")
+                    with self._write_lock:
+                        self._write_stats['failed'] += 1
+                        self._write_errors[key] = str(e)
+            finally:
+                write_queue.task_done()
+
+    def put_json_behind(self, key: str, data: Dict[str, Any],
+                        on_written: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Queue a put_json() for the uploader threads (a plain put_json() when
+        write-behind isn't started). `data` must not be modified afterwards.
+
+        Args:
+            key: S3 key
+            data: JSON document
+            on_written: Called with the bytes written once the put succeeds
+        """
+        if self._write_queue is None:
+            size = self.put_json(key, data)
+            if on_written is not None:
+                on_written(size)
+            return
+        self._write_queue.put((key, data, on_written))
+        with self._write_lock:
+            self._write_stats['queued'] += 1
+            self._write_stats['max_queue_depth'] = max(self._write_stats['max_queue_depth'], self._write_queue.qsize())
+
+    async def put_json_behind_async(self, key: str, data: Dict[str, Any],
+                                    on_written: Optional[Callable[[int], None]] = None) -> None:
+        """Async put_json_behind for the asyncio engine (a full queue blocks an I/O pool thread, not the loop)."""
+        from .async_engine import run_blocking
+        await run_blocking(self.put_json_behind, key, data, on_written)
+
+    def flush(self) -> None:
+        """
+        Wait until every queued put has been attempted.
+
+        Raises:
+            WriteBehindError: puts that failed since the last flush
+        """
+        if self._write_queue is None:
+            return
+        self._write_queue.join()
+        with self._write_lock:
+            failures, self._write_errors = self._write_errors, {}
+        if failures:
+            raise WriteBehindError(failures)
+
+    def close(self) -> None:
+        """Flush (raising WriteBehindError on failed puts) and stop the uploader threads."""
+        if self._write_queue is None:
+            return
+        try:
+            self.flush()
+        finally:
+            for _ in self._writers:
+                self._write_queue.put(None)
+            for writer in self._writers:
+                writer.join()
+            self._write_queue = None
+            self._writers = []
+
+    def write_behind_stats(self) -> Dict[str, int]:
+        """Counts of queued, written and failed write-behind puts."""
+        with self._write_lock:
+            return dict(self._write_stats)
 
     def get_text(self, key: str) -> Optional[str]:
         """Get text file from S3."""
@@ -66,15 +257,13 @@ class S3Helper:
             return False
 
     def list_objects(self, prefix: str) -> list[str]:
-        """List object keys with given prefix."""
+        """List object keys with given prefix (every page, not just the first 1000 keys)."""
+        keys = []
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
-            if 'Contents' not in response:
-                return []
-            return [obj['Key'] for obj in response['Contents']]
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                keys.extend(obj['Key'] for obj in page.get('Contents', []))
+            return keys
         except ClientError:
             return []
 
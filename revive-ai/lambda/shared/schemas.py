@@ -7,6 +7,43 @@ VALID_TIERS = ['starter', 'growth', 'enterprise']
 VALID_CATEGORIES = ['pricing', 'features', 'onboarding', 'competition', 'business_closure', 'unclear']
 
 
+# JSON schemas for structured output (forced tool use). They mirror
+# validate_analysis / validate_campaign so typed output passes validation.
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'category': {'type': 'string', 'enum': VALID_CATEGORIES},
+        'confidence': {'type': 'integer', 'minimum': 0, 'maximum': 100},
+        'insights': {'type': 'array', 'items': {'type': 'string'}, 'minItems': 3, 'maxItems': 5},
+        'recommendation': {'type': 'string'}
+    },
+    'required': ['category', 'confidence', 'insights', 'recommendation']
+}
+
+CAMPAIGN_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'summary': {'type': 'string', 'minLength': 10, 'maxLength': 300},
+        'emails': {
+            'type': 'array',
+            'minItems': 3,
+            'maxItems': 3,
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'number': {'type': 'integer', 'minimum': 1, 'maximum': 3},
+                    'subject': {'type': 'string', 'maxLength': 60},
+                    'body': {'type': 'string'},
+                    'cta': {'type': 'string', 'minLength': 1, 'maxLength': 50}
+                },
+                'required': ['number', 'subject', 'body', 'cta']
+            }
+        }
+    },
+    'required': ['summary', 'emails']
+}
+
+
 def validate_email(email: str) -> bool:
     """Validate email format."""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
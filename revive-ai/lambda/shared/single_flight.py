@@ -0,0 +1,95 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+When several threads issue the same request at the same time, only the
+first (the leader) calls through; the rest wait and share its result or
+exception. Nothing is kept after the call finishes, so this is not a cache.
+
+    BEDROCK_SINGLE_FLIGHT   'off' to disable (default on)
+"""
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """One in-flight request and its eventual outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-safe request coalescer keyed by request fingerprint."""
+
+    def __init__(self):
+        self.calls: Dict[str, _Call] = {}
+        self.lock = threading.Lock()
+        self.counters = {
+            'leaders': 0,
+            'coalesced': 0,
+            'shared_errors': 0
+        }
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple:
+        """
+        Run fn once per key among concurrent callers.
+
+        Args:
+            key: Request fingerprint
+            fn: Zero-argument callable performing the request
+
+        Returns:
+            (result, coalesced) - coalesced is True if this caller waited
+            on another thread's call instead of running fn
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.counters['coalesced'] += 1
+                leader = False
+            else:
+                call = _Call()
+                self.calls[key] = call
+                self.counters['leaders'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+                if call.error is not None and call.waiters:
+                    self.counters['shared_errors'] += call.waiters
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Leader/coalesced counters and current in-flight count."""
+        with self.lock:
+            stats = dict(self.counters)
+            stats['in_flight'] = len(self.calls)
+        return stats
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Process-wide coalescer, or None when BEDROCK_SINGLE_FLIGHT=off."""
+    if os.environ.get('BEDROCK_SINGLE_FLIGHT', 'on').lower() in ('off', 'false', '0'):
+        return None
+    return _single_flight
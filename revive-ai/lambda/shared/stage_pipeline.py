@@ -0,0 +1,166 @@
+"""
+Stage-decoupled pipeline: each stage has its own worker pool and optional
+rate budget, connected to the next stage by a bounded queue. A full queue
+blocks the upstream workers (backpressure), so a slow stage never lets work
+pile up unbounded in memory.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_STOP = object()
+
+
+class Stage:
+    """One step of the pipeline."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+        workers: int = 1,
+        rate_limiter=None,
+        queue_size: int = 20
+    ):
+        """
+        Args:
+            name: Stage name used in stats
+            fn: Takes the item context dict, returns it (updated)
+            workers: Threads serving this stage
+            rate_limiter: Optional TokenBucketRateLimiter acquired once per item
+            queue_size: Capacity of this stage's input queue
+        """
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.rate_limiter = rate_limiter
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=max(1, queue_size))
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+
+    def put(self, envelope) -> None:
+        """Blocking put; records peak queue depth."""
+        self.queue.put(envelope)
+        depth = self.queue.qsize()
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'processed': self.processed,
+                'failed': self.failed,
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_depth,
+                'busy_seconds': round(self.busy_seconds, 2),
+                'throughput_per_minute': round(self.processed / elapsed * 60, 1) if elapsed > 0 else 0.0
+            }
+
+
+class StagePipeline:
+    """Runs items through a chain of Stages with bounded queues in between."""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.output: 'queue.Queue' = queue.Queue()
+        self.started_at: Optional[float] = None
+
+    def _worker(self, index: int, finished: List[int], finished_lock: threading.Lock) -> None:
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            envelope = stage.queue.get()
+            if envelope is _STOP:
+                break
+
+            ctx, error = envelope
+            if error is None:
+                try:
+                    if stage.rate_limiter is not None:
+                        stage.rate_limiter.acquire(tokens=1)
+                    start = time.perf_counter()
+                    try:
+                        ctx = stage.fn(ctx)
+                    finally:
+                        with stage.lock:
+                            stage.busy_seconds += time.perf_counter() - start
+                    with stage.lock:
+                        stage.processed += 1
+                except Exception as e:
+                    error = e
+                    ctx['failed_stage'] = stage.name
+                    with stage.lock:
+                        stage.failed += 1
+
+            # Failed items skip the remaining stages
+            if downstream is not None and error is None:
+                downstream.put((ctx, None))
+            else:
+                self.output.put((ctx, error))
+
+        # Last worker out closes the next stage (or the output)
+        with finished_lock:
+            finished[index] += 1
+            last = finished[index] == stage.workers
+        if last:
+            if downstream is not None:
+                for _ in range(downstream.workers):
+                    downstream.put(_STOP)
+            else:
+                self.output.put(_STOP)
+
+    def run(self, items: Iterable[Dict[str, Any]], on_result: Callable[[Dict[str, Any], Optional[Exception]], None]) -> None:
+        """
+        Push items through every stage, calling on_result(ctx, error) in the
+        caller's thread as each item leaves the pipeline.
+        """
+        self.started_at = time.perf_counter()
+        finished = [0] * len(self.stages)
+        finished_lock = threading.Lock()
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(index, finished, finished_lock),
+                    name=f"{stage.name}-{n}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        # Feed from a separate thread so results are consumed while input is blocked on backpressure
+        first = self.stages[0]
+
+        def feed():
+            for item in items:
+                item.setdefault('pipeline_started', time.perf_counter())
+                first.put((item, None))
+            for _ in range(first.workers):
+                first.put(_STOP)
+
+        feeder = threading.Thread(target=feed, name='pipeline-feed', daemon=True)
+        feeder.start()
+
+        while True:
+            envelope = self.output.get()
+            if envelope is _STOP:
+                break
+            ctx, error = envelope
+            on_result(ctx, error)
+
+        feeder.join()
+        for thread in threads:
+            thread.join()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage throughput, failures and queue depth."""
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        return {stage.name: stage.stats(elapsed) for stage in self.stages}
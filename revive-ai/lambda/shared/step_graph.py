@@ -0,0 +1,191 @@
+"""
+Small dependency-graph executor for per-customer workflows.
+
+Steps declare the names of the steps whose results they take as inputs.
+Every step whose inputs are ready is started at once, so independent LLM
+calls (e.g. campaign generation and key-findings extraction, which both only
+need the churn analysis) overlap instead of running back to back.
+
+The calling thread always runs one ready step itself and hands the others
+to a shared pool, so a graph never deadlocks waiting on a saturated pool.
+
+    STEP_GRAPH_THREADS    Size of the shared step pool (default 32)
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_step_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for concurrently ready steps (created on first use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get('STEP_GRAPH_THREADS', '32')),
+                thread_name_prefix='step'
+            )
+        return _executor
+
+
+class StepGraph:
+    """
+    A set of named steps with declared inputs.
+
+    Each step function is called with its inputs as keyword arguments:
+
+        graph = StepGraph()
+        graph.add('analysis', lambda: analyze(customer))
+        graph.add('campaign', lambda analysis: generate(analysis), inputs=['analysis'])
+        results = graph.run()
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], inputs: List[str] = None) -> 'StepGraph':
+        """
+        Declare a step. Inputs must already be declared and names can't be
+        redeclared, so the graph can never contain a cycle.
+
+        Args:
+            name: Step name (also the key of its result)
+            fn: Callable taking one keyword argument per input
+            inputs: Names of steps that must finish first
+
+        Returns:
+            self, for chaining
+
+        Raises:
+            ValueError: name is taken, or an input is not declared yet
+        """
+        inputs = list(inputs or [])
+        if name in self.steps:
+            raise ValueError(f"Step '{name}' is already declared")
+        for dependency in inputs:
+            if dependency not in self.steps:
+                raise ValueError(f"Step '{name}' depends on undeclared step '{dependency}'")
+        self.steps[name] = {'fn': fn, 'inputs': inputs}
+        return self
+
+    def _ready(self, results: Dict[str, Any], started: set) -> List[str]:
+        return [
+            name for name, step in self.steps.items()
+            if name not in started and all(dependency in results for dependency in step['inputs'])
+        ]
+
+    def _call(self, name: str, results: Dict[str, Any], origin: float) -> Any:
+        step = self.steps[name]
+        start = time.perf_counter()
+        try:
+            return step['fn'](**{dependency: results[dependency] for dependency in step['inputs']})
+        finally:
+            end = time.perf_counter()
+            self.timings[name] = {
+                'start_offset': round(start - origin, 3),
+                'duration': round(end - start, 3)
+            }
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every step, starting each as soon as its inputs are available.
+
+        Returns:
+            Dict of step name -> result
+
+        Raises:
+            The first exception raised by any step (steps already running
+            are allowed to finish; steps not yet started are skipped)
+        """
+        origin = time.perf_counter()
+        results: Dict[str, Any] = {}
+        started: set = set()
+        pending = {}
+        executor = get_step_executor()
+
+        while len(results) < len(self.steps):
+            ready = self._ready(results, started)
+            started.update(ready)
+
+            # Offload all but one ready step; run the last one on this thread
+            for name in ready[:-1]:
+                pending[executor.submit(self._call, name, results, origin)] = name
+            if ready:
+                name = ready[-1]
+                try:
+                    results[name] = self._call(name, results, origin)
+                except Exception:
+                    wait(pending)
+                    raise
+                continue
+
+            if not pending:
+                raise RuntimeError(f"Unsatisfiable steps: {sorted(set(self.steps) - started)}")
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    wait(pending)
+                    raise error
+                results[name] = future.result()
+
+        return results
+
+    async def run_async(self) -> Dict[str, Any]:
+        """
+        run() for the asyncio engine. Step functions must be coroutine
+        functions (or return awaitables); plain values are accepted as-is.
+        """
+        origin = time.perf_counter()
+        results: Dict[str, Any] = {}
+        started: set = set()
+        pending: Dict[asyncio.Task, str] = {}
+
+        async def call(name: str) -> Any:
+            step = self.steps[name]
+            start = time.perf_counter()
+            try:
+                value = step['fn'](**{dependency: results[dependency] for dependency in step['inputs']})
+                if asyncio.iscoroutine(value) or isinstance(value, asyncio.Future):
+                    value = await value
+                return value
+            finally:
+                end = time.perf_counter()
+                self.timings[name] = {
+                    'start_offset': round(start - origin, 3),
+                    'duration': round(end - start, 3)
+                }
+
+        while len(results) < len(self.steps):
+            for name in self._ready(results, started):
+                started.add(name)
+                pending[asyncio.ensure_future(call(name))] = name
+
+            if not pending:
+                raise RuntimeError(f"Unsatisfiable steps: {sorted(set(self.steps) - started)}")
+
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                if task.exception() is not None:
+                    if pending:
+                        await asyncio.wait(pending)
+                    raise task.exception()
+                results[name] = task.result()
+
+        return results
+
+    def critical_path_seconds(self) -> float:
+        """Wall time from the first step's start to the last step's end."""
+        if not self.timings:
+            return 0.0
+        return round(max(t['start_offset'] + t['duration'] for t in self.timings.values()), 3)
@@ -0,0 +1,42 @@
+"""
+Warmup support for Lambda cold starts.
+
+Heavy modules (boto3/botocore, the agents) and AWS clients are created on
+first use, so a cold container only pays for what its route needs. A
+warmup event ({"warmup": true}, e.g. from an EventBridge schedule or right
+after a deploy) builds them ahead of real traffic without doing any work.
+"""
+import importlib
+import time
+from typing import Callable, Dict
+
+
+def warm_up(components: Dict[str, Callable[[], object]]) -> Dict[str, float]:
+    """
+    Initialize each component once and time it.
+
+    A component that fails to initialize is logged and skipped; warmup must
+    never fail the invocation.
+
+    Args:
+        components: {name: zero-argument initializer}
+
+    Returns:
+        {name: seconds spent} (-1 for components that failed)
+    """
+    timings = {}
+    for name, init in components.items():
+        start = time.perf_counter()
+        try:
+            init()
+            timings[name] = round(time.perf_counter() - start, 4)
+        except Exception as e:
+            print(f"[Warmup] Could not initialize {name}: {e}")
+            timings[name] = -1
+    print(f"[Warmup] Initialized in {sum(t for t in timings.values() if t > 0):.3f}s: {timings}")
+    return timings
+
+
+def import_module(name: str) -> Callable[[], object]:
+    """Initializer that imports a module (for warm_up components)."""
+    return lambda: importlib.import_module(name)
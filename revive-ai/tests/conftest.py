@@ -0,0 +1,86 @@
+"""Unit tests for lambda/shared. Run from the repo root: python -m pytest tests"""
+import copy
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'lambda'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from local_aws import InMemoryS3Client, local_s3_helper  # noqa: E402
+
+
+class MemoryS3:
+    """The S3Helper JSON calls the shared components use, over a dict."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = []
+        self.fail_puts = 0
+        self.lock = threading.Lock()
+
+    def put_json(self, key, data, indent=2):
+        with self.lock:
+            if self.fail_puts:
+                self.fail_puts -= 1
+                raise IOError(f"put failed: {key}")
+            self.objects[key] = copy.deepcopy(data)
+            self.puts.append(key)
+        return 0
+
+    def get_json(self, key):
+        with self.lock:
+            return copy.deepcopy(self.objects.get(key))
+
+    def get_many(self, keys, concurrency=16):
+        return [self.get_json(key) for key in keys]
+
+
+@pytest.fixture
+def s3():
+    return MemoryS3()
+
+
+class FlakyS3Client(InMemoryS3Client):
+    """InMemoryS3Client that fails calls for chosen keys and tracks concurrent calls."""
+
+    def __init__(self, latency_ms=0):
+        super().__init__(latency_ms)
+        self.fail_keys = {}
+        self.active = 0
+        self.peak = 0
+
+    def _call(self, operation, Key, fn):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            error = self.fail_keys.get(Key)
+            if error is not None:
+                self._tick(operation)
+                raise error
+            return fn()
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        return self._call('put_object', Key, lambda: super(FlakyS3Client, self).put_object(
+            Bucket=Bucket, Key=Key, Body=Body, **kwargs))
+
+    def get_object(self, Bucket, Key, **kwargs):
+        return self._call('get_object', Key, lambda: super(FlakyS3Client, self).get_object(
+            Bucket=Bucket, Key=Key, **kwargs))
+
+
+@pytest.fixture
+def s3_helper():
+    """A real S3Helper over a FlakyS3Client; closed (write-behind stopped) afterwards."""
+    helper = local_s3_helper()
+    helper.s3_client = FlakyS3Client()
+    yield helper
+    helper.s3_client.fail_keys.clear()
+    helper.close()
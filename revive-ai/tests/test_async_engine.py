@@ -0,0 +1,80 @@
+"""Rate limiter acquisition from the asyncio engine never blocks the loop."""
+import asyncio
+import time
+
+from shared.async_engine import acquire_limiter
+from shared.rate_limiter import TokenBucketRateLimiter
+
+
+async def heartbeat(stop, interval=0.005):
+    """Longest gap between ticks of a coroutine sharing the loop."""
+    longest = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        longest = max(longest, now - last - interval)
+        last = now
+    return longest
+
+
+def run_with_heartbeat(coro_fn):
+    async def main():
+        stop = asyncio.Event()
+        beat = asyncio.ensure_future(heartbeat(stop))
+        result = await coro_fn()
+        stop.set()
+        return result, await beat
+
+    return asyncio.run(main())
+
+
+def test_token_bucket_waits_on_the_loop():
+    limiter = TokenBucketRateLimiter(rate_per_minute=600, burst=1)
+
+    async def acquire_three():
+        return [await acquire_limiter(limiter) for _ in range(3)]
+
+    start = time.perf_counter()
+    acquired, stall = run_with_heartbeat(acquire_three)
+    assert acquired == [True, True, True]
+    assert time.perf_counter() - start >= 0.15
+    assert stall < 0.05
+
+
+def test_blocking_limiters_are_acquired_on_the_io_pool():
+    class BlockingLimiter:
+        def __init__(self):
+            self.acquired = []
+
+        def acquire(self, tokens=1):
+            time.sleep(0.1)
+            self.acquired.append(tokens)
+            return True
+
+    limiter = BlockingLimiter()
+
+    async def acquire_once():
+        return await acquire_limiter(limiter, tokens=2)
+
+    acquired, stall = run_with_heartbeat(acquire_once)
+    assert acquired is True
+    assert limiter.acquired == [2]
+    assert stall < 0.05
+
+
+def test_take_async_is_the_only_take_on_the_loop():
+    class IOLimiter(TokenBucketRateLimiter):
+        """Pretends _take() does I/O; _take_async() must be used instead."""
+        async_takes = 0
+
+        def _take(self, tokens):
+            raise AssertionError('blocking _take() called from acquire_async()')
+
+        async def _take_async(self, tokens):
+            self.async_takes += 1
+            return 0
+
+    limiter = IOLimiter(rate_per_minute=60)
+    assert asyncio.run(limiter.acquire_async())
+    assert limiter.async_takes == 1
@@ -0,0 +1,185 @@
+"""State machine of ThrottleCircuitBreaker: closed -> open -> half-open rounds."""
+import threading
+import time
+
+from shared.circuit_breaker import CLOSED, HALF_OPEN, OPEN, ThrottleCircuitBreaker
+
+COOLDOWN = 0.05
+
+
+def make_breaker(**kwargs):
+    options = dict(threshold=0.5, window_seconds=10, min_calls=4, cooldown_seconds=COOLDOWN,
+                   max_cooldown_seconds=1, probes_to_close=3)
+    options.update(kwargs)
+    return ThrottleCircuitBreaker(**options)
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        breaker.on_throttle()
+    assert breaker.state == OPEN
+
+
+def half_open(breaker):
+    """Trip (unless already open), wait out the cool-down and return the first probe's token."""
+    if breaker.state != OPEN:
+        trip(breaker)
+    time.sleep(breaker.open_until - time.time() + 0.005)
+    probe = breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    return probe
+
+
+def test_closed_calls_are_not_probes():
+    breaker = make_breaker()
+    assert breaker.before_call() is None
+    breaker.on_success()
+    assert breaker.state == CLOSED
+
+
+def test_needs_min_calls_before_tripping():
+    breaker = make_breaker()
+    for _ in range(breaker.min_calls - 1):
+        breaker.on_throttle()
+    assert breaker.state == CLOSED
+    breaker.on_throttle()
+    assert breaker.state == OPEN
+    assert breaker.counters['trips'] == 1
+
+
+def test_stays_closed_below_threshold():
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.on_success()
+    breaker.on_throttle()
+    breaker.on_throttle()
+    # 2 of 5 throttled
+    assert breaker.state == CLOSED
+    breaker.on_throttle()
+    # 3 of 6
+    assert breaker.state == OPEN
+
+
+def test_outcomes_outside_the_window_are_forgotten():
+    breaker = make_breaker(window_seconds=0.05)
+    for _ in range(3):
+        breaker.on_throttle()
+    time.sleep(0.06)
+    breaker.on_throttle()
+    assert breaker.state == CLOSED
+
+
+def test_open_blocks_callers_for_the_cooldown():
+    breaker = make_breaker()
+    trip(breaker)
+    start = time.time()
+    probe = breaker.before_call()
+    assert time.time() - start >= COOLDOWN * 0.9 - 0.005
+    assert breaker.state == HALF_OPEN
+    assert probe == breaker.round == 1
+    assert breaker.counters['calls_paused'] == 1
+
+
+def test_each_half_open_period_is_a_new_round():
+    breaker = make_breaker()
+    assert half_open(breaker) == 1
+    breaker.on_throttle(1)
+    assert breaker.state == OPEN
+    assert half_open(breaker) == 2
+    transitions = [(t['from'], t['to'], t.get('round')) for t in breaker.stats()['transitions']]
+    assert transitions == [
+        (CLOSED, OPEN, None),
+        (OPEN, HALF_OPEN, 1),
+        (HALF_OPEN, OPEN, None),
+        (OPEN, HALF_OPEN, 2),
+    ]
+
+
+def test_half_open_admits_probes_with_slow_start():
+    breaker = make_breaker(probes_to_close=10)
+    probe = half_open(breaker)
+    assert breaker.probe_limit == 1
+    assert breaker.probes_in_flight == 1
+
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(breaker.before_call()), daemon=True)
+    waiter.start()
+    waiter.join(0.05)
+    # The only slot is taken
+    assert admitted == []
+
+    breaker.on_success(probe)
+    waiter.join(1)
+    assert admitted == [probe]
+    assert breaker.probe_limit == 2
+    assert breaker.probes_in_flight == 1
+
+
+def test_probes_close_the_breaker():
+    breaker = make_breaker(probes_to_close=3)
+    probe = half_open(breaker)
+    breaker.on_success(probe)
+    breaker.on_success(breaker.before_call())
+    assert breaker.state == HALF_OPEN
+    breaker.on_success(breaker.before_call())
+    assert breaker.state == CLOSED
+    assert breaker.consecutive_trips == 0
+    assert breaker.before_call() is None
+
+
+def test_throttled_probe_reopens_with_doubled_cooldown():
+    breaker = make_breaker()
+    probe = half_open(breaker)
+    breaker.on_throttle(probe)
+    assert breaker.state == OPEN
+    assert breaker.consecutive_trips == 2
+    remaining = breaker.open_until - time.time()
+    assert COOLDOWN * 2 * 0.9 - 0.01 <= remaining <= COOLDOWN * 2 * 1.1
+
+
+def test_cooldown_is_capped():
+    breaker = make_breaker(max_cooldown_seconds=0.08)
+    probe = half_open(breaker)
+    breaker.on_throttle(probe)
+    assert breaker.open_until - time.time() <= 0.08 * 1.1
+
+
+def test_failed_probe_frees_its_slot():
+    breaker = make_breaker()
+    probe = half_open(breaker)
+    breaker.on_error(probe)
+    assert breaker.state == HALF_OPEN
+    assert breaker.probes_in_flight == 0
+    assert breaker.probe_limit == 1
+    assert breaker.before_call() == probe
+
+
+def test_stale_probe_is_ignored():
+    breaker = make_breaker(probes_to_close=10)
+    stale = half_open(breaker)
+    breaker.on_throttle(stale)
+    current = half_open(breaker)
+    assert current == stale + 1
+
+    # Outcomes of a round-1 probe landing in round 2 change nothing
+    breaker.on_success(stale)
+    breaker.on_error(stale)
+    assert breaker.probes_in_flight == 1
+    assert breaker.probe_successes == 0
+    assert breaker.probe_limit == 1
+    breaker.on_throttle(stale)
+    assert breaker.state == HALF_OPEN
+
+    breaker.on_success(current)
+    assert breaker.probe_successes == 1
+    assert breaker.probes_in_flight == 0
+
+
+def test_probe_outcome_after_close_counts_as_normal_call():
+    breaker = make_breaker(probes_to_close=1)
+    probe = half_open(breaker)
+    breaker.on_success(probe)
+    assert breaker.state == CLOSED
+    breaker.on_throttle(probe)
+    assert breaker.state == CLOSED
+    assert len(breaker.outcomes) == 1
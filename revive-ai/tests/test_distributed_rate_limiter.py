@@ -0,0 +1,99 @@
+"""Shared-bucket leasing of DistributedTokenBucketRateLimiter."""
+import asyncio
+import threading
+import time
+
+from shared.distributed_rate_limiter import DistributedTokenBucketRateLimiter, SQLiteBucketStore
+
+
+class SlowStore:
+    """Wraps a store, adding latency to every round trip and recording the calling threads."""
+
+    def __init__(self, inner, latency=0.05):
+        self.inner = inner
+        self.latency = latency
+        self.threads = set()
+        self.fail = False
+
+    def read(self):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError('store unreachable')
+        return self.inner.read()
+
+    def write(self, state, version):
+        time.sleep(self.latency)
+        return self.inner.write(state, version)
+
+
+def sqlite_store(tmp_path, name='bedrock'):
+    return SQLiteBucketStore(str(tmp_path / 'buckets.db'), name)
+
+
+def test_tokens_are_leased_in_blocks(tmp_path):
+    limiter = DistributedTokenBucketRateLimiter(sqlite_store(tmp_path), rate_per_minute=600, burst=20, lease_size=5)
+    for _ in range(5):
+        assert limiter.acquire(timeout=1)
+    stats = limiter.stats()
+    assert (stats['leases'], stats['leased_tokens'], stats['local_tokens']) == (1, 5, 0)
+    assert limiter.acquire(timeout=1)
+    assert limiter.stats()['leases'] == 2
+
+
+def test_containers_share_one_bucket(tmp_path):
+    store = sqlite_store(tmp_path)
+    first = DistributedTokenBucketRateLimiter(store, rate_per_minute=6, burst=10, lease_size=5)
+    second = DistributedTokenBucketRateLimiter(store, rate_per_minute=6, burst=10, lease_size=5)
+    assert first.acquire(tokens=5, timeout=0.1)
+    assert second.acquire(tokens=5, timeout=0.1)
+    # The shared burst is spent; a third lease would wait ~10s for a refill
+    assert first.try_acquire() > 5
+
+
+def test_store_errors_fall_back_to_the_local_bucket(tmp_path):
+    store = SlowStore(sqlite_store(tmp_path), latency=0)
+    store.fail = True
+    limiter = DistributedTokenBucketRateLimiter(store, rate_per_minute=600, burst=5, store_retry_seconds=60)
+    assert limiter.acquire(timeout=1)
+    assert limiter.acquire(timeout=1)
+    stats = limiter.stats()
+    assert stats['store_errors'] == 1
+    assert stats['store_fallback'] is True
+
+
+def test_acquire_async_leases_off_the_event_loop(tmp_path):
+    store = SlowStore(sqlite_store(tmp_path), latency=0.05)
+    limiter = DistributedTokenBucketRateLimiter(store, rate_per_minute=600, burst=20, lease_size=2)
+
+    async def main():
+        loop_thread = threading.current_thread().name
+        ticks = []
+        stop = asyncio.Event()
+
+        async def tick():
+            while not stop.is_set():
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.ensure_future(tick())
+        acquired = [await limiter.acquire_async(timeout=2) for _ in range(4)]
+        stop.set()
+        await ticker
+        gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+        return loop_thread, acquired, max(gaps)
+
+    loop_thread, acquired, longest_gap = asyncio.run(main())
+    assert acquired == [True] * 4
+    assert limiter.stats()['leases'] == 2
+    # Each lease is a read and a write of 50ms; none of it ran on the loop
+    assert loop_thread not in store.threads
+    assert longest_gap < 0.05
+
+
+def test_async_and_thread_callers_share_the_lease(tmp_path):
+    limiter = DistributedTokenBucketRateLimiter(sqlite_store(tmp_path), rate_per_minute=600, burst=20, lease_size=4)
+    assert limiter.acquire(timeout=1)
+    assert asyncio.run(limiter.acquire_async(timeout=1))
+    assert limiter.stats()['leases'] == 1
+    assert limiter.get_available_tokens() == 2
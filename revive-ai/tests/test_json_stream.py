@@ -0,0 +1,122 @@
+"""IncrementalJSONScanner and the streaming path of BedrockClient.invoke_json."""
+import io
+import json
+
+import pytest
+
+from shared.bedrock_client import BedrockClient
+from shared.json_stream import IncrementalJSONScanner, JSONStreamError
+
+
+def scan(*chunks, **kwargs):
+    scanner = IncrementalJSONScanner(**kwargs)
+    for chunk in chunks:
+        scanner.feed(chunk)
+    return scanner
+
+
+def test_plain_object_completes():
+    assert scan('{"category": "pricing", "confidence": 0.9, "ok": true, "x": null}').complete
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = '{"a": [1, {"b": "c\\\\\\"}"}], "d": -1.5e3}'
+    assert scan(*text).complete
+
+
+def test_brackets_inside_strings_are_ignored():
+    assert scan('{"insight": "pricing {tier} [annual] }"}').complete
+
+
+def test_prose_preamble_is_accepted_like_invoke_json():
+    preamble = "Based on the customer's cancellation reason and usage data, here is my analysis:\n\n"
+    assert len(preamble) > 32
+    assert scan(preamble, '{"category": "pricing"}').complete
+
+
+def test_fenced_output_completes_and_ignores_the_closing_fence():
+    assert scan('```json\n', '{"category": "pricing"}', '\n```\nLet me know if you need more.').complete
+
+
+def test_strict_preamble_limit_is_opt_in():
+    with pytest.raises(JSONStreamError):
+        scan('I could not find enough information to produce an analysis for this customer.',
+             max_preamble_chars=32)
+    assert scan('```json\n{"a": 1}', max_preamble_chars=3).complete
+
+
+def test_truncated_stream_is_incomplete_not_an_error():
+    scanner = scan('{"category": "pricing", "insights": "Customer cited')
+    assert not scanner.complete
+    assert scanner.in_string
+    assert scan('').complete is False
+
+
+def test_mismatched_bracket_aborts():
+    with pytest.raises(JSONStreamError, match='Mismatched'):
+        scan('{"a": [1, 2}')
+
+
+def test_prose_inside_the_body_aborts():
+    with pytest.raises(JSONStreamError, match='Unexpected character'):
+        scan('{"a": 1, Actually, I need more information')
+
+
+class ScriptedRuntime:
+    """bedrock-runtime stand-in: streams `stream_text`, answers InvokeModel with `text`."""
+
+    def __init__(self, stream_text, text):
+        self.stream_text = stream_text
+        self.text = text
+        self.calls = {'invoke_model': 0, 'invoke_model_with_response_stream': 0}
+        self.closed = False
+
+    def _events(self):
+        yield {'chunk': {'bytes': json.dumps({'type': 'message_start',
+                                              'message': {'usage': {'input_tokens': 10}}}).encode()}}
+        for start in range(0, len(self.stream_text), 8):
+            delta = {'type': 'text_delta', 'text': self.stream_text[start:start + 8]}
+            yield {'chunk': {'bytes': json.dumps({'type': 'content_block_delta', 'delta': delta}).encode()}}
+        yield {'chunk': {'bytes': json.dumps({'type': 'message_delta', 'usage': {'output_tokens': 5}}).encode()}}
+
+    def invoke_model_with_response_stream(self, modelId, body, **kwargs):
+        self.calls['invoke_model_with_response_stream'] += 1
+        runtime = self
+
+        class Stream:
+            def __iter__(self):
+                return runtime._events()
+
+            def close(self):
+                runtime.closed = True
+
+        return {'body': Stream()}
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self.calls['invoke_model'] += 1
+        response = {'content': [{'type': 'text', 'text': self.text}], 'usage': {'input_tokens': 10, 'output_tokens': 5}}
+        return {'body': io.BytesIO(json.dumps(response).encode())}
+
+
+def streaming_client(runtime):
+    client = BedrockClient(model_id='test-model', streaming=True)
+    client.client = runtime
+    client.single_flight = None
+    client.quota = None
+    return client
+
+
+def test_streamed_json_after_a_long_preamble_parses():
+    runtime = ScriptedRuntime('Here is the churn analysis you asked for, in JSON:\n```json\n{"category": "pricing"}\n```',
+                              text='unused')
+    result = streaming_client(runtime).invoke_json('system', 'user')
+    assert result['data'] == {'category': 'pricing'}
+    assert runtime.calls == {'invoke_model': 0, 'invoke_model_with_response_stream': 1}
+
+
+def test_aborted_stream_is_regenerated_once_without_streaming():
+    runtime = ScriptedRuntime('{"category": "pricing", I am not sure about this one', text='{"category": "features"}')
+    result = streaming_client(runtime).invoke_json('system', 'user')
+    assert result['data'] == {'category': 'features'}
+    assert runtime.closed
+    assert runtime.calls == {'invoke_model': 1, 'invoke_model_with_response_stream': 1}
@@ -0,0 +1,163 @@
+"""Coalescing, close and sharding of ProgressReporter."""
+import time
+
+import pytest
+
+from shared.progress_reporter import ProgressReporter, merge_progress, progress_key, read_progress
+from shared.results_manifest import ResultsManifest, manifest_entry
+
+STATUS_KEY = 'results/u1/status.json'
+
+
+def reporter_for(s3, total=10, **kwargs):
+    options = dict(flush_seconds=60, flush_percent=50, min_interval=0)
+    options.update(kwargs)
+    return ProgressReporter(s3, 'u1', {'upload_id': 'u1', 'status': 'processing', 'total': total}, **options)
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_nothing_is_written_below_the_flush_delta(s3):
+    reporter = reporter_for(s3)
+    for _ in range(4):
+        reporter.record(True)
+    time.sleep(0.05)
+    assert s3.puts == []
+    reporter.stop()
+
+
+def test_records_are_coalesced_into_one_write(s3):
+    reporter = reporter_for(s3)
+    # flush_percent=50 of 10 customers: one write per 5 finished
+    for success in (True, True, False, True, True):
+        reporter.record(success)
+    assert wait_for(lambda: reporter.writes == 1)
+    status = s3.objects[STATUS_KEY]
+    assert (status['completed'], status['failed'], status['progress']) == (4, 1, 40)
+    assert status['status'] == 'processing'
+    assert reporter.pending == 0
+    reporter.stop()
+    assert s3.puts == [STATUS_KEY]
+
+
+def test_min_interval_spaces_out_writes(s3):
+    reporter = reporter_for(s3, flush_percent=10, min_interval=0.2)
+    reporter.record(True)
+    assert wait_for(lambda: reporter.writes == 1)
+    for _ in range(3):
+        reporter.record(True)
+    time.sleep(0.1)
+    assert reporter.writes == 1
+    assert wait_for(lambda: reporter.writes == 2)
+    assert s3.objects[STATUS_KEY]['completed'] == 4
+    reporter.stop()
+
+
+def test_pending_progress_is_written_after_flush_seconds(s3):
+    reporter = reporter_for(s3, flush_seconds=0.1)
+    reporter.record(True)
+    time.sleep(0.03)
+    assert reporter.writes == 0
+    assert wait_for(lambda: reporter.writes == 1)
+    reporter.stop()
+
+
+def test_failed_write_keeps_progress_pending(s3):
+    s3.fail_puts = 1
+    reporter = reporter_for(s3, flush_seconds=0.05)
+    for _ in range(5):
+        reporter.record(True)
+    # The failed write is retried flush_seconds later
+    assert wait_for(lambda: reporter.writes == 1)
+    assert s3.objects[STATUS_KEY]['completed'] == 5
+    reporter.stop()
+
+
+def test_close_writes_the_final_document(s3):
+    reporter = reporter_for(s3, snapshot=lambda: {'rate_limiter': {'mode': 'fixed'}})
+    reporter.record(True)
+    reporter.record(False)
+    status = reporter.close({'status': 'complete', 'tokens': 42})
+    assert s3.puts == [STATUS_KEY]
+    assert s3.objects[STATUS_KEY] == status
+    assert status['status'] == 'complete'
+    assert (status['completed'], status['failed'], status['tokens']) == (1, 1, 42)
+    assert status['rate_limiter'] == {'mode': 'fixed'}
+    assert not reporter.thread.is_alive()
+
+
+def test_close_writes_even_without_progress(s3):
+    reporter = reporter_for(s3)
+    status = reporter.close({'status': 'complete'})
+    assert s3.puts == [STATUS_KEY]
+    assert status['completed'] == 0
+
+
+def test_close_retries_the_final_write(s3):
+    reporter = reporter_for(s3, final_attempts=2)
+    reporter.record(True)
+    s3.fail_puts = 1
+    status = reporter.close({'status': 'complete'})
+    assert s3.objects[STATUS_KEY] == status
+
+
+def test_close_raises_when_every_attempt_fails(s3):
+    reporter = reporter_for(s3, final_attempts=2)
+    s3.fail_puts = 2
+    with pytest.raises(IOError):
+        reporter.close({'status': 'complete'})
+    assert STATUS_KEY not in s3.objects
+
+
+def test_stop_is_idempotent_and_skips_the_final_write(s3):
+    with reporter_for(s3) as reporter:
+        reporter.record(True)
+    reporter.stop()
+    assert not reporter.thread.is_alive()
+    assert s3.puts == []
+
+
+def test_manifest_is_written_before_progress(s3):
+    manifest = ResultsManifest('u1')
+    reporter = reporter_for(s3, manifest=manifest)
+    manifest.append(manifest_entry({'customer_id': 'C1', 'status': 'success'}, 'results/u1/customers/C1.json'))
+    reporter.record(True)
+    status = reporter.close({'status': 'complete'})
+    assert s3.puts == [manifest.key, STATUS_KEY]
+    assert status['manifest_entries'] == 1
+
+
+def test_shards_write_their_own_progress_objects(s3):
+    status = {'upload_id': 'u1', 'status': 'processing', 'total': 4, 'shards': ['0', '1']}
+    s3.put_json(STATUS_KEY, status)
+    shard = ProgressReporter(s3, 'u1', {'upload_id': 'u1', 'shard': '0', 'total': 2}, shard='0',
+                             flush_seconds=60, min_interval=0)
+    shard.record(True)
+    shard.record(False)
+    shard.close({'done': True})
+    assert s3.puts[-1] == progress_key('u1', '0')
+
+    merged = read_progress(s3, 'u1', status)
+    assert (merged['completed'], merged['failed'], merged['progress']) == (1, 1, 25)
+    assert merged['shards_done'] == 1
+
+
+def test_merge_progress_sums_the_shards():
+    status = {'status': 'processing', 'total': 10, 'shards': ['0', '1', '2']}
+    merged = merge_progress(status, [{'completed': 3, 'failed': 1, 'done': True}, {'completed': 2}, None])
+    assert (merged['completed'], merged['failed'], merged['progress'], merged['shards_done']) == (5, 1, 50, 1)
+    assert 'completed' not in status
+
+
+def test_read_progress_returns_unsharded_or_finished_status(s3):
+    status = {'status': 'processing', 'total': 3, 'completed': 2}
+    assert read_progress(s3, 'u1', status) is status
+    finished = {'status': 'complete', 'total': 3, 'completed': 3, 'shards': ['0']}
+    assert read_progress(s3, 'u1', finished) is finished
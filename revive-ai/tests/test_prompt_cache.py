@@ -0,0 +1,106 @@
+"""Prompt-cache breakpoints in BedrockClient and the stub's cache simulation."""
+import io
+import json
+
+from shared.bedrock_client import BedrockClient, prompt_cache_min_tokens
+from shared.bedrock_stub import StubBedrockRuntime, StubConfig
+
+HAIKU = 'us.anthropic.claude-haiku-4-5-20251001-v1:0'
+SONNET = 'anthropic.claude-sonnet-4-5-20250929-v1:0'
+
+
+def words(count, seed):
+    """`count` tokens (4 characters each) of text distinct per seed."""
+    return f"{seed}ab " * count
+
+
+class CapturingRuntime:
+    """Records InvokeModel request bodies and answers with fixed text."""
+
+    def __init__(self):
+        self.requests = []
+
+    def invoke_model(self, modelId, body, **kwargs):
+        self.requests.append(json.loads(body))
+        response = {'content': [{'type': 'text', 'text': '{}'}], 'usage': {'input_tokens': 1, 'output_tokens': 1}}
+        return {'body': io.BytesIO(json.dumps(response).encode())}
+
+
+def capture(model_id, system_prompt, prompt_prefix, monkeypatch):
+    monkeypatch.setenv('BEDROCK_PROMPT_CACHE', 'on')
+    client = BedrockClient(model_id=model_id, streaming=False)
+    client.client = CapturingRuntime()
+    client.single_flight = None
+    client.quota = None
+    client.invoke(system_prompt, 'Customer: C1', prompt_prefix=prompt_prefix, use_cache=False)
+    return client.client.requests[0]
+
+
+def breakpoints(request):
+    blocks = request['system'] if isinstance(request['system'], list) else []
+    content = request['messages'][0]['content']
+    blocks += content if isinstance(content, list) else []
+    return [block['text'][:12] for block in blocks if 'cache_control' in block]
+
+
+def test_minimum_cacheable_length_per_model():
+    assert prompt_cache_min_tokens(HAIKU) == 4096
+    assert prompt_cache_min_tokens(SONNET) == 1024
+    assert prompt_cache_min_tokens('anthropic.claude-3-5-haiku-20241022-v1:0') == 2048
+
+
+def test_short_prefixes_get_no_breakpoints(monkeypatch):
+    request = capture(HAIKU, 'You are a churn analyst.', 'Return JSON only.', monkeypatch)
+    assert breakpoints(request) == []
+    assert request['system'] == 'You are a churn analyst.'
+    assert request['messages'][0]['content'] == 'Return JSON only.\n\nCustomer: C1'
+
+
+def test_breakpoint_once_the_prefix_clears_the_minimum(monkeypatch):
+    system_prompt, prompt_prefix = words(600, 's'), words(600, 'p')
+    # 1200 tokens: enough for Sonnet 4.5, not for Haiku 4.5
+    assert breakpoints(capture(HAIKU, system_prompt, prompt_prefix, monkeypatch)) == []
+    assert breakpoints(capture(SONNET, system_prompt, prompt_prefix, monkeypatch)) == [prompt_prefix[:12]]
+
+
+def test_long_system_prompt_gets_its_own_breakpoint(monkeypatch):
+    system_prompt = words(4200, 'x')
+    assert breakpoints(capture(HAIKU, system_prompt, 'Return JSON only.', monkeypatch)) == [
+        system_prompt[:12], 'Return JSON '
+    ]
+
+
+def stub_usage(model_id, blocks):
+    request = {'system': blocks[:1], 'messages': [{'role': 'user', 'content': blocks[1:]}],
+               'max_tokens': 100}
+    runtime = StubBedrockRuntime(StubConfig(rpm_ceiling=10000, model_latency_ms=0))
+    response = runtime.invoke_model(modelId=model_id, body=json.dumps(request))
+    return json.loads(response['body'].read())['usage']
+
+
+def block(text, cache=False):
+    return dict({'type': 'text', 'text': text}, **({'cache_control': {'type': 'ephemeral'}} if cache else {}))
+
+
+def test_stub_never_caches_a_prefix_below_the_minimum():
+    blocks = [block(words(300, 'a'), cache=True), block(words(300, 'b'), cache=True), block('Company: C1')]
+    for _ in range(2):
+        usage = stub_usage(HAIKU, blocks)
+        assert usage['cache_creation_input_tokens'] == usage['cache_read_input_tokens'] == 0
+
+
+def test_stub_writes_then_reads_an_eligible_prefix():
+    blocks = [block(words(800, 'c')), block(words(800, 'd'), cache=True), block('Company: C1')]
+    first, second = stub_usage(SONNET, blocks), stub_usage(SONNET, blocks)
+    assert first['cache_creation_input_tokens'] > 1024 and first['cache_read_input_tokens'] == 0
+    assert second['cache_read_input_tokens'] == first['cache_creation_input_tokens']
+    assert second['cache_creation_input_tokens'] == 0
+    assert second['input_tokens'] == first['input_tokens'] < 20
+
+
+def test_stub_reads_the_longest_cached_prefix_and_writes_the_rest():
+    system = block(words(1100, 'e'), cache=True)
+    stub_usage(SONNET, [system, block('Company: C1')])
+    usage = stub_usage(SONNET, [system, block(words(400, 'f'), cache=True), block('Company: C2')])
+    assert usage['cache_read_input_tokens'] >= 1024
+    assert 0 < usage['cache_creation_input_tokens'] < 450
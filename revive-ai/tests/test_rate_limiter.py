@@ -0,0 +1,127 @@
+"""FIFO waiter queue of TokenBucketRateLimiter."""
+import asyncio
+import threading
+import time
+
+from shared.rate_limiter import TokenBucketRateLimiter
+
+
+def start_waiters(limiter, count, order, **kwargs):
+    """Start `count` acquire() threads one at a time, so they queue in index order."""
+    threads = []
+    for index in range(count):
+        def run(index=index):
+            if limiter.acquire(**kwargs):
+                order.append(index)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        while len(limiter.waiters) < index + 1 and thread.is_alive():
+            time.sleep(0.001)
+        threads.append(thread)
+    return threads
+
+
+def test_burst_is_served_without_waiting():
+    limiter = TokenBucketRateLimiter(rate_per_minute=60, burst=3)
+    start = time.monotonic()
+    assert all(limiter.acquire() for _ in range(3))
+    assert time.monotonic() - start < 0.05
+    assert not limiter.waiters
+
+
+def test_waiters_are_served_in_arrival_order():
+    limiter = TokenBucketRateLimiter(rate_per_minute=1200, burst=1)
+    limiter.acquire()
+    order = []
+    threads = start_waiters(limiter, 5, order)
+    for thread in threads:
+        thread.join(2)
+    assert order == [0, 1, 2, 3, 4]
+    assert not limiter.waiters
+
+
+def test_head_sleeps_for_the_refill_time():
+    # 600 RPM = one token every 0.1s
+    limiter = TokenBucketRateLimiter(rate_per_minute=600, burst=1)
+    limiter.acquire()
+    start = time.monotonic()
+    assert limiter.acquire()
+    assert 0.08 <= time.monotonic() - start < 0.2
+
+
+def test_try_acquire_does_not_jump_the_queue():
+    limiter = TokenBucketRateLimiter(rate_per_minute=600, burst=1)
+    limiter.acquire()
+    order = []
+    threads = start_waiters(limiter, 1, order)
+    # Queued callers are ahead, whatever the bucket holds
+    limiter.refund(1)
+    assert limiter.try_acquire() > 0
+    threads[0].join(2)
+    assert order == [0]
+
+
+def test_try_acquire_takes_or_reports_the_wait():
+    limiter = TokenBucketRateLimiter(rate_per_minute=60, burst=1)
+    assert limiter.try_acquire() == 0
+    wait = limiter.try_acquire()
+    assert 0.9 < wait <= 1.0
+
+
+def test_timeout_leaves_the_queue_and_promotes_the_next_waiter():
+    limiter = TokenBucketRateLimiter(rate_per_minute=60, burst=1)
+    limiter.acquire()
+    order = []
+    threads = start_waiters(limiter, 1, order, timeout=0.05)
+    threads += start_waiters(limiter, 1, order)
+    threads[0].join(1)
+    assert order == []
+    assert len(limiter.waiters) == 1
+    # The second waiter is now the head and gets the refilled token
+    limiter.refund(1)
+    threads[1].join(1)
+    assert order == [0]
+    assert not limiter.waiters
+
+
+def test_timeout_returns_false():
+    limiter = TokenBucketRateLimiter(rate_per_minute=60, burst=1)
+    limiter.acquire()
+    start = time.monotonic()
+    assert limiter.acquire(timeout=0.05) is False
+    assert time.monotonic() - start < 0.5
+    assert not limiter.waiters
+
+
+def test_refund_wakes_the_head_waiter():
+    limiter = TokenBucketRateLimiter(rate_per_minute=1, burst=1)
+    limiter.acquire()
+    order = []
+    threads = start_waiters(limiter, 1, order)
+    limiter.refund(1)
+    threads[0].join(1)
+    assert order == [0]
+
+
+def test_async_waiters_share_the_queue_with_threads():
+    limiter = TokenBucketRateLimiter(rate_per_minute=1200, burst=1)
+    limiter.acquire()
+    order = []
+    threads = start_waiters(limiter, 1, order)
+
+    async def acquire_all():
+        for index in (1, 2):
+            assert await limiter.acquire_async(timeout=2)
+            order.append(index)
+
+    asyncio.run(acquire_all())
+    threads[0].join(1)
+    assert order == [0, 1, 2]
+    assert not limiter.waiters
+
+
+def test_async_timeout_returns_false():
+    limiter = TokenBucketRateLimiter(rate_per_minute=60, burst=1)
+    limiter.acquire()
+    assert asyncio.run(limiter.acquire_async(timeout=0.05)) is False
+    assert not limiter.waiters
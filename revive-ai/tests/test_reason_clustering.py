@@ -0,0 +1,195 @@
+"""Reason clustering and sharing of analyses between cluster members."""
+import asyncio
+import threading
+
+import pytest
+
+from shared.reason_clustering import ReasonClusters, cluster_reasons, personalize_analysis, replace_token
+
+LEADER = {
+    'customer_id': 'C1',
+    'company_name': 'Acme',
+    'subscription_tier': 'enterprise',
+    'mrr': '5000',
+    'churn_date': '2024-01-10',
+    'cancellation_reason': 'Too expensive for our budget'
+}
+MEMBER = {
+    'customer_id': 'C12',
+    'company_name': 'Beta Labs',
+    'subscription_tier': 'starter',
+    'mrr': '300',
+    'churn_date': '2024-02-01',
+    'cancellation_reason': 'Too expensive for our budget'
+}
+LEADER_RESULT = {
+    'analysis': (
+        "## Churn Analysis: Acme\n\n"
+        "Acme (C1) churned citing pricing. Their MRR of $5000 gives a CLV of $180,000. "
+        "Finance at Acme pushed back on the renewal, unlike C10 and C12.\n\n"
+        "- Only 12% of seats were active last quarter\n"
+        "- As an enterprise tier account they had a dedicated CSM\n\n"
+        "Confidence: 80%\n\n"
+        "Recommendation: Lead with a pricing focused win-back sequence."
+    ),
+    'category': 'pricing',
+    'confidence': 80,
+    'recommendation': 'Lead with a pricing focused win-back sequence.',
+    'reasoning_traces': [{'type': 'rationale', 'content': 'Acme looks price sensitive'}],
+    'tools_used': [{'tool': '/calculateCLV'}, {'tool': '/searchCompanyInfo'}, {'tool': '/getCRMHistory'}],
+    'tool_count': 3,
+    'session_id': 'leader-session'
+}
+
+
+def customer(customer_id, reason):
+    return {'customer_id': customer_id, 'company_name': f"Co {customer_id}", 'mrr': '100', 'cancellation_reason': reason}
+
+
+def test_similar_reasons_cluster_and_different_ones_do_not():
+    reasons = [
+        'Too expensive for our budget',
+        'Too expensive for the budget',
+        'Missing Salesforce integration',
+        'too expensive, for our budget!',
+        '',
+        ''
+    ]
+    clusters = cluster_reasons(reasons)
+    assert [0, 1, 3] in clusters
+    assert [2] in clusters
+    # Empty reasons never cluster
+    assert [4] in clusters and [5] in clusters
+
+
+def test_replace_token_matches_whole_identifiers_only():
+    text = 'C1 left; C10, C12 and C1. stayed (C1)'
+    assert replace_token(text, 'C1', 'C12') == 'C12 left; C10, C12 and C12. stayed (C12)'
+    assert replace_token('Acme and Acmeware', 'Acme', 'Beta') == 'Beta and Acmeware'
+
+
+def test_personalize_swaps_identifiers_without_corrupting_longer_ones():
+    analysis = personalize_analysis(LEADER_RESULT, LEADER, MEMBER)['analysis']
+    assert 'C122' not in analysis and 'C120' not in analysis
+    assert 'Beta Labs (C12) churned citing pricing.' in analysis
+    assert 'Acme' not in analysis
+
+
+def test_personalize_shares_reason_fields_only():
+    personalized = personalize_analysis(LEADER_RESULT, LEADER, MEMBER)
+
+    assert personalized['category'] == 'pricing'
+    assert personalized['confidence'] == 80
+    assert personalized['recommendation'] == LEADER_RESULT['recommendation']
+    assert personalized['reason_cluster_source'] == 'C1'
+    # Lookups, traces and the session were made for the leader
+    assert personalized['tools_used'] == []
+    assert personalized['tool_count'] == 0
+    assert personalized['reasoning_traces'] == []
+    assert personalized['session_id'] is None
+    # The leader's result is left as it was
+    assert LEADER_RESULT['tool_count'] == 3
+
+
+def test_personalize_rebuilds_account_figures_from_the_member():
+    analysis = personalize_analysis(LEADER_RESULT, LEADER, MEMBER)['analysis']
+
+    # Leader's MRR, CLV, tier and usage figures are dropped...
+    for leaked in ('$5000', '$180,000', '12%', 'enterprise', 'dedicated CSM'):
+        assert leaked not in analysis
+    # ...and the member's own account section is used instead (300 x 12-month starter tenure)
+    assert '- Customer ID: C12' in analysis
+    assert '- Subscription Tier: starter' in analysis
+    assert '- MRR: $300' in analysis
+    assert '- Estimated CLV: $3,600 (12-month average tenure, LOW priority)' in analysis
+    # Reason-level content is kept
+    assert 'Confidence: 80%' in analysis
+    assert 'Recommendation: Lead with a pricing focused win-back sequence.' in analysis
+
+
+def test_analyze_runs_one_analysis_per_cluster():
+    customers = [
+        customer('C1', 'Too expensive for our budget'),
+        customer('C2', 'Too expensive for the budget'),
+        customer('C3', 'Missing Salesforce integration')
+    ]
+    clusters = ReasonClusters(customers)
+    calls = []
+
+    def analyze(c):
+        calls.append(c['customer_id'])
+        return {'analysis': f"{c['company_name']} ({c['customer_id']}) churned over price.", 'category': 'pricing'}
+
+    results = [clusters.analyze(c, analyze) for c in customers]
+
+    assert calls == ['C1', 'C3']
+    assert results[1]['reason_cluster_source'] == 'C1'
+    assert 'Co C2 (C2) churned over price.' in results[1]['analysis']
+    assert 'reason_cluster_source' not in results[2]
+    assert clusters.stats() == {'customers': 3, 'clusters': 2, 'multi_member_clusters': 1, 'api_calls_saved': 1}
+
+
+def test_members_wait_for_the_leader_from_other_threads():
+    customers = [customer(f"C{i}", 'Too expensive for our budget') for i in range(1, 6)]
+    clusters = ReasonClusters(customers)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def analyze(c):
+        calls.append(c['customer_id'])
+        started.set()
+        release.wait(2)
+        return {'analysis': f"{c['customer_id']} churned over price."}
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(C1=clusters.analyze(customers[0], analyze)))
+    leader.start()
+    assert started.wait(2)
+    followers = [
+        threading.Thread(target=lambda c=c: results.update({c['customer_id']: clusters.analyze(c, analyze)}))
+        for c in customers[1:]
+    ]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert calls == ['C1']
+    assert all(results[f"C{i}"]['reason_cluster_source'] == 'C1' for i in range(2, 6))
+
+
+def test_members_analyze_themselves_when_the_leader_fails():
+    customers = [customer('C1', 'Too expensive'), customer('C2', 'Too expensive')]
+    clusters = ReasonClusters(customers)
+    calls = []
+
+    def analyze(c):
+        calls.append(c['customer_id'])
+        if c['customer_id'] == 'C1':
+            raise RuntimeError('agent failed')
+        return {'analysis': 'own analysis'}
+
+    with pytest.raises(RuntimeError):
+        clusters.analyze(customers[0], analyze)
+    assert clusters.analyze(customers[1], analyze) == {'analysis': 'own analysis'}
+    assert calls == ['C1', 'C2']
+
+
+def test_analyze_async_shares_the_leaders_analysis():
+    customers = [customer('C1', 'Too expensive'), customer('C2', 'Too expensive')]
+    clusters = ReasonClusters(customers)
+    calls = []
+
+    async def analyze(c):
+        calls.append(c['customer_id'])
+        await asyncio.sleep(0.01)
+        return {'analysis': f"{c['customer_id']} churned over price.", 'category': 'pricing'}
+
+    async def run():
+        return await asyncio.gather(*(clusters.analyze_async(c, analyze) for c in customers))
+
+    leader, member = asyncio.run(run())
+    assert calls == ['C1']
+    assert member['category'] == 'pricing'
+    assert 'C2 churned over price.' in member['analysis']
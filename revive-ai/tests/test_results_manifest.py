@@ -0,0 +1,80 @@
+"""Append-only per-writer manifests and their aggregation."""
+import threading
+
+import pytest
+
+from shared.results_manifest import (MAIN_WRITER, ResultsManifest, manifest_entry, manifest_key, manifest_writers,
+                                     read_manifest)
+
+
+def success(customer_id, category='pricing'):
+    return {'customer_id': customer_id, 'status': 'success', 'mrr': 100, 'analysis': {'category': category}}
+
+
+def test_entry_fields():
+    entry = manifest_entry(success('C1'), 'results/u1/customers/C1.json', 512)
+    assert entry == {'customer_id': 'C1', 'key': 'results/u1/customers/C1.json', 'size': 512,
+                     'status': 'success', 'category': 'pricing', 'mrr': 100}
+    failed = manifest_entry({'customer_id': 'C2', 'status': 'failed', 'analysis': None})
+    assert (failed['key'], failed['category'], failed['size']) == (None, None, 0)
+
+
+def test_write_only_when_entries_were_appended(s3):
+    manifest = ResultsManifest('u1')
+    assert manifest.write(s3) is False
+    manifest.append(manifest_entry(success('C1'), 'k1'))
+    assert manifest.write(s3) is True
+    assert manifest.write(s3) is False
+    manifest.append(manifest_entry(success('C2'), 'k2'))
+    assert manifest.write(s3) is True
+    assert s3.puts == [manifest_key('u1')] * 2
+    assert manifest.written == len(manifest) == 2
+    assert [e['customer_id'] for e in s3.objects[manifest_key('u1')]['entries']] == ['C1', 'C2']
+
+
+def test_failed_write_is_retried_by_the_next_write(s3):
+    manifest = ResultsManifest('u1')
+    manifest.append(manifest_entry(success('C1'), 'k1'))
+    s3.fail_puts = 1
+    with pytest.raises(IOError):
+        manifest.write(s3)
+    assert manifest.written == 0
+    assert manifest.write(s3) is True
+    assert manifest.written == 1
+
+
+def test_concurrent_appends_are_all_written(s3):
+    manifest = ResultsManifest('u1')
+    threads = [threading.Thread(target=lambda i=i: manifest.append(manifest_entry(success(f"C{i}"), f"k{i}")))
+               for i in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manifest.write(s3)
+    assert len(s3.objects[manifest_key('u1')]['entries']) == 50
+
+
+def test_writers_come_from_status():
+    assert manifest_writers({'status': 'complete'}) == [MAIN_WRITER]
+    assert manifest_writers({'shards': ['0', '1']}) == ['0', '1']
+
+
+def test_read_manifest_aggregates_every_writer(s3):
+    status = {'shards': ['0', '1', '2']}
+    for shard, customers in (('0', ['C1', 'C2']), ('1', ['C3'])):
+        manifest = ResultsManifest('u1', shard)
+        for customer_id in customers:
+            manifest.append(manifest_entry(success(customer_id), f"results/u1/customers/{customer_id}.json"))
+        manifest.write(s3)
+    # Shard 2 has not written yet
+    entries = read_manifest(s3, 'u1', status)
+    assert sorted(entry['customer_id'] for entry in entries) == ['C1', 'C2', 'C3']
+
+
+def test_read_manifest_of_an_unsharded_upload(s3):
+    manifest = ResultsManifest('u1')
+    manifest.append(manifest_entry({'customer_id': 'C1', 'status': 'failed'}))
+    manifest.write(s3)
+    assert read_manifest(s3, 'u1', {'status': 'complete'})[0]['status'] == 'failed'
+    assert read_manifest(s3, 'u2', {'status': 'complete'}) == []
@@ -0,0 +1,188 @@
+"""Error classification, RetryBudget refusals and the RetryPolicy loop."""
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from shared import retry_policy
+from shared.retry_policy import (FATAL, THROTTLE, TRANSIENT, RetryBudget, RetryPolicy, classify_error,
+                                 get_retry_budget, new_retry_budget, set_retry_budget)
+
+
+def client_error(code, status=400):
+    return ClientError({'Error': {'Code': code, 'Message': code}, 'ResponseMetadata': {'HTTPStatusCode': status}},
+                       'InvokeModel')
+
+
+@pytest.fixture
+def budget():
+    """A fresh budget installed as the current one for the test."""
+    previous = get_retry_budget()
+    budget = RetryBudget(ratio=0.5, min_retries=2)
+    set_retry_budget(budget)
+    yield budget
+    set_retry_budget(previous)
+
+
+FAST = RetryPolicy(max_attempts=4, base_delay=0.001, max_delay=0.005)
+
+
+class FailingCall:
+    """Raise each error in turn, then return 'ok'."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.mark.parametrize('code,kind', [
+    ('ThrottlingException', THROTTLE),
+    ('throttlingException', THROTTLE),
+    ('TooManyRequestsException', THROTTLE),
+    ('ServiceUnavailableException', TRANSIENT),
+    ('ModelTimeoutException', TRANSIENT),
+    ('ValidationException', FATAL),
+    ('AccessDeniedException', FATAL),
+])
+def test_classifies_by_error_code(code, kind):
+    assert classify_error(client_error(code)) == kind
+
+
+def test_classifies_unknown_codes_by_status():
+    assert classify_error(client_error('Whatever', 429)) == THROTTLE
+    assert classify_error(client_error('Whatever', 503)) == TRANSIENT
+    assert classify_error(client_error('Whatever', 404)) == FATAL
+
+
+def test_classifies_connection_and_other_errors():
+    assert classify_error(EndpointConnectionError(endpoint_url='https://bedrock')) == TRANSIENT
+    assert classify_error(ValueError('Throttling in the message text')) == FATAL
+
+
+def test_budget_allows_min_retries_without_calls():
+    budget = RetryBudget(ratio=0.5, min_retries=2)
+    assert budget.allow_retry('op', THROTTLE, 0)
+    assert budget.allow_retry('op', TRANSIENT, 0)
+    assert not budget.allow_retry('op', THROTTLE, 0)
+    stats = budget.stats()
+    assert stats['retries'] == 2
+    assert stats['throttle_retries'] == 1
+    assert stats['transient_retries'] == 1
+    assert stats['denied_budget'] == 1
+    assert stats['by_operation'] == {'op': 2}
+
+
+def test_budget_refuses_at_ratio():
+    budget = RetryBudget(ratio=0.5, min_retries=0)
+    for _ in range(10):
+        budget.record_call()
+    granted = sum(budget.allow_retry('op', THROTTLE, 0) for _ in range(8))
+    assert granted == 5
+    assert budget.counters['denied_budget'] == 3
+    # More calls earn more retries
+    budget.record_call()
+    budget.record_call()
+    assert budget.allow_retry('op', THROTTLE, 0)
+    assert budget.stats()['retry_ratio'] == round(6 / 12, 3)
+
+
+def test_budget_refuses_waits_past_the_deadline():
+    budget = RetryBudget(ratio=1.0, min_retries=10, deadline=time.time() + 1.0)
+    assert budget.allow_retry('op', THROTTLE, 0.1)
+    assert not budget.allow_retry('op', THROTTLE, 2.0)
+    assert budget.counters['denied_deadline'] == 1
+    assert budget.counters['denied_budget'] == 0
+    assert budget.counters['retries'] == 1
+
+
+def test_expired_deadline_refuses_every_retry():
+    budget = RetryBudget(ratio=1.0, min_retries=10, deadline=time.time() - 1)
+    assert not budget.allow_retry('op', THROTTLE, 0)
+    assert budget.counters['denied_deadline'] == 1
+
+
+def test_new_budget_takes_the_deadline_from_the_lambda_context():
+    class Context:
+        def get_remaining_time_in_millis(self):
+            return 60000
+
+    budget = new_retry_budget(Context())
+    expected = time.time() + 60 - retry_policy.RETRY_DEADLINE_MARGIN_SECONDS
+    assert abs(budget.deadline - expected) < 1
+    assert new_retry_budget().deadline is None
+
+
+def test_next_delay_is_jittered_within_bounds():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+    for previous in (0, 1.0, 4.0):
+        for _ in range(50):
+            delay = policy.next_delay(previous)
+            assert 1.0 <= delay <= min(5.0, max(1.0, previous) * 3)
+
+
+def test_call_retries_throttles_then_succeeds(budget):
+    fn = FailingCall(client_error('ThrottlingException'), client_error('ServiceUnavailableException'))
+    assert FAST.call(fn, 'InvokeModel') == 'ok'
+    assert fn.attempts == 3
+    stats = budget.stats()
+    assert stats['calls'] == 1
+    assert stats['retries'] == 2
+    assert stats['gave_up'] == 0
+
+
+def test_call_raises_fatal_errors_at_once(budget):
+    fn = FailingCall(client_error('ValidationException'))
+    with pytest.raises(ClientError):
+        FAST.call(fn, 'InvokeModel')
+    assert fn.attempts == 1
+    assert budget.counters['fatal_errors'] == 1
+    assert budget.counters['retries'] == 0
+
+
+def test_call_gives_up_after_max_attempts(budget):
+    budget.min_retries = 10
+    fn = FailingCall(*[client_error('ThrottlingException')] * 10)
+    with pytest.raises(ClientError):
+        FAST.call(fn, 'InvokeModel')
+    assert fn.attempts == FAST.max_attempts
+    assert budget.counters['retries'] == FAST.max_attempts - 1
+    assert budget.counters['gave_up'] == 1
+
+
+def test_call_stops_when_the_budget_refuses(budget):
+    budget.min_retries = 1
+    budget.ratio = 0
+    fn = FailingCall(*[client_error('ThrottlingException')] * 10)
+    with pytest.raises(ClientError):
+        FAST.call(fn, 'InvokeModel')
+    assert fn.attempts == 2
+    assert budget.counters['denied_budget'] == 1
+    assert budget.counters['gave_up'] == 1
+
+
+def test_call_stops_at_the_deadline(budget):
+    budget.deadline = time.time() + 0.002
+    slow = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.01)
+    fn = FailingCall(*[client_error('ThrottlingException')] * 10)
+    with pytest.raises(ClientError):
+        slow.call(fn, 'InvokeModel')
+    assert fn.attempts == 1
+    assert budget.counters['denied_deadline'] == 1
+
+
+def test_call_async_shares_the_budget(budget):
+    fn = FailingCall(client_error('ThrottlingException'))
+
+    async def attempt():
+        return fn()
+
+    assert asyncio.run(FAST.call_async(attempt, 'InvokeModel')) == 'ok'
+    assert fn.attempts == 2
+    assert budget.counters['retries'] == 1
@@ -0,0 +1,147 @@
+"""S3Helper write-behind queue and get_many() bulk reads."""
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from shared.s3_helper import BulkGetError, WriteBehindError
+
+
+def client_error(code='InternalError'):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'S3')
+
+
+# Write-behind
+
+def test_put_json_behind_writes_inline_when_not_started(s3_helper):
+    sizes = []
+    s3_helper.put_json_behind('a.json', {'a': 1}, on_written=sizes.append)
+    assert s3_helper.get_json('a.json') == {'a': 1}
+    assert sizes and sizes[0] > 0
+    assert s3_helper.write_behind_stats()['queued'] == 0
+
+
+def test_queued_puts_do_not_wait_for_s3(s3_helper):
+    s3_helper.s3_client.latency = 0.02
+    s3_helper.start_write_behind(workers=4, queue_size=100)
+    start = time.perf_counter()
+    for i in range(20):
+        s3_helper.put_json_behind(f"k{i}.json", {'i': i})
+    assert time.perf_counter() - start < 0.1
+    s3_helper.flush()
+    assert all(s3_helper.get_json(f"k{i}.json") == {'i': i} for i in range(20))
+    stats = s3_helper.write_behind_stats()
+    assert (stats['queued'], stats['written'], stats['failed']) == (20, 20, 0)
+
+
+def test_on_written_reports_each_put(s3_helper):
+    s3_helper.start_write_behind(workers=2)
+    sizes = {}
+    lock = threading.Lock()
+
+    def recorder(key):
+        def record(size):
+            with lock:
+                sizes[key] = size
+        return record
+
+    for i in range(5):
+        s3_helper.put_json_behind(f"k{i}.json", {'i': i}, on_written=recorder(i))
+    s3_helper.flush()
+    assert sorted(sizes) == list(range(5))
+    assert all(size > 0 for size in sizes.values())
+
+
+def test_full_queue_blocks_the_caller(s3_helper):
+    s3_helper.s3_client.latency = 0.01
+    s3_helper.start_write_behind(workers=1, queue_size=2)
+    for i in range(10):
+        s3_helper.put_json_behind(f"k{i}.json", {'i': i})
+    assert s3_helper.write_behind_stats()['max_queue_depth'] <= 2
+    s3_helper.flush()
+    assert s3_helper.write_behind_stats()['written'] == 10
+
+
+def test_close_flushes_and_stops_the_writers(s3_helper):
+    s3_helper.start_write_behind(workers=3)
+    writers = list(s3_helper._writers)
+    for i in range(10):
+        s3_helper.put_json_behind(f"k{i}.json", {'i': i})
+    s3_helper.close()
+    assert all(s3_helper.get_json(f"k{i}.json") for i in range(10))
+    assert not any(writer.is_alive() for writer in writers)
+    # Back to inline writes
+    s3_helper.put_json_behind('after.json', {'late': True})
+    assert s3_helper.get_json('after.json') == {'late': True}
+
+
+def test_start_is_idempotent(s3_helper):
+    s3_helper.start_write_behind(workers=2)
+    writers = list(s3_helper._writers)
+    s3_helper.start_write_behind(workers=5)
+    assert s3_helper._writers == writers
+
+
+def test_flush_raises_failed_puts_once(s3_helper):
+    s3_helper.s3_client.fail_keys['bad.json'] = client_error()
+    s3_helper.start_write_behind(workers=2)
+    written = []
+    s3_helper.put_json_behind('bad.json', {'x': 1}, on_written=written.append)
+    s3_helper.put_json_behind('good.json', {'x': 2})
+    with pytest.raises(WriteBehindError) as raised:
+        s3_helper.flush()
+    assert list(raised.value.failures) == ['bad.json']
+    assert written == []
+    assert s3_helper.get_json('good.json') == {'x': 2}
+    assert s3_helper.write_behind_stats()['failed'] == 1
+    # Reported failures are not raised again
+    s3_helper.flush()
+
+
+def test_close_raises_failed_puts_and_still_stops(s3_helper):
+    s3_helper.s3_client.fail_keys['bad.json'] = client_error()
+    s3_helper.start_write_behind(workers=2)
+    writers = list(s3_helper._writers)
+    s3_helper.put_json_behind('bad.json', {'x': 1})
+    with pytest.raises(WriteBehindError):
+        s3_helper.close()
+    assert not any(writer.is_alive() for writer in writers)
+    assert s3_helper._write_queue is None
+
+
+# get_many
+
+def test_get_many_keeps_the_order_of_keys(s3_helper):
+    keys = [f"results/u1/customers/C{i:03d}.json" for i in range(40)]
+    for i, key in enumerate(keys):
+        s3_helper.put_json(key, {'index': i})
+    s3_helper.s3_client.latency = 0.002
+    assert [doc['index'] for doc in s3_helper.get_many(list(reversed(keys)), concurrency=8)] == list(range(39, -1, -1))
+
+
+def test_get_many_returns_none_for_missing_keys(s3_helper):
+    s3_helper.put_json('a.json', {'a': 1})
+    assert s3_helper.get_many(['missing.json', 'a.json', 'also-missing.json']) == [None, {'a': 1}, None]
+    assert s3_helper.get_many([]) == []
+
+
+def test_get_many_bounds_concurrency(s3_helper):
+    keys = [f"k{i}.json" for i in range(30)]
+    for key in keys:
+        s3_helper.put_json(key, {})
+    s3_helper.s3_client.latency = 0.005
+    s3_helper.get_many(keys, concurrency=4)
+    assert 1 < s3_helper.s3_client.peak <= 4
+
+
+@pytest.mark.parametrize('concurrency', [1, 8])
+def test_get_many_partial_failure_keeps_the_other_results(s3_helper, concurrency):
+    for key in ('a.json', 'c.json'):
+        s3_helper.put_json(key, {'key': key})
+    s3_helper.s3_client.fail_keys['b.json'] = client_error('AccessDenied')
+    with pytest.raises(BulkGetError) as raised:
+        s3_helper.get_many(['a.json', 'b.json', 'c.json', 'missing.json'], concurrency=concurrency)
+    assert list(raised.value.failures) == ['b.json']
+    assert 'AccessDenied' in raised.value.failures['b.json']
+    assert raised.value.results == [{'key': 'a.json'}, None, {'key': 'c.json'}, None]
@@ -0,0 +1,118 @@
+"""Leader/follower sharing in SingleFlight."""
+import threading
+import time
+
+import pytest
+
+from shared.single_flight import SingleFlight
+
+
+class BlockingCall:
+    """fn for SingleFlight.do() that blocks until released, then returns or raises."""
+
+    def __init__(self, result='ok', error=None):
+        self.result = result
+        self.error = error
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(2)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def run_followers(flight, key, count, outcomes):
+    """Start `count` callers of key and wait until they are all queued behind the leader."""
+    def follow():
+        try:
+            outcomes.append(flight.do(key, lambda: pytest.fail('follower ran fn')))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=follow, daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 1
+    while flight.calls[key].waiters < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return threads
+
+
+def start_leader(flight, key, fn, outcomes):
+    def lead():
+        try:
+            outcomes.append(flight.do(key, fn))
+        except Exception as e:
+            outcomes.append(e)
+
+    thread = threading.Thread(target=lead, daemon=True)
+    thread.start()
+    assert fn.started.wait(1)
+    return thread
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight()
+    fn = BlockingCall(result={'answer': 42})
+    leader_outcome, follower_outcomes = [], []
+    leader = start_leader(flight, 'k', fn, leader_outcome)
+    followers = run_followers(flight, 'k', 3, follower_outcomes)
+    fn.release.set()
+    for thread in [leader] + followers:
+        thread.join(1)
+
+    assert fn.calls == 1
+    assert leader_outcome == [({'answer': 42}, False)]
+    assert follower_outcomes == [({'answer': 42}, True)] * 3
+    assert flight.stats() == {'leaders': 1, 'coalesced': 3, 'shared_errors': 0, 'in_flight': 0}
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    assert flight.stats()['leaders'] == 2
+
+
+def test_sequential_calls_each_run():
+    flight = SingleFlight()
+    calls = []
+    for _ in range(2):
+        assert flight.do('k', lambda: calls.append(1) or len(calls)) == (len(calls), False)
+    assert len(calls) == 2
+    assert flight.stats()['coalesced'] == 0
+
+
+def test_errors_propagate_to_followers():
+    flight = SingleFlight()
+    error = RuntimeError('throttled')
+    fn = BlockingCall(error=error)
+    leader_outcome, follower_outcomes = [], []
+    leader = start_leader(flight, 'k', fn, leader_outcome)
+    followers = run_followers(flight, 'k', 2, follower_outcomes)
+    fn.release.set()
+    for thread in [leader] + followers:
+        thread.join(1)
+
+    assert leader_outcome == [error]
+    assert follower_outcomes == [error, error]
+    assert flight.stats()['shared_errors'] == 2
+
+
+def test_key_is_released_after_a_failure():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('bad')
+
+    with pytest.raises(ValueError):
+        flight.do('k', fail)
+    assert flight.calls == {}
+    assert flight.stats()['in_flight'] == 0
+    # The next caller runs fn again instead of inheriting the old error
+    assert flight.do('k', lambda: 'ok') == ('ok', False)
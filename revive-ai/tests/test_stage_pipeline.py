@@ -0,0 +1,97 @@
+"""Stage order, worker bounds, backpressure and failures in StagePipeline."""
+import threading
+import time
+
+from shared.stage_pipeline import Stage, StagePipeline
+
+
+class ConcurrencyProbe:
+    """Stage fn that records how many calls overlap."""
+
+    def __init__(self, name, delay=0.01):
+        self.name = name
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def __call__(self, ctx):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        ctx.setdefault('trace', []).append(self.name)
+        return ctx
+
+
+def run(pipeline, items):
+    results = []
+    pipeline.run(items, lambda ctx, error: results.append((ctx, error)))
+    return results
+
+
+def test_items_pass_every_stage_in_order():
+    stages = [Stage(name, ConcurrencyProbe(name, 0), workers=2) for name in ('analyze', 'campaign', 'persist')]
+    pipeline = StagePipeline(stages)
+    results = run(pipeline, [{'id': i} for i in range(10)])
+    assert sorted(ctx['id'] for ctx, _ in results) == list(range(10))
+    assert all(ctx['trace'] == ['analyze', 'campaign', 'persist'] and error is None for ctx, error in results)
+    stats = pipeline.stats()
+    assert list(stats) == ['analyze', 'campaign', 'persist']
+    assert all(stage['processed'] == 10 and stage['failed'] == 0 for stage in stats.values())
+
+
+def test_each_stage_is_bounded_by_its_workers():
+    fast, slow = ConcurrencyProbe('fast', 0.005), ConcurrencyProbe('slow', 0.02)
+    stages = [Stage('fast', fast, workers=4), Stage('slow', slow, workers=2)]
+    run(StagePipeline(stages), [{'id': i} for i in range(20)])
+    assert 1 < fast.peak <= 4
+    assert 1 < slow.peak <= 2
+
+
+def test_full_queue_applies_backpressure():
+    stages = [Stage('first', ConcurrencyProbe('first', 0), workers=1, queue_size=3),
+              Stage('slow', ConcurrencyProbe('slow', 0.01), workers=1, queue_size=2)]
+    run(StagePipeline(stages), [{'id': i} for i in range(15)])
+    assert stages[0].max_depth <= 3
+    assert stages[1].max_depth <= 2
+
+
+def test_failed_items_skip_downstream_stages():
+    def analyze(ctx):
+        if ctx['id'] % 3 == 0:
+            raise ValueError(f"bad row {ctx['id']}")
+        return ctx
+
+    persist = ConcurrencyProbe('persist', 0)
+    stages = [Stage('analyze', analyze, workers=2), Stage('persist', persist, workers=2)]
+    results = run(StagePipeline(stages), [{'id': i} for i in range(9)])
+
+    failed = {ctx['id']: error for ctx, error in results if error is not None}
+    assert sorted(failed) == [0, 3, 6]
+    assert all(isinstance(error, ValueError) for error in failed.values())
+    assert all(ctx['failed_stage'] == 'analyze' and 'trace' not in ctx for ctx, error in results if error)
+    assert stages[0].failed == 3
+    assert stages[1].processed == 6
+    assert len(results) == 9
+
+
+def test_stage_rate_limiter_is_acquired_per_item():
+    class CountingLimiter:
+        def __init__(self):
+            self.acquired = 0
+
+        def acquire(self, tokens=1):
+            self.acquired += tokens
+            return True
+
+    limiter = CountingLimiter()
+    stages = [Stage('analyze', ConcurrencyProbe('analyze', 0), workers=1, rate_limiter=limiter)]
+    run(StagePipeline(stages), [{'id': i} for i in range(5)])
+    assert limiter.acquired == 5
+
+
+def test_empty_input_finishes():
+    assert run(StagePipeline([Stage('a', lambda ctx: ctx, workers=3), Stage('b', lambda ctx: ctx)]), []) == []
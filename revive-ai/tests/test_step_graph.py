@@ -0,0 +1,127 @@
+"""Dependency order, failure handling and cycle prevention in StepGraph."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shared.step_graph import StepGraph
+
+
+def recorder():
+    """(log, step) where step(name, value) returns a step fn appending name to log."""
+    log = []
+    lock = threading.Lock()
+
+    def step(name, value=None, delay=0.0):
+        def fn(**inputs):
+            time.sleep(delay)
+            with lock:
+                log.append((name, sorted(inputs)))
+            return value if value is not None else name
+        return fn
+
+    return log, step
+
+
+def test_steps_receive_their_inputs_after_they_finish():
+    log, step = recorder()
+    graph = (StepGraph()
+             .add('analysis', step('analysis', {'category': 'pricing'}))
+             .add('campaign', lambda analysis: f"campaign for {analysis['category']}", inputs=['analysis'])
+             .add('findings', step('findings'), inputs=['analysis'])
+             .add('result', lambda campaign, findings: (campaign, findings), inputs=['campaign', 'findings']))
+    results = graph.run()
+    assert results['result'] == ('campaign for pricing', 'findings')
+    assert log == [('analysis', []), ('findings', ['analysis'])]
+    assert set(graph.timings) == {'analysis', 'campaign', 'findings', 'result'}
+
+
+def test_independent_steps_overlap():
+    _, step = recorder()
+    graph = (StepGraph()
+             .add('analysis', step('analysis'))
+             .add('campaign', step('campaign', delay=0.1), inputs=['analysis'])
+             .add('findings', step('findings', delay=0.1), inputs=['analysis']))
+    start = time.perf_counter()
+    graph.run()
+    assert time.perf_counter() - start < 0.18
+    assert graph.critical_path_seconds() < 0.18
+    assert abs(graph.timings['campaign']['start_offset'] - graph.timings['findings']['start_offset']) < 0.05
+
+
+def test_failure_skips_downstream_steps_and_lets_running_ones_finish():
+    log, step = recorder()
+
+    def findings(analysis):
+        raise ValueError('bad findings')
+
+    graph = (StepGraph()
+             .add('analysis', step('analysis'))
+             .add('campaign', step('campaign', delay=0.05), inputs=['analysis'])
+             .add('findings', findings, inputs=['analysis'])
+             .add('result', step('result'), inputs=['campaign', 'findings']))
+    with pytest.raises(ValueError, match='bad findings'):
+        graph.run()
+    names = [name for name, _ in log]
+    assert 'campaign' in names
+    assert 'result' not in names
+
+
+def test_failure_of_the_first_step_runs_nothing_else():
+    log, step = recorder()
+
+    def analysis():
+        raise RuntimeError('throttled')
+
+    graph = StepGraph().add('analysis', analysis).add('campaign', step('campaign'), inputs=['analysis'])
+    with pytest.raises(RuntimeError):
+        graph.run()
+    assert log == []
+
+
+def test_undeclared_inputs_are_rejected():
+    graph = StepGraph()
+    with pytest.raises(ValueError, match='undeclared'):
+        graph.add('campaign', lambda analysis: None, inputs=['analysis'])
+    with pytest.raises(ValueError, match='undeclared'):
+        graph.add('loop', lambda loop: None, inputs=['loop'])
+
+
+def test_redeclaring_a_step_cannot_create_a_cycle():
+    graph = StepGraph().add('a', lambda: 1).add('b', lambda a: a, inputs=['a'])
+    with pytest.raises(ValueError, match='already declared'):
+        graph.add('a', lambda b: b, inputs=['b'])
+    assert graph.run() == {'a': 1, 'b': 1}
+
+
+def test_run_async_follows_dependencies():
+    async def analysis():
+        await asyncio.sleep(0.01)
+        return 'pricing'
+
+    async def campaign(analysis):
+        return f"campaign for {analysis}"
+
+    graph = (StepGraph()
+             .add('analysis', analysis)
+             .add('campaign', campaign, inputs=['analysis'])
+             .add('summary', lambda analysis: analysis.upper(), inputs=['analysis']))
+    assert asyncio.run(graph.run_async()) == {
+        'analysis': 'pricing', 'campaign': 'campaign for pricing', 'summary': 'PRICING'
+    }
+
+
+def test_run_async_failure_skips_downstream_steps():
+    ran = []
+
+    async def analysis():
+        raise RuntimeError('throttled')
+
+    async def campaign(analysis):
+        ran.append('campaign')
+
+    graph = StepGraph().add('analysis', analysis).add('campaign', campaign, inputs=['analysis'])
+    with pytest.raises(RuntimeError):
+        asyncio.run(graph.run_async())
+    assert ran == []